@@ -0,0 +1,101 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+Benchmark of JSON codecs on large zone payloads
+
+Compares the former ``json.dumps()`` / ``requests.Response.json()`` path to
+every installed :mod:`powerdns.codec` backend, encoding a PATCH body and
+decoding zone details of growing sizes.
+"""
+
+import argparse
+import json
+import time
+
+import requests
+
+from powerdns.codec import CODECS, get_codec
+from powerdns.interface import RRSet
+
+
+def zone_details(size):
+    """Build zone details with *size* rrsets"""
+    return {
+        "id": "bench.test.",
+        "name": "bench.test.",
+        "kind": "Native",
+        "rrsets": [RRSet("host-%d.bench.test." % idx, "A",
+                         ["10.%d.%d.%d" % (idx >> 16 & 255, idx >> 8 & 255,
+                                           idx & 255)])
+                   for idx in range(size)],
+    }
+
+
+def timeit(func, repeat):
+    """Best execution time of *func* over *repeat* runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def requests_json(content):
+    """Decode content the way ``requests.Response.json()`` does"""
+    response = requests.models.Response()
+    response._content = content  # pylint: disable=protected-access
+    response.encoding = None
+    return response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('-s', '--sizes', default="1000,10000,100000",
+                        help="Comma separated numbers of rrsets")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="Runs per measure, best is kept")
+    args = parser.parse_args()
+
+    print("%-10s %-14s %12s %12s" % ("rrsets", "codec", "encode (ms)",
+                                     "decode (ms)"))
+    for size in [int(size) for size in args.sizes.split(',')]:
+        data = zone_details(size)
+        content = json.dumps(data).encode('utf-8')
+        encode = timeit(lambda: json.dumps(data), args.repeat)
+        decode = timeit(lambda: requests_json(content), args.repeat)
+        print("%-10d %-14s %12.2f %12.2f" % (size, "requests-json",
+                                             encode * 1000, decode * 1000))
+        for name in CODECS:
+            try:
+                codec = get_codec(name)
+            except ImportError:
+                continue
+            encode = timeit(lambda: codec.encode(data), args.repeat)
+            decode = timeit(lambda: codec.decode(content), args.repeat)
+            print("%-10d %-14s %12.2f %12.2f" % (size, name, encode * 1000,
+                                                 decode * 1000))
+
+
+if __name__ == "__main__":
+    main()
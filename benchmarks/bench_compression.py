@@ -0,0 +1,134 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+Benchmark of compressed request and response bodies
+
+Runs a zone details GET and a large rrsets PATCH against a local stand-in
+API server simulating a limited bandwidth link, with and without
+compression, and reports bytes on the wire and end-to-end latency.
+"""
+
+import argparse
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from powerdns.client import PDNSApiClient
+from powerdns.interface import RRSet
+
+
+def rrsets(size):
+    """Build *size* rrsets"""
+    return [RRSet("host-%d.bench.test." % idx, "A",
+                  ["10.0.%d.%d" % (idx >> 8 & 255, idx & 255)])
+            for idx in range(size)]
+
+
+class ThrottledHandler(BaseHTTPRequestHandler):
+    """Stand-in API sleeping according to the simulated bandwidth"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def transfer(self, size):
+        self.server.wire_bytes += size
+        time.sleep(size / self.server.bandwidth)
+
+    def do_GET(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = self.server.zone
+        headers = {"Content-Type": "application/json"}
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(len(body))
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.transfer(len(body))
+        self.wfile.write(body)
+
+    def do_PATCH(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.transfer(len(body))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        json.loads(body)
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def measure(client, httpd, func, repeat):
+    """Average latency and wire bytes of *func*"""
+    func()
+    httpd.wire_bytes = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return ((time.perf_counter() - start) / repeat,
+            httpd.wire_bytes // repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('-s', '--size', type=int, default=20000,
+                        help="Number of rrsets")
+    parser.add_argument('-b', '--bandwidth', type=float, default=10.0,
+                        help="Simulated bandwidth in Mbit/s")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="Calls per measure")
+    args = parser.parse_args()
+
+    data = rrsets(args.size)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ThrottledHandler)
+    httpd.bandwidth = args.bandwidth * 1e6 / 8
+    httpd.wire_bytes = 0
+    httpd.zone = json.dumps({"name": "bench.test.", "rrsets": data}).encode()
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    api = "http://127.0.0.1:%d/api/v1" % httpd.server_port
+
+    print("%d rrsets, %.1f Mbit/s" % (args.size, args.bandwidth))
+    print("%-12s %-10s %12s %14s" % ("operation", "compress", "latency (s)",
+                                     "wire bytes"))
+    for compress in (False, True):
+        client = PDNSApiClient(api, "secret", compress=compress)
+        if not compress:
+            client.request_headers['Accept-Encoding'] = 'identity'
+        for operation, func in (
+                ("GET zone", lambda: client.get("/zone")),
+                ("PATCH", lambda: client.patch("/zone",
+                                               data={"rrsets": data}))):
+            latency, wire_bytes = measure(client, httpd, func, args.repeat)
+            print("%-12s %-10s %12.3f %14d" % (operation, compress, latency,
+                                               wire_bytes))
+        client.close()
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+Benchmark of request logging overhead
+
+Measures :meth:`PDNSApiClient.request` in raw mode (no JSON decoding) on a
+large response with logging at INFO and DEBUG levels, against a stub
+session, and the cost of the eager ``response.text`` logging argument used
+by previous releases.
+"""
+
+import argparse
+import logging
+import time
+
+import requests
+
+from powerdns.client import PDNSApiClient
+
+
+class StubSession(object):
+    """Session answering the same response without network"""
+
+    def __init__(self, content):
+        self.content = content
+
+    def request(self, method, url, **kwargs):  # pylint: disable=W0613
+        response = requests.models.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = self.content  # pylint: disable=W0212
+        return response
+
+    def close(self):
+        pass
+
+
+def per_call(func, calls):
+    """Average execution time of *func*, in microseconds"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('-s', '--size', type=int, default=2 * 1024 * 1024,
+                        help="Response size in bytes")
+    parser.add_argument('-c', '--calls', type=int, default=50,
+                        help="Number of calls per measure")
+    args = parser.parse_args()
+
+    content = b'{"rrsets": ["' + b"x" * args.size + b'"]}'
+    logger = logging.getLogger("powerdns")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    client = PDNSApiClient("http://127.0.0.1/api/v1", "secret",
+                           codec="json")
+    client.transport._session = StubSession(content)  # pylint: disable=W0212
+
+    print("response size: %d bytes" % len(content))
+    for level in (logging.INFO, logging.DEBUG):
+        logger.setLevel(level)
+        print("%-38s %10.1f us/call" % (
+            "request at %s" % logging.getLevelName(level),
+            per_call(lambda: client.get("/servers", raw=True),
+                     args.calls)))
+
+    print("%-38s %10.1f us/call" % (
+        "eager response.text (previous release)",
+        per_call(lambda: requests.models.Response.text.fget(
+            StubSession(content).request("GET", "/")), args.calls)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+Benchmark suite of client and interface hot paths
+
+Measures RRSet construction and canonicalization, zone lookups on large
+servers, JSON encoding and decoding of PATCH bodies, end-to-end request
+overhead and client startup latency against an in-process fake PowerDNS
+API. Results are written as JSON and may be compared to a previous run to
+detect regressions.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+import powerdns
+from powerdns.client import PDNSApiClient
+from powerdns.codec import CODECS, get_codec
+from powerdns.fakeserver import FakePDNSServer
+from powerdns.interface import PDNSServer, PDNSZone, RRSet
+
+
+def sizes(value):
+    """Parse comma separated sizes"""
+    return [int(size) for size in value.split(',') if size]
+
+
+def measure(func, repeat, number=1):
+    """Time *func* and return per-call statistics in seconds"""
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        "best": min(timings),
+        "mean": statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def records(size):
+    """Build *size* relative record tuples"""
+    return [("host-%d" % idx,
+             "10.%d.%d.%d" % (idx >> 16 & 255, idx >> 8 & 255, idx & 255))
+            for idx in range(size)]
+
+
+def bench_rrsets(args):
+    """RRSet construction and ensure_canonical"""
+    for size in args.rrsets:
+        data = records(size)
+
+        def build():
+            return [RRSet(name, "A", [content]) for name, content in data]
+
+        yield "rrset_build", {"rrsets": size}, build
+        rrsets = list(zip(build(), [name for name, _ in data]))
+
+        def canonical():
+            for rrset, name in rrsets:
+                rrset['name'] = name
+                rrset.ensure_canonical("bench.test.")
+
+        yield "rrset_ensure_canonical", {"rrsets": size}, canonical
+
+
+def bench_zones(args):
+    """Zone lookups on servers with many zones"""
+    client = PDNSApiClient("http://127.0.0.1/api/v1", "secret")
+    for size in args.zones:
+        server = PDNSServer(client, {"id": "localhost", "version": "4",
+                                     "daemon_type": "authoritative"})
+        server._zones = [  # pylint: disable=protected-access
+            PDNSZone(client, server, {"name": "zone-%d.bench.test." % idx})
+            for idx in range(size)
+        ]
+        last = "zone-%d.bench.test." % (size - 1)
+        yield ("get_zone", {"zones": size},
+               lambda server=server, last=last: server.get_zone(last))
+        yield ("get_zone_missing", {"zones": size},
+               lambda server=server: server.get_zone("missing.bench.test."))
+        yield ("suggest_zone", {"zones": size},
+               lambda server=server, last=last:
+               server.suggest_zone("a.b." + last))
+
+
+def bench_codecs(args):
+    """JSON encoding and decoding of PATCH bodies"""
+    for size in args.bodies:
+        body = {"rrsets": [RRSet(name + ".bench.test.", "A", [content])
+                           for name, content in records(size)]}
+        content = json.dumps(body).encode()
+        for name in CODECS:
+            try:
+                codec = get_codec(name)
+            except ImportError:
+                continue
+            yield ("encode", {"rrsets": size, "codec": name},
+                   lambda codec=codec, body=body: codec.encode(body))
+            yield ("decode", {"rrsets": size, "codec": name},
+                   lambda codec=codec, content=content:
+                   codec.decode(content))
+
+
+def bench_requests(args):
+    """End-to-end request overhead against a fake API"""
+    fake = FakePDNSServer(api_key="secret").start()
+    try:
+        fake.populate(zones=1, records=10, suffix="bench.test.")
+        zone = "/servers/localhost/zones/zone-0.bench.test."
+        rrsets = {"rrsets": [RRSet("host-0.zone-0.bench.test.", "A",
+                                   ["10.0.0.1"])]}
+        for transport in args.transports:
+            try:
+                client = PDNSApiClient(fake.url, "secret",
+                                       transport=transport)
+            except ImportError:
+                continue
+            yield ("request_get", {"path": "/servers",
+                                   "transport": transport},
+                   lambda client=client: client.get("/servers"), args.calls)
+            yield ("request_get", {"path": "zone", "transport": transport},
+                   lambda client=client: client.get(zone), args.calls)
+            yield ("request_patch", {"rrsets": 1, "transport": transport},
+                   lambda client=client: client.patch(zone, data=rrsets),
+                   args.calls)
+            client.close()
+    finally:
+        fake.stop()
+
+
+def bench_startup(args):
+    """Client creation and first requests, with or without warm-up
+
+    Loopback connections are set up in microseconds, the warm-up pays off
+    with network round trips and TLS handshakes to a remote API.
+    """
+    fake = FakePDNSServer(api_key="secret").start()
+    try:
+        calls = [("GET", "servers")] * args.workers
+        for transport in args.transports:
+            try:
+                PDNSApiClient(fake.url, "secret", transport=transport)
+            except ImportError:
+                continue
+            for warmup in (0, args.workers):
+                params = {"transport": transport, "warmup": warmup}
+
+                def ping(transport=transport, warmup=warmup):
+                    with PDNSApiClient(fake.url, "secret",
+                                       transport=transport,
+                                       warmup_connections=warmup) as client:
+                        client.ping()
+
+                def bulk(transport=transport, warmup=warmup):
+                    with PDNSApiClient(fake.url, "secret",
+                                       transport=transport,
+                                       warmup_connections=warmup) as client:
+                        for result in client.bulk(calls,
+                                                  max_workers=args.workers):
+                            result.get()
+
+                yield "startup_ping", params, ping
+                yield ("startup_bulk", dict(params, calls=len(calls)),
+                       bulk)
+    finally:
+        fake.stop()
+
+
+BENCHMARKS = {
+    "rrsets": bench_rrsets,
+    "zones": bench_zones,
+    "codecs": bench_codecs,
+    "requests": bench_requests,
+    "startup": bench_startup,
+}
+
+
+def run(args):
+    """Run selected benchmarks and return results"""
+    results = []
+    for group in args.groups:
+        for case in BENCHMARKS[group](args):
+            name, params, func = case[:3]
+            number = case[3] if len(case) > 3 else 1
+            stats = measure(func, args.repeat, number)
+            result = {"group": group, "name": name, "params": params}
+            result.update(stats)
+            results.append(result)
+            print("%-8s %-24s %-48s %12.3f us" % (
+                group, name, json.dumps(params, sort_keys=True),
+                stats["best"] * 1e6), file=sys.stderr)
+    return results
+
+
+def key(result):
+    """Identifier of a result across runs"""
+    return "%s %s" % (result["name"], json.dumps(result["params"],
+                                                 sort_keys=True))
+
+
+def compare(results, baseline, threshold):
+    """Print ratios to a baseline and return regressions count"""
+    previous = dict((key(result), result) for result in baseline["results"])
+    regressions = 0
+    for result in results:
+        before = previous.get(key(result))
+        if before is None:
+            continue
+        ratio = result["best"] / before["best"]
+        flag = ""
+        if ratio > threshold:
+            flag = " REGRESSION"
+            regressions += 1
+        print("%-74s %8.2fx%s" % (key(result), ratio, flag), file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('-g', '--groups', default=",".join(BENCHMARKS),
+                        help="Comma separated benchmark groups")
+    parser.add_argument('--rrsets', type=sizes,
+                        default="10000,100000,1000000",
+                        help="Comma separated numbers of rrsets")
+    parser.add_argument('--zones', type=sizes, default="1000,10000,100000",
+                        help="Comma separated numbers of zones")
+    parser.add_argument('--bodies', type=sizes, default="1000,10000,100000",
+                        help="Comma separated numbers of rrsets per body")
+    parser.add_argument('-t', '--transports', default="requests,urllib3,httpx",
+                        type=lambda value: value.split(','),
+                        help="Comma separated transports of request "
+                             "benchmarks")
+    parser.add_argument('-c', '--calls', type=int, default=200,
+                        help="Calls per measure of request benchmarks")
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help="Concurrent calls and warmed up connections "
+                             "of startup benchmarks")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="Runs per measure")
+    parser.add_argument('-o', '--output', help="JSON results file")
+    parser.add_argument('--compare', help="JSON results file of a previous "
+                                          "run to compare to")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="Slowdown ratio reported as regression")
+    args = parser.parse_args()
+    args.groups = [group for group in args.groups.split(',') if group]
+    for group in args.groups:
+        if group not in BENCHMARKS:
+            parser.error("unknown benchmark group: %s" % group)
+
+    report = {
+        "version": powerdns.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "unit": "seconds per call",
+        "results": run(args),
+    }
+    if args.output:
+        with open(args.output, "w") as output_fp:
+            json.dump(report, output_fp, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.compare:
+        with open(args.compare) as baseline_fp:
+            baseline = json.load(baseline_fp)
+        if compare(report["results"], baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
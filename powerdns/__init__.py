@@ -25,6 +25,12 @@ import logging
 from logging.handlers import SysLogHandler
 from .client import PDNSApiClient
 from .interface import PDNSEndpoint, RRSet, Comment
+from .retry import RetryPolicy, RetryBudget
+from .ratelimit import RateLimiter
+from .breaker import CircuitBreaker
+from .balancer import EndpointPool
+from .metrics import ClientMetrics
+from .cache import ResponseCache
 
 
 #: Current version of the package as :class:`str`.
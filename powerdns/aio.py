@@ -0,0 +1,579 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+powerdns.aio - PowerDNS asyncio API client and interface
+
+This module requires the :mod:`aiohttp` package, installed with the
+``async`` extra (``pip install python-powerdns[async]``).
+"""
+
+import asyncio
+import json
+import logging
+import os
+from functools import partial
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from .client import PDNSApiClient
+from .codec import get_codec
+from .deadline import current_deadline
+from .exceptions import PDNSCanonicalError, PDNSDeadlineError, PDNSError
+
+
+LOG = logging.getLogger(__name__)
+
+
+# pylint: disable=too-many-instance-attributes
+class AsyncPDNSApiClient(object):
+    """Powerdns asyncio API client
+
+    It implements awaitable HTTP methods GET, POST, PUT, PATCH and DELETE
+    with the same signatures and return values as :class:`PDNSApiClient`.
+
+    This client is using :mod:`aiohttp` package. Please see
+    https://docs.aiohttp.org/ for more information.
+
+    :param str api_endpoint: Powerdns API endpoint
+    :param str api_key: API key
+    :param bool verify: Control SSL certificate validation
+    :param int timeout: Request timeout in seconds
+    :param int pool_maxsize: Maximum number of connections kept per host
+    :param codec: JSON codec name or instance, the fastest installed codec
+                  is used by default (see :func:`~powerdns.codec.get_codec`)
+
+    The underlying :class:`aiohttp.ClientSession` is created on first
+    request and must be released with :meth:`close`, or by using the
+    client as an asynchronous context manager::
+
+        async with AsyncPDNSApiClient(api_endpoint, api_key) as api_client:
+            await api_client.get('/servers')
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, api_endpoint, api_key, verify=True, timeout=None,
+                 pool_maxsize=100, codec=None):
+        """Initialization"""
+        if aiohttp is None:
+            raise ImportError("aiohttp is required by AsyncPDNSApiClient")
+        self._api_endpoint = api_endpoint
+        self._api_key = api_key
+        self._verify = verify
+        self._timeout = timeout
+        self._pool_maxsize = pool_maxsize
+        self._codec = get_codec(codec)
+        self._session = None
+
+        self.request_headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+
+        # Directly expose common HTTP methods
+        self.get = partial(self.request, method='GET')
+        self.post = partial(self.request, method='POST')
+        self.put = partial(self.request, method='PUT')
+        self.patch = partial(self.request, method='PATCH')
+        self.delete = partial(self.request, method='DELETE')
+
+    def __repr__(self):
+        return "AsyncPDNSApiClient(%s, %s, verify=%s, timeout=%s)" % (
+            repr(self._api_endpoint), repr(self._api_key),
+            repr(self._verify), repr(self._timeout)
+        )
+
+    def __str__(self):
+        return self._api_endpoint
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def session(self):
+        """HTTP session holding the connection pool
+
+        The session is created on first use, from within the running event
+        loop, and reused by every request.
+        """
+        if self._session is None or self._session.closed:
+            LOG.debug("creating http session (pool_maxsize=%d)",
+                      self._pool_maxsize)
+            connector = aiohttp.TCPConnector(
+                limit=self._pool_maxsize,
+                ssl=None if self._verify else False
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self._timeout)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the HTTP session and its pooled connections"""
+        session, self._session = self._session, None
+        if session is not None:
+            LOG.debug("closing http session")
+            await session.close()
+
+    async def request(self, path, method, data=None, deadline=None,
+                      **kwargs):
+        """Handle requests to API
+
+        :param str path: API endpoint's path to request
+        :param str method: HTTP method to use
+        :param dict data: Data to send (optional)
+        :param Deadline deadline: Deadline of the request, the current
+                                  :class:`~powerdns.deadline.Deadline` by
+                                  default
+        :return: Parsed json response as :class:`dict`
+
+        Additional named argument may be passed and are directly transmitted
+        to :meth:`request` method of :class:`aiohttp.ClientSession` object.
+
+        :raise PDNSError: If request's response is an error.
+        :raise PDNSDeadlineError: If the deadline has expired.
+        """
+        if deadline is None:
+            deadline = current_deadline()
+        headers = dict(self.request_headers)
+        if self._api_key:
+            headers['X-API-Key'] = self._api_key
+
+        LOG.debug("request: original path is %s", path)
+        if not path.startswith('http://') and not path.startswith('https://'):
+            url = "%s/%s" % (self._api_endpoint, path.lstrip('/'))
+        else:
+            url = path
+
+        if data is None:
+            data = {}
+        data = self._codec.encode(data)
+
+        if deadline is not None:
+            deadline.check(url)
+            total = deadline.remaining()
+            if self._timeout is not None:
+                total = min(total, self._timeout)
+            kwargs.setdefault('timeout', aiohttp.ClientTimeout(total=total))
+
+        LOG.info("request: %s %s", method, url)
+        try:
+            async with self.session.request(method, url, data=data,
+                                            headers=headers,
+                                            **kwargs) as response:
+                status_code = response.status
+                body = await response.read()
+        except asyncio.TimeoutError as error:
+            if deadline is not None and deadline.expired():
+                raise PDNSDeadlineError(url, deadline.timeout) from error
+            raise
+
+        LOG.info("request response code: %d", status_code)
+
+        # pylint: disable=no-else-return
+        if status_code in [200, 201]:
+            return self._codec.decode(body)
+        elif status_code == 204:
+            return ""
+        elif status_code == 404:
+            error_message = 'Not found'
+        else:
+            try:
+                error_message = PDNSApiClient._get_error(
+                    response=self._codec.decode(body))
+            except Exception:
+                error_message = body.decode('utf-8', 'replace')
+
+        LOG.error("raising error code %d", status_code)
+        LOG.debug("error response: %s", error_message)
+        raise PDNSError(url=url, status_code=status_code,
+                        message=error_message)
+
+
+# pylint: disable=too-few-public-methods
+class AsyncPDNSEndpointBase(object):
+    """Powerdns asyncio API Endpoint Base
+
+    :param AsyncPDNSApiClient api_client: Asyncio API client instance
+
+    Cached API data is filled under a per-object :class:`asyncio.Lock`,
+    concurrent tasks reading a cold cache wait for a single API call.
+    """
+    def __init__(self, api_client):
+        """Initialization method"""
+        self.api_client = api_client
+        self._cache_lock = asyncio.Lock()
+        self._get = api_client.get
+        self._post = api_client.post
+        self._patch = api_client.patch
+        self._put = api_client.put
+        self._delete = api_client.delete
+
+    async def _get_cached(self, attribute, loader):
+        """Get cached data, loading it once if needed
+
+        :param str attribute: Name of the cache attribute
+        :param loader: Coroutine function returning data to cache
+        :return: Cached data
+        """
+        data = getattr(self, attribute)
+        if data is None:
+            async with self._cache_lock:
+                data = getattr(self, attribute)
+                if data is None:
+                    data = await loader()
+                    setattr(self, attribute, data)
+        return data
+
+
+class AsyncPDNSEndpoint(AsyncPDNSEndpointBase):
+    """PowerDNS asyncio API Endpoint
+
+    :param AsyncPDNSApiClient api_client: Asyncio API client instance
+
+    .. seealso:: :class:`powerdns.interface.PDNSEndpoint`
+    """
+    def __init__(self, api_client):
+        """Initialization method"""
+        self._servers = None
+        super(AsyncPDNSEndpoint, self).__init__(api_client)
+
+    def __repr__(self):
+        return 'AsyncPDNSEndpoint(%s)' % repr(self.api_client)
+
+    def __str__(self):
+        return str(self.api_client)
+
+    async def get_servers(self):
+        """List PowerDNS servers
+
+        :return: Servers as :func:`list` of :class:`AsyncPDNSServer`
+        """
+        LOG.info("listing available PowerDNS servers")
+        servers = await self._get_cached('_servers', self._load_servers)
+        LOG.info("%d server(s) listed", len(servers))
+        return servers
+
+    async def _load_servers(self):
+        """Load servers from API"""
+        LOG.info("getting available servers from API")
+        return [AsyncPDNSServer(self.api_client, data)
+                for data in await self._get('/servers')]
+
+
+class AsyncPDNSServer(AsyncPDNSEndpointBase):
+    """Powerdns asyncio API Server Endpoint
+
+    :param AsyncPDNSApiClient api_client: Asyncio API client instance
+    :param str api_data: PowerDNS API server data
+
+    .. seealso:: :class:`powerdns.interface.PDNSServer`
+    """
+    def __init__(self, api_client, api_data):
+        """Initialization method"""
+        self._api_client = api_client
+        self._api_data = api_data
+        self.sid = api_data['id']
+        self.version = api_data['version']
+        self.daemon_type = api_data['daemon_type']
+        self.url = '/servers/%s' % self.sid
+        self._zones = None
+        super(AsyncPDNSServer, self).__init__(api_client)
+
+    def __repr__(self):
+        return 'AsyncPDNSServer(%s, %s)' % (
+            repr(self._api_client), repr(self._api_data)
+        )
+
+    def __str__(self):
+        return self.sid
+
+    async def get_config(self):
+        """Server configuration from PowerDNS API"""
+        LOG.info("getting server configuration")
+        return await self._get('%s/config' % self.url)
+
+    async def get_zones(self):
+        """List of DNS zones on a PowerDNS server
+
+        :return: Zones as :func:`list` of :class:`AsyncPDNSZone`
+
+        Results are cached in object, this cache is resetted in case of zone
+        creation, deletion, or restoration.
+        """
+        LOG.info("listing available zones")
+        zones = await self._get_cached('_zones', self._load_zones)
+        LOG.info("%d zone(s) listed", len(zones))
+        return zones
+
+    async def _load_zones(self):
+        """Load zones from API"""
+        LOG.info("getting available zones from API")
+        return [AsyncPDNSZone(self.api_client, self, data)
+                for data in await self._get('%s/zones' % self.url)]
+
+    async def search(self, search_term, max_result=100):
+        """Search term using API search endpoint
+
+        :param str search_term:
+        :param int max_result:
+        :return: Query results as :func:`list`
+
+        .. seealso:: :meth:`powerdns.interface.PDNSServer.search`
+        """
+        LOG.info("api search terms: %s", search_term)
+        results = await self._get('%s/search-data?q=%s&max=%d' % (
+            self.url,
+            search_term,
+            max_result
+        ))
+        LOG.info("%d search result(s)", len(results))
+        return results
+
+    # pylint: disable=inconsistent-return-statements
+    async def get_zone(self, name):
+        """Get zone by name
+
+        :param str name: Zone name (canonical)
+        :return: Zone as :class:`AsyncPDNSZone` instance or :obj:`None`
+        """
+        LOG.info("getting zone: %s", name)
+        for zone in await self.get_zones():
+            if zone.name == name:
+                LOG.debug("found zone: %s", zone)
+                return zone
+        LOG.info("zone not found: %s", name)
+
+    async def suggest_zone(self, r_name):
+        """Suggest best matching zone from existing zone
+
+        :param str r_name: Record canonical name
+        :return: Zone as :class:`AsyncPDNSZone` object or :obj:`None`
+
+        .. seealso:: :meth:`powerdns.interface.PDNSServer.suggest_zone`
+        """
+        LOG.info("suggesting zone for: %s", r_name)
+        if not r_name.endswith('.'):
+            raise PDNSCanonicalError(r_name)
+        best_match = None
+        for zone in await self.get_zones():
+            if r_name.endswith(zone.name):
+                if not best_match or len(zone.name) > len(best_match.name):
+                    best_match = zone
+        LOG.info("zone best match: %s", best_match)
+        return best_match
+
+    # pylint: disable=inconsistent-return-statements
+    # pylint: disable=too-many-arguments
+    async def create_zone(self, name, kind, nameservers, masters=None,
+                          servers=None, rrsets=None, update=False):
+        """Create or update a (new) zone
+
+        :param str name: Name of zone
+        :param str kind: Type of zone
+        :param list nameservers: Name servers
+        :param list masters: Zone masters
+        :param list servers: List of forwarded-to servers (recursor only)
+        :param list rrsets: Resource records sets
+        :param bool update: If the zone need to be updated or created
+        :return: Created zone as :class:`AsyncPDNSZone` instance or
+                 :obj:`None`
+        """
+        zone_data = {
+            "name": name,
+            "kind": kind,
+            "nameservers": nameservers,
+        }
+        if masters:
+            zone_data['masters'] = masters
+        if servers:
+            zone_data['servers'] = servers
+        if rrsets:
+            zone_data['rrsets'] = rrsets
+
+        if update is True:
+            LOG.info("update of zone: %s", name)
+            zone = await self.get_zone(name)
+            zone_id = (await zone.get_details())['id']
+            zone_data = await self._patch("{}/zones/{}".format(self.url,
+                                                               zone_id),
+                                          data=zone_data)
+        else:
+            LOG.info("creation of zone: %s", name)
+            zone_data = await self._post("%s/zones" % self.url,
+                                         data=zone_data)
+
+        if zone_data:
+            # reset server object cache
+            self._zones = None
+            LOG.info("zone %s successfully processed", name)
+            return AsyncPDNSZone(self.api_client, self, zone_data)
+
+    async def delete_zone(self, name):
+        """Delete a zone
+
+        :param str name: Zone name
+        :return: :class:`AsyncPDNSApiClient` response
+        """
+        # reset server object cache
+        self._zones = None
+        LOG.info("deletion of zone: %s", name)
+        return await self._delete("%s/zones/%s" % (self.url, name))
+
+    # pylint: disable=inconsistent-return-statements
+    async def restore_zone(self, json_file):
+        """Restore a zone from a json file produced by
+        :meth:`AsyncPDNSZone.backup`
+
+        :param str json_file: Backup file
+        :return: Restored zone as :class:`AsyncPDNSZone` instance or
+                 :obj:`None`
+        """
+        with open(json_file) as backup_fp:
+            zone_data = json.load(backup_fp)
+        self._zones = None
+        zone_name = zone_data['name']
+        zone_data['nameservers'] = []
+        LOG.info("restoration of zone: %s", zone_name)
+        zone_data = await self._post("%s/zones" % self.url, data=zone_data)
+        if zone_data:
+            LOG.info("zone successfully restored: %s", zone_data['name'])
+            return AsyncPDNSZone(self.api_client, self, zone_data)
+        LOG.info("%s zone restoration failed", zone_name)
+
+
+class AsyncPDNSZone(AsyncPDNSEndpointBase):
+    """Powerdns asyncio API Zone Endpoint
+
+    :param AsyncPDNSApiClient api_client: Asyncio API client instance
+    :param AsyncPDNSServer server: PowerDNS server instance
+    :param dict api_data: PowerDNS API zone data
+
+    .. seealso:: :class:`powerdns.interface.PDNSZone`
+    """
+    def __init__(self, api_client, server, api_data):
+        """Initialization method"""
+        self._api_client = api_client
+        self._api_data = api_data
+        self.server = server
+        self.name = api_data['name']
+        self.url = '%s/zones/%s' % (self.server.url, self.name)
+        self._details = None
+        super(AsyncPDNSZone, self).__init__(api_client)
+
+    def __repr__(self):
+        return "AsyncPDNSZone(%s, %s, %s)" % (
+            repr(self._api_client), repr(self.server), repr(self._api_data)
+        )
+
+    def __str__(self):
+        return self.name
+
+    async def get_details(self):
+        """Get zone's detailed data"""
+        LOG.info("getting %s zone details", self.name)
+        return await self._get_cached('_details', self._load_details)
+
+    async def _load_details(self):
+        """Load zone's detailed data from API"""
+        LOG.info("getting %s zone details from api", self.name)
+        return await self._get(self.url)
+
+    async def get_records(self):
+        """Get zone's records"""
+        LOG.info("getting %s zone records", self.name)
+        return (await self.get_details())['rrsets']
+
+    async def get_record(self, name):
+        """Get record data
+
+        :param str name: Record name
+        :return: Records data as :func:`list`
+        """
+        LOG.info("getting zone record: %s", name)
+        records = [record for record in await self.get_records()
+                   if record['name'] == name]
+        if not records:
+            LOG.info("record not found: %s", name)
+        return records
+
+    async def create_records(self, rrsets):
+        """Create resource record sets
+
+        :param list rrsets: Resource record sets
+        :return: Query response
+        """
+        LOG.info("creating %d record(s) to %s", len(rrsets), self.name)
+        for rrset in rrsets:
+            rrset.ensure_canonical(self.name)
+            rrset['changetype'] = 'REPLACE'
+
+        # reset zone object cache
+        self._details = None
+        return await self._patch(self.url, data={'rrsets': rrsets})
+
+    async def delete_records(self, rrsets):
+        """Delete resource record sets
+
+        :param list rrsets: Resource record sets
+        :return: Query response
+        """
+        LOG.info("deletion of %d records from %s", len(rrsets), self.name)
+        for rrset in rrsets:
+            rrset.ensure_canonical(self.name)
+            rrset['changetype'] = 'DELETE'
+
+        # reset zone object cache
+        self._details = None
+        return await self._patch(self.url, data={'rrsets': rrsets})
+
+    async def backup(self, directory, filename=None, pretty_json=False):
+        """Backup zone data to json file
+
+        :param str directory: Directory to store json file
+        :param str filename: Json file name
+        :param bool pretty_json: Enable pretty json display
+
+        .. seealso:: :meth:`powerdns.interface.PDNSZone.backup`
+        """
+        LOG.info("backup of zone: %s", self.name)
+        if not filename:
+            filename = self.name.rstrip('.') + ".json"
+        json_file = os.path.join(directory, filename)
+        LOG.info("backup file is %s", json_file)
+        details = await self.get_details()
+        with open(json_file, "w") as backup_fp:
+            if pretty_json:
+                json.dump(details, backup_fp, ensure_ascii=True, indent=2,
+                          sort_keys=True)
+            else:
+                json.dump(details, backup_fp)
+        LOG.info("zone %s successfully saved", self.name)
+
+    async def notify(self):
+        """Trigger notification for zone updates"""
+        LOG.info("notify of zone: %s", self.name)
+        return await self._put(self.url + '/notify')
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+powerdns.balancer - PowerDNS API endpoints load balancing
+"""
+
+import itertools
+import logging
+import threading
+import time
+
+from .ratelimit import READ_METHODS
+from . import fork
+
+
+LOG = logging.getLogger(__name__)
+
+
+class EndpointPool(object):
+    """Pool of PowerDNS API endpoints serving the same backend
+
+    The first endpoint is the primary: writes are sent to it and only fail
+    over to the other endpoints when it is unreachable. Reads are spread
+    across every endpoint using *strategy*:
+
+    * ``round-robin``: endpoints are used in turn,
+    * ``least-latency``: the endpoint with the lowest average response time
+      is preferred (moving average weighted by *latency_weight*).
+
+    Unreachable endpoints are put aside for *cooldown* seconds, unless no
+    other endpoint is available.
+
+    :param list endpoints: PowerDNS API endpoints, primary first
+    :param str strategy: Reads balancing strategy
+    :param float cooldown: Seconds an unreachable endpoint is put aside
+    :param float latency_weight: Weight of the last response time in
+                                 average latency
+    """
+    STRATEGIES = ('round-robin', 'least-latency')
+
+    def __init__(self, endpoints, strategy='round-robin', cooldown=30.0,
+                 latency_weight=0.3):
+        """Initialization"""
+        if isinstance(endpoints, str):
+            endpoints = [endpoints]
+        if not endpoints:
+            raise ValueError("at least one endpoint is required")
+        if strategy not in self.STRATEGIES:
+            raise ValueError("unknown strategy: %s" % strategy)
+        self.endpoints = list(endpoints)
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.latency_weight = latency_weight
+        self._counter = itertools.count()
+        self._latencies = dict.fromkeys(self.endpoints, 0.0)
+        self._down_until = {}
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def __repr__(self):
+        return "EndpointPool(%s, strategy=%s)" % (repr(self.endpoints),
+                                                  repr(self.strategy))
+
+    def __str__(self):
+        return ", ".join(self.endpoints)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_counter'] = next(self._counter)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._counter = itertools.count(state['_counter'])
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def _after_fork(self):
+        """Release the lock inherited in a forked child process"""
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self):
+        """Primary endpoint"""
+        return self.endpoints[0]
+
+    def select(self, method):
+        """Get endpoints to try for a request, in order
+
+        :param str method: HTTP method of the request
+        :return: Endpoints as :func:`list`
+        """
+        endpoints = self.endpoints
+        if len(endpoints) == 1:
+            return endpoints
+        if method.upper() in READ_METHODS:
+            if self.strategy == 'least-latency':
+                with self._lock:
+                    endpoints = sorted(endpoints, key=self._latencies.get)
+            else:
+                shift = next(self._counter) % len(endpoints)
+                endpoints = endpoints[shift:] + endpoints[:shift]
+        now = time.monotonic()
+        with self._lock:
+            down = [endpoint for endpoint in endpoints
+                    if self._down_until.get(endpoint, 0) > now]
+        if not down:
+            return endpoints
+        return [endpoint for endpoint in endpoints
+                if endpoint not in down] + down
+
+    def record_latency(self, endpoint, latency):
+        """Record response time of a successful request
+
+        :param str endpoint: Endpoint of the request
+        :param float latency: Response time in seconds
+        """
+        with self._lock:
+            self._down_until.pop(endpoint, None)
+            average = self._latencies.get(endpoint) or latency
+            self._latencies[endpoint] = (
+                self.latency_weight * latency +
+                (1 - self.latency_weight) * average
+            )
+
+    def mark_down(self, endpoint):
+        """Put aside an unreachable endpoint
+
+        :param str endpoint: Unreachable endpoint
+        """
+        LOG.warning("endpoint %s unreachable, put aside for %.1fs",
+                    endpoint, self.cooldown)
+        with self._lock:
+            self._down_until[endpoint] = time.monotonic() + self.cooldown
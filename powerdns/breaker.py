@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+powerdns.breaker - PowerDNS API client circuit breaker
+"""
+
+import collections
+import logging
+import threading
+import time
+
+from . import fork
+
+
+LOG = logging.getLogger(__name__)
+
+
+# pylint: disable=too-many-instance-attributes
+class CircuitBreaker(object):
+    """Circuit breaker of :class:`~powerdns.client.PDNSApiClient`
+
+    The circuit opens after *failure_threshold* consecutive failures, or
+    when the failure rate of the last *window_size* requests reaches
+    *error_rate_threshold*. While open, requests fail immediately with
+    :class:`~powerdns.exceptions.PDNSCircuitOpenError`. After
+    *recovery_timeout* seconds, the circuit is half-open and lets up to
+    *half_open_max_calls* probe requests through: a successful probe closes
+    the circuit, a failed one opens it again.
+
+    Connection errors, timeouts and server errors (5xx) are failures.
+
+    :param int failure_threshold: Consecutive failures opening the circuit
+    :param float error_rate_threshold: Failure rate opening the circuit,
+                                       between 0 and 1 (optional)
+    :param int window_size: Number of requests of the failure rate window
+    :param int min_requests: Minimum requests in window to use failure rate
+    :param float recovery_timeout: Seconds before probing an open circuit
+    :param int half_open_max_calls: Concurrent probes when half-open
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, failure_threshold=5, error_rate_threshold=None,
+                 window_size=50, min_requests=20, recovery_timeout=30.0,
+                 half_open_max_calls=1):
+        """Initialization"""
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_requests = min_requests
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._outcomes = collections.deque(maxlen=window_size)
+        self._failures = 0
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._probes = 0
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def __repr__(self):
+        return "CircuitBreaker(failure_threshold=%s, " \
+               "error_rate_threshold=%s, recovery_timeout=%s)" % (
+                   repr(self.failure_threshold),
+                   repr(self.error_rate_threshold),
+                   repr(self.recovery_timeout))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def _after_fork(self):
+        """Release the lock and the probe slots inherited in a forked
+        child process, probes of the parent process never complete there"""
+        self._lock = threading.Lock()
+        self._probes = 0
+
+    @property
+    def state(self):
+        """Current state of the circuit, ``closed``, ``open`` or
+        ``half-open``"""
+        with self._lock:
+            self._update_state()
+            return self._state
+
+    def _update_state(self):
+        """Switch an open circuit to half-open once recovery timeout is
+        elapsed"""
+        if self._state == self.OPEN and \
+                time.monotonic() - self._opened_at >= self.recovery_timeout:
+            LOG.info("circuit breaker half-open, probing API")
+            self._state = self.HALF_OPEN
+            self._probes = 0
+
+    def _open(self):
+        """Open the circuit"""
+        LOG.error("circuit breaker open for %.1fs", self.recovery_timeout)
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def allow(self):
+        """Check if a request may be sent
+
+        :return: :obj:`True` if the request may be sent
+        """
+        with self._lock:
+            self._update_state()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and \
+                    self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self):
+        """Record a successful request"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                LOG.info("circuit breaker closed")
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            self._failures = 0
+            self._outcomes.append(False)
+
+    def record_failure(self):
+        """Record a failed request"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._failures += 1
+            self._outcomes.append(True)
+            if self._state != self.CLOSED:
+                return
+            if self._failures >= self.failure_threshold:
+                self._open()
+            elif self.error_rate_threshold is not None and \
+                    len(self._outcomes) >= self.min_requests and \
+                    sum(self._outcomes) >= \
+                    self.error_rate_threshold * len(self._outcomes):
+                self._open()
+
+    def release_probe(self):
+        """Give back the probe slot of a request ending without outcome
+
+        Requests abandoned by their caller, such as those stopped by a
+        deadline, neither close nor open a half-open circuit, another
+        probe may be sent instead.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def reset(self):
+        """Close the circuit and forget recorded requests"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._outcomes.clear()
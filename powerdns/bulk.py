@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+"""
+powerdns.bulk - Concurrent execution of many API calls
+"""
+
+import contextvars
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+LOG = logging.getLogger(__name__)
+
+
+class BulkResult(object):
+    """Outcome of a call run by :meth:`~powerdns.client.PDNSApiClient.bulk`
+
+    :param int index: Position of the call in the given calls
+    :param str method: HTTP method
+    :param str path: Requested API path or full URL
+    :param result: Parsed response of the call
+    :param Exception error: Exception raised by the call, if any
+    """
+    def __init__(self, index, method, path, result=None, error=None):
+        """Initialization"""
+        self.index = index
+        self.method = method
+        self.path = path
+        self.result = result
+        self.error = error
+
+    def __repr__(self):
+        return "BulkResult(%d, %s, %s, error=%s)" % (
+            self.index, repr(self.method), repr(self.path), repr(self.error)
+        )
+
+    @property
+    def ok(self):
+        """Tell if the call succeeded"""
+        return self.error is None
+
+    def get(self):
+        """Get the parsed response of the call
+
+        :raise Exception: Error of the call, if it failed
+        """
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def _call(request, index, call):
+    """Run a single call and capture its outcome
+
+    :param callable request: Function sending a request
+    :param int index: Position of the call
+    :param tuple call: ``(method, path)`` or ``(method, path, data)``
+    :return: :class:`BulkResult`
+    """
+    method, path = call[0], call[1]
+    data = call[2] if len(call) > 2 else None
+    try:
+        return BulkResult(index, method, path,
+                          result=request(path, method, data=data))
+    except Exception as error:  # pylint: disable=broad-except
+        LOG.debug("bulk call %d %s %s failed: %s", index, method, path,
+                  error)
+        return BulkResult(index, method, path, error=error)
+
+
+def execute(request, calls, max_workers=10, ordered=True):
+    """Run calls on a bounded pool of threads
+
+    :param callable request: Function sending a request, with the
+                             signature of
+                             :meth:`~powerdns.client.PDNSApiClient.request`
+    :param calls: Iterable of ``(method, path)`` or ``(method, path, data)``
+                  tuples
+    :param int max_workers: Maximum number of concurrent calls
+    :param bool ordered: Yield results in the order of *calls* instead of
+                         as they complete
+    :return: Generator of :class:`BulkResult`
+
+    Calls are consumed lazily, at most twice *max_workers* of them being
+    in flight or waiting to be yielded. Each call runs in a copy of the
+    caller context, so the current
+    :class:`~powerdns.deadline.Deadline` applies to every call. Calls not
+    started yet are cancelled when the generator is closed.
+    """
+    window = max_workers * 2
+    calls = enumerate(calls)
+    pending = set()
+    done = {}
+    next_index = 0
+    exhausted = False
+    executor = ThreadPoolExecutor(max_workers=max_workers,
+                                  thread_name_prefix='pdns-bulk')
+    try:
+        while True:
+            while not exhausted and len(pending) + len(done) < window:
+                try:
+                    index, call = next(calls)
+                except StopIteration:
+                    exhausted = True
+                    break
+                context = contextvars.copy_context()
+                pending.add(executor.submit(context.run, _call, request,
+                                            index, call))
+            if not pending and not done:
+                return
+            if pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    if not ordered:
+                        yield result
+                    else:
+                        done[result.index] = result
+            while next_index in done:
+                yield done.pop(next_index)
+                next_index += 1
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+powerdns.cache - PowerDNS API client response cache
+"""
+
+import collections
+import logging
+import threading
+import time
+
+from .metrics import api_path, path_template
+from . import fork
+
+
+LOG = logging.getLogger(__name__)
+
+
+class ResponseCache(object):
+    """Read-through cache of API responses
+
+    Bodies of successful GET responses are cached by requested path,
+    including query string, for a time to live depending on the path
+    template (see :func:`~powerdns.metrics.path_template`). The least
+    recently used entries are evicted above *maxsize* entries.
+
+    Write requests invalidate cached entries of the written path, of its
+    sub-paths, of its parent collections and of the server search results.
+    Responses of requests started before an invalidation of their path are
+    not cached.
+
+    :param int maxsize: Maximum number of cached responses
+    :param float ttl: Default time to live in seconds
+    :param dict ttls: Time to live by path template, ``0`` disables
+                      caching of the matching paths
+
+    Example caching zones list for a minute and zone details for ten
+    seconds::
+
+        ResponseCache(ttl=60, ttls={
+            '/servers/{server_id}/zones/{zone_id}': 10,
+        })
+
+    Cached bodies are stored as :class:`bytes` and decoded on each hit, so
+    callers never share mutable data.
+    """
+    def __init__(self, maxsize=1024, ttl=60.0, ttls=None):
+        """Initialization"""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        # generation of recently requested paths, bumped on invalidation
+        self._generations = collections.OrderedDict()
+        self._counter = 0
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def __repr__(self):
+        return "ResponseCache(maxsize=%s, ttl=%s, ttls=%s)" % (
+            repr(self.maxsize), repr(self.ttl), repr(self.ttls)
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def _after_fork(self):
+        """Release the lock inherited in a forked child process"""
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(path):
+        """Get cache key of a path, keeping its query string"""
+        query = path.split('?', 1)[1] if '?' in path else None
+        path = api_path(path)
+        return path if query is None else '%s?%s' % (path, query)
+
+    def get_ttl(self, path):
+        """Get time to live of a path
+
+        :param str path: API path
+        :return: Time to live in seconds
+        """
+        if not self.ttls:
+            return self.ttl
+        return self.ttls.get(path_template(path), self.ttl)
+
+    def get(self, path):
+        """Get a cached response body
+
+        :param str path: API path
+        :return: Response body as :class:`bytes` or :obj:`None`
+        """
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, path):
+        """Get the generation of a path, before requesting it
+
+        :param str path: API path
+        :return: Generation to give to :meth:`set`
+        """
+        key = self._key(path)
+        with self._lock:
+            generation = self._generations.setdefault(key, self._counter)
+            self._generations.move_to_end(key)
+            while len(self._generations) > self.maxsize:
+                self._generations.popitem(last=False)
+            return generation
+
+    def set(self, path, content, generation=None):
+        """Cache a response body
+
+        :param str path: API path
+        :param bytes content: Response body
+        :param int generation: Generation of the path when the response was
+                               requested, the body is dropped if the path
+                               was invalidated since (optional)
+        """
+        ttl = self.get_ttl(path)
+        if ttl <= 0:
+            return
+        key = self._key(path)
+        with self._lock:
+            if generation is not None and \
+                    self._generations.get(key, self._counter) != generation:
+                LOG.debug("not caching response invalidated in flight: %s",
+                          key)
+                return
+            self._entries[key] = (time.monotonic() + ttl, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, path):
+        """Invalidate cached responses affected by a write
+
+        :param str path: Written API path
+        """
+        path = api_path(path)
+        parts = path.split('/')
+        ancestors = set('/'.join(parts[:idx]) for idx in range(1, len(parts)))
+        search = None
+        if parts[0] == 'servers' and len(parts) > 1:
+            search = 'servers/%s/search-data' % parts[1]
+
+        def affected(key):
+            """Tell if a cache key is affected by the write"""
+            key_path = key.split('?', 1)[0]
+            return key_path == path or key_path.startswith(path + '/') or \
+                key_path in ancestors or key_path == search
+
+        with self._lock:
+            self._counter += 1
+            for key in self._generations:
+                if affected(key):
+                    self._generations[key] = self._counter
+            for key in list(self._entries):
+                if affected(key):
+                    LOG.debug("invalidating cached response: %s", key)
+                    del self._entries[key]
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._counter += 1
+            self._generations.clear()
+            self._entries.clear()
+
+
+# pylint: disable=too-few-public-methods
+class _Call(object):
+    """In-flight call of :class:`SingleFlight`"""
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Coalescing of concurrent identical calls
+
+    The first caller of a key runs the call, concurrent callers of the same
+    key wait for it and get the same result, or the same exception.
+    """
+    def __init__(self):
+        """Initialization"""
+        self._calls = {}
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def __repr__(self):
+        return "SingleFlight()"
+
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self._calls = {}
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def _after_fork(self):
+        """Forget calls in flight in the parent process, which never
+        complete in a forked child process"""
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Run a call, unless an identical one is in flight
+
+        :param key: Hashable key identifying the call
+        :param callable func: Function to call
+        :return: Call result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            LOG.debug("waiting for in-flight call: %s", key)
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
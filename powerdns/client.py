@@ -21,11 +21,22 @@
 powerdns.client - PowerDNS API client
 """
 
-import json
+import gzip
 import logging
+import time
 from functools import partial
 import requests
-from .exceptions import PDNSError
+from .balancer import EndpointPool
+from .bulk import execute
+from .cache import SingleFlight
+from .codec import CODECS, get_codec
+from .deadline import current_deadline, split_timeout
+from .exceptions import PDNSError, PDNSCircuitOpenError, PDNSDeadlineError
+from .logs import PAYLOAD_LOG_SIZE, Payload, redact_headers
+from .metrics import RequestEvent
+from .ratelimit import READ_METHODS
+from .transport import get_transport, is_connect_error
+from . import tracing
 
 
 LOG = logging.getLogger(__name__)
@@ -40,10 +51,135 @@ class PDNSApiClient(object):
     This client is using :mod:`requests` package. Please see
     http://docs.python-requests.org/ for more information.
 
-    :param str api_endpoint: Powerdns API endpoint
+    :param api_endpoint: Powerdns API endpoint, list of endpoints or
+                         :class:`~powerdns.balancer.EndpointPool`
     :param str api_key: API key
     :param bool verify: Control SSL certificate validation
-    :param int timeout: Request timeout in seconds
+    :param timeout: Request timeout in seconds, or ``(connect, read)``
+                    timeouts tuple
+    :param int pool_connections: Number of per-host connection pools to cache
+    :param int pool_maxsize: Maximum number of connections kept per host
+    :param bool pool_block: Block when no free connection is available
+                            instead of opening a throw-away one
+    :param RetryPolicy retry: Retry policy of failed requests (optional)
+    :param RateLimiter rate_limiter: Rate limiter of requests (optional)
+    :param CircuitBreaker circuit_breaker: Circuit breaker of the API
+                                           endpoint (optional)
+    :param str endpoint_strategy: Reads balancing strategy when several
+                                  endpoints are given
+    :param codec: JSON codec name or instance, the fastest installed codec
+                  is used by default (see :func:`~powerdns.codec.get_codec`)
+    :param int log_payload_size: Maximum size of payloads logged at debug
+                                 level, in characters
+    :param bool compress: Request gzip compressed responses and compress
+                          request bodies
+    :param int compress_threshold: Minimum request body size to compress,
+                                   in bytes
+    :param ResponseCache cache: Cache of GET responses (optional)
+    :param bool coalesce: Share a single in-flight request between
+                          concurrent identical GET requests
+    :param float connect_timeout: Connection timeout in seconds, overrides
+                                  *timeout*
+    :param float read_timeout: Read timeout in seconds, overrides *timeout*
+    :param transport: HTTP transport name or instance, see
+                      :func:`~powerdns.transport.get_transport`, transports
+                      given by name are built from *verify* and pool
+                      parameters
+    :param int warmup_connections: Number of connections opened to each
+                                   API endpoint at creation, see
+                                   :meth:`warmup`
+
+    Requests are sent through a persistent :class:`requests.Session`, so
+    connections to the API are kept alive and reused by every HTTP method.
+    The pool is released with :meth:`close`, or automatically when the
+    client is used as a context manager::
+
+        with PDNSApiClient(api_endpoint, api_key) as api_client:
+            api_client.get('/servers')
+
+    A single client can be shared by many threads: request headers are
+    built for each call and the connection pool is thread-safe. Use
+    *pool_maxsize* to match the number of concurrent workers.
+
+    Without *retry* policy, failed requests are never retried. See
+    :class:`~powerdns.retry.RetryPolicy` to retry transient errors::
+
+        PDNSApiClient(api_endpoint, api_key,
+                      retry=RetryPolicy(max_attempts=5,
+                                        budget=RetryBudget()))
+
+    Requests throughput is controlled with a
+    :class:`~powerdns.ratelimit.RateLimiter`, applied to every attempt::
+
+        PDNSApiClient(api_endpoint, api_key,
+                      rate_limiter=RateLimiter(read_rate=200, write_rate=20,
+                                               write_concurrency=4))
+
+    With a :class:`~powerdns.breaker.CircuitBreaker`, requests fail
+    immediately with :class:`~powerdns.exceptions.PDNSCircuitOpenError`
+    while the API is considered down.
+
+    Several API nodes sharing the same backend may be given as a list of
+    endpoints. Reads are spread across them, writes are sent to the first
+    one, and requests fail over to the next endpoints on connection errors
+    (see :class:`~powerdns.balancer.EndpointPool`)::
+
+        PDNSApiClient(["https://pdns-01/api/v1", "https://pdns-02/api/v1"],
+                      api_key, endpoint_strategy='least-latency')
+
+    With *compress* enabled, responses are requested gzip compressed and
+    request bodies of at least *compress_threshold* bytes are sent gzip
+    compressed (``Content-Encoding: gzip``). The API webserver, or a proxy
+    in front of it, must support compressed request bodies.
+
+    GET responses may be cached with a :class:`~powerdns.cache.ResponseCache`,
+    invalidated by write requests sent through the client. With *coalesce*
+    enabled, concurrent identical GET requests wait for a single API call
+    and share its decoded result, which must then be considered read-only.
+    Requests bounded by a :class:`~powerdns.deadline.Deadline` are never
+    coalesced.
+
+    The connect timeout bounds the connection establishment, the read
+    timeout bounds each wait for response data. The overall duration of an
+    operation spanning several requests and retries is bounded with a
+    :class:`~powerdns.deadline.Deadline`.
+
+    Requests are sent with :mod:`requests` by default. The ``urllib3``
+    transport lowers the per-request overhead, and the ``httpx`` transport
+    multiplexes concurrent requests over HTTP/2 connections::
+
+        PDNSApiClient(api_endpoint, api_key, transport='urllib3')
+
+    Exchanges with the API may be recorded to a cassette file with a
+    :class:`~powerdns.transport.RecordingTransport`, and replayed offline
+    with a :class:`~powerdns.transport.ReplayTransport`::
+
+        PDNSApiClient(api_endpoint, api_key,
+                      transport=ReplayTransport("tests/cassette.json"))
+
+    Functions registered with :meth:`add_hook` are called before and after
+    each request with a :class:`~powerdns.metrics.RequestEvent`, see
+    :class:`~powerdns.metrics.ClientMetrics` for built-in counters and
+    latency histograms.
+
+    Many independent requests are sent concurrently with :meth:`bulk`.
+
+    Short-lived programs may pay name resolution, TCP and TLS setup ahead
+    of their first requests with *warmup_connections*: connections are
+    opened in parallel when the client is created, and :meth:`ping` checks
+    the API is answering using them::
+
+        api_client = PDNSApiClient(api_endpoint, api_key,
+                                   warmup_connections=4)
+        api_client.ping()
+
+    Clients may be pickled, to be given to :mod:`multiprocessing` workers,
+    and used in processes forked after their creation. Each process opens
+    its own connections, and the copies of the client share no state
+    afterwards. Processes may be forked while other threads are sending
+    requests, locks and requests in flight of the parent process are
+    forgotten in the child. Hooks are not pickled, they are registered again
+    in the worker processes if needed.
 
     .. method:: get(self, path, data=None, **kwargs)
 
@@ -70,12 +206,46 @@ class PDNSApiClient(object):
         Partial method invoking :meth:`~PDNSApiClient.request` with
         http method *DELETE*.
     """
-    def __init__(self, api_endpoint, api_key, verify=True, timeout=None):
+    # pylint: disable=too-many-arguments
+    def __init__(self, api_endpoint, api_key, verify=True, timeout=None,
+                 pool_connections=10, pool_maxsize=10, pool_block=False,
+                 retry=None, rate_limiter=None, circuit_breaker=None,
+                 endpoint_strategy='round-robin', codec=None,
+                 log_payload_size=PAYLOAD_LOG_SIZE, compress=False,
+                 compress_threshold=1024, cache=None, coalesce=False,
+                 connect_timeout=None, read_timeout=None, transport=None,
+                 warmup_connections=0):
         """Initialization"""
         self._api_endpoint = api_endpoint
+        if isinstance(api_endpoint, EndpointPool):
+            self._endpoints = api_endpoint
+        else:
+            self._endpoints = EndpointPool(api_endpoint,
+                                           strategy=endpoint_strategy)
         self._api_key = api_key
         self._verify = verify
         self._timeout = timeout
+        if connect_timeout is not None or read_timeout is not None:
+            connect, read = split_timeout(timeout)
+            timeout = (connect if connect_timeout is None else connect_timeout,
+                       read if read_timeout is None else read_timeout)
+        self._timeouts = timeout
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self._retry = retry
+        self._rate_limiter = rate_limiter
+        self._circuit_breaker = circuit_breaker
+        self._codec = get_codec(codec)
+        self._log_payload_size = log_payload_size
+        self._compress = compress
+        self._compress_threshold = compress_threshold
+        self._cache = cache
+        self._single_flight = SingleFlight() if coalesce else None
+        self._transport = get_transport(transport, verify=verify,
+                                        pool_connections=pool_connections,
+                                        pool_maxsize=pool_maxsize,
+                                        pool_block=pool_block)
 
         if not verify:
             LOG.debug("removing insecure https connection warnings")
@@ -88,13 +258,42 @@ class PDNSApiClient(object):
             'Accept': 'application/json'
         }
 
-        # Directly expose common HTTP methods
+        self.hooks = {
+            'before_request': [],
+            'after_request': [],
+        }
+
+        self._bind_methods()
+
+        if warmup_connections:
+            self.warmup(warmup_connections)
+
+    def _bind_methods(self):
+        """Directly expose common HTTP methods"""
         self.get = partial(self.request, method='GET')
         self.post = partial(self.request, method='POST')
         self.put = partial(self.request, method='PUT')
         self.patch = partial(self.request, method='PATCH')
         self.delete = partial(self.request, method='DELETE')
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for method in ('get', 'post', 'put', 'patch', 'delete'):
+            del state[method]
+        # built-in codecs may hold module functions, they are rebuilt by
+        # name, other codecs are pickled as is
+        if CODECS.get(getattr(self._codec, 'name', None)) is \
+                type(self._codec):
+            state['_codec'] = self._codec.name
+        state['hooks'] = dict((event, []) for event in self.hooks)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if isinstance(self._codec, str):
+            self._codec = get_codec(self._codec)
+        self._bind_methods()
+
     def __repr__(self):
         return "PDNSApiClient(%s, %s, verify=%s, timeout=%s)" % (
             repr(self._api_endpoint), repr(self._api_key),
@@ -102,69 +301,555 @@ class PDNSApiClient(object):
         )
 
     def __str__(self):
-        return self._api_endpoint
+        return str(self._endpoints)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def transport(self):
+        """HTTP transport sending requests"""
+        return self._transport
+
+    @property
+    def session(self):
+        """HTTP session holding the connection pool
+
+        Only available with transports based on :mod:`requests`, such as
+        the default :class:`~powerdns.transport.RequestsTransport`.
+        """
+        return self._transport.session
+
+    def close(self):
+        """Close the HTTP transport and its pooled connections
+
+        The client remains usable afterwards, a new connection pool is
+        created on the next request.
+        """
+        self._transport.close()
+
+    def warmup(self, connections=None):
+        """Open pooled connections to the API endpoints ahead of requests
+
+        :param int connections: Number of connections to open to each
+                                endpoint, *pool_maxsize* by default
+        :return: Number of connections opened
+
+        Connections are opened in parallel, bounded by the connect timeout.
+        Failures are logged and not raised, requests open connections as
+        usual when needed. Transports without connection pool, such as
+        ``httpx`` or cassette replay, open none.
+        """
+        count = connections or self._pool_maxsize
+        timeout = split_timeout(self._timeouts)[0]
+        opened = 0
+        for endpoint in self._endpoints.endpoints:
+            LOG.debug("opening %d connection(s) to %s", count, endpoint)
+            try:
+                opened += self._transport.connect(endpoint, count, timeout,
+                                                  self._verify)
+            except Exception as error:  # pylint: disable=broad-except
+                LOG.warning("warmup of %s failed: %s", endpoint, error)
+        LOG.info("warmup: %d connection(s) opened", opened)
+        return opened
+
+    def ping(self):
+        """Check the API is reachable and answering
+
+        :return: Round-trip time in seconds
+
+        The servers list is requested through pooled connections, skipping
+        the response cache.
+
+        :raise PDNSError: If the API answers with an error.
+        """
+        start = time.monotonic()
+        self._request('servers', 'GET', raw=True)
+        return time.monotonic() - start
+
+    def add_hook(self, event, hook):
+        """Register a request hook
+
+        :param str event: ``before_request`` or ``after_request``
+        :param callable hook: Function called with a
+                              :class:`~powerdns.metrics.RequestEvent`
+
+        Exceptions raised by hooks are logged and ignored.
+        """
+        if event not in self.hooks:
+            raise ValueError("unknown hook event: %s" % event)
+        self.hooks[event].append(hook)
+
+    def remove_hook(self, event, hook):
+        """Unregister a request hook
+
+        :param str event: ``before_request`` or ``after_request``
+        :param callable hook: Registered function
+        """
+        self.hooks[event].remove(hook)
+
+    def _dispatch_hooks(self, event, request_event):
+        """Call hooks registered for an event
+
+        :param str event: ``before_request`` or ``after_request``
+        :param RequestEvent request_event: Request event
+        """
+        for hook in self.hooks[event]:
+            try:
+                hook(request_event)
+            except Exception:
+                LOG.exception("%s hook %s failed", event, hook)
+
+    def _start_event(self, method, path, data):
+        """Start a request event if hooks are registered
+
+        :return: :class:`~powerdns.metrics.RequestEvent` or :obj:`None`
+        """
+        if not self.hooks['before_request'] and \
+                not self.hooks['after_request']:
+            return None
+        event = RequestEvent(method, path)
+        if isinstance(data, bytes):
+            event.request_bytes = len(data)
+        self._dispatch_hooks('before_request', event)
+        event.duration = time.monotonic()
+        return event
+
+    def _finish_event(self, event, response=None, error=None, stream=False):
+        """Finish a request event and call ``after_request`` hooks"""
+        if event is None:
+            return
+        event.duration = time.monotonic() - event.duration
+        event.error = error
+        if response is not None:
+            event.status_code = response.status_code
+            if not stream:
+                event.response_bytes = len(response.content)
+        self._dispatch_hooks('after_request', event)
+
+    def _build_headers(self):
+        """Build headers of a single request
+
+        :return: Request headers as :class:`dict`
+
+        Headers are copied from :attr:`request_headers` so concurrent
+        requests never share a mutable dict.
+        """
+        headers = dict(self.request_headers)
+        if self._api_key:
+            headers['X-API-Key'] = self._api_key
+        if self._compress:
+            headers['Accept-Encoding'] = 'gzip'
+        return headers
+
+    def _send_once(self, method, path, **kwargs):
+        """Send a single request attempt, through the circuit breaker
 
-    def request(self, path, method, data=None, **kwargs):
+        :param str method: HTTP method to use
+        :param str path: API path or full URL to request
+        :return: :class:`requests.Response` object
+
+        :raise PDNSCircuitOpenError: If the circuit breaker is open.
+        """
+        breaker = self._circuit_breaker
+        if breaker is None:
+            return self._send_limited(method, path, **kwargs)
+        if not breaker.allow():
+            LOG.error("circuit breaker open, %s %s not sent", method, path)
+            raise PDNSCircuitOpenError(path)
+        try:
+            response = self._send_limited(method, path, **kwargs)
+        except PDNSDeadlineError:
+            # the API did not fail, the caller ran out of time
+            breaker.release_probe()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def _send_limited(self, method, path, deadline=None, **kwargs):
+        """Send a single request attempt, within rate limits
+
+        :param str method: HTTP method to use
+        :param str path: API path or full URL to request
+        :param Deadline deadline: Deadline of the request (optional)
+        :return: :class:`requests.Response` object
+
+        :raise PDNSDeadlineError: If the deadline expires while waiting
+                                  for the rate limiter.
+        """
+        if self._rate_limiter is None:
+            return self._send_endpoints(method, path, deadline=deadline,
+                                        **kwargs)
+        with self._rate_limiter.limit(method, deadline=deadline, url=path):
+            return self._send_endpoints(method, path, deadline=deadline,
+                                        **kwargs)
+
+    def _send_endpoints(self, method, path, deadline=None, timeout=None,
+                        **kwargs):
+        """Send a single request attempt, failing over API endpoints
+
+        :param str method: HTTP method to use
+        :param str path: API path or full URL to request
+        :param Deadline deadline: Deadline of the request (optional)
+        :param timeout: Timeout of the attempt, bounded by the remaining
+                        budget of *deadline* when sent
+        :return: :class:`requests.Response` object
+
+        Full URLs are requested as is. Paths are requested on endpoints
+        selected by the endpoint pool, the next endpoint being tried when
+        one is unreachable. Writes are only sent to the next endpoint when
+        the connection could not be established, a write that may have
+        reached the API is never replayed on another node.
+
+        :raise PDNSDeadlineError: If the request timed out because the
+                                  deadline expired.
+        """
+        if path.startswith('http://') or path.startswith('https://'):
+            LOG.info("request: %s %s", method, path)
+            try:
+                return self._transport.request(
+                    method, path, timeout=self._clip(deadline, timeout),
+                    **kwargs)
+            except requests.exceptions.RequestException as error:
+                self._check_deadline(deadline, path, error)
+                raise
+
+        endpoints = self._endpoints.select(method)
+        for endpoint in endpoints:
+            url = "%s/%s" % (endpoint, path)
+            LOG.info("request: %s %s", method, url)
+            start = time.monotonic()
+            try:
+                response = self._transport.request(
+                    method, url, timeout=self._clip(deadline, timeout),
+                    **kwargs)
+            except requests.exceptions.ConnectionError as error:
+                self._check_deadline(deadline, url, error)
+                self._endpoints.mark_down(endpoint)
+                if endpoint is endpoints[-1]:
+                    raise
+                if method.upper() not in READ_METHODS and \
+                        not is_connect_error(error):
+                    LOG.warning("request %s %s failed after connection, "
+                                "not sent to other endpoints", method, url)
+                    raise
+                continue
+            except requests.exceptions.Timeout as error:
+                self._check_deadline(deadline, url, error)
+                raise
+            self._endpoints.record_latency(endpoint,
+                                           time.monotonic() - start)
+            return response
+
+    @staticmethod
+    def _clip(deadline, timeout):
+        """Bound a timeout by the remaining budget of a deadline, if any"""
+        if deadline is None:
+            return timeout
+        return deadline.clip(timeout)
+
+    @staticmethod
+    def _check_deadline(deadline, url, error):
+        """Report a timeout caused by an expired deadline
+
+        :param Deadline deadline: Deadline of the request, if any
+        :param str url: Requested URL
+        :param Exception error: Timeout or connection error of the request
+
+        :raise PDNSDeadlineError: If the deadline has expired.
+        """
+        if deadline is not None and deadline.expired() and \
+                isinstance(error, (requests.exceptions.Timeout,
+                                   requests.exceptions.ConnectionError)):
+            LOG.warning("request %s stopped by deadline (%s)", url,
+                        error.__class__.__name__)
+            raise PDNSDeadlineError(url, deadline.timeout) from error
+
+    def _send(self, method, path, deadline=None, timeout=None, **kwargs):
+        """Send a request, retrying it according to the retry policy
+
+        :param str method: HTTP method to use
+        :param str path: API path or full URL to request
+        :param Deadline deadline: Deadline of the request (optional)
+        :param timeout: Timeout of each attempt
+        :return: :class:`requests.Response` of the last attempt
+
+        Named arguments are directly transmitted to :meth:`request` method
+        of the transport. Errors of the last attempt are
+        raised as is. With a *deadline*, attempts timeouts are bounded by
+        the budget remaining once rate limits are waited for, and no retry
+        is attempted past it. File object bodies are rewound before each
+        retry, requests with bodies which can not be rewound are not
+        retried.
+
+        :raise PDNSDeadlineError: If the deadline has expired, before or
+                                  during an attempt.
+        """
+        retry = self._retry
+        if retry is None:
+            if deadline is not None:
+                deadline.check(path)
+            return self._send_once(method, path, deadline=deadline,
+                                   timeout=timeout, **kwargs)
+
+        retry.record_request()
+        body = kwargs.get('data')
+        if not hasattr(body, 'read'):
+            body = None
+        position = self._body_position(body)
+        rewindable = body is None or position is not None
+        attempt = 0
+        while True:
+            attempt += 1
+            if deadline is not None:
+                deadline.check(path)
+            if attempt > 1 and position is not None:
+                body.seek(position)
+            try:
+                response = self._send_once(method, path, deadline=deadline,
+                                           timeout=timeout, **kwargs)
+            except Exception as error:
+                if not rewindable or \
+                        not retry.is_retryable(method, attempt, error=error):
+                    raise
+                delay = retry.get_delay(attempt)
+                if deadline is not None and delay >= deadline.remaining():
+                    LOG.warning("request %s %s failed (%s), not retried "
+                                "past deadline", method, path,
+                                error.__class__.__name__)
+                    raise
+                reason = error.__class__.__name__
+            else:
+                if not rewindable or \
+                        not retry.is_retryable(method, attempt,
+                                               response=response):
+                    return response
+                delay = retry.get_delay(attempt, response=response)
+                if deadline is not None and delay >= deadline.remaining():
+                    LOG.warning("request %s %s failed (code %d), not "
+                                "retried past deadline", method, path,
+                                response.status_code)
+                    return response
+                reason = "code %d" % response.status_code
+                response.close()
+            LOG.warning("request %s %s failed (%s), attempt %d/%d, "
+                        "retrying in %.2fs", method, path, reason, attempt,
+                        retry.max_attempts, delay)
+            time.sleep(delay)
+
+    @staticmethod
+    def _body_position(body):
+        """Get the position to rewind a file object body to
+
+        :param body: File object body of a request, if any
+        :return: Current position, :obj:`None` if *body* can not be rewound
+        """
+        if body is None:
+            return None
+        try:
+            if hasattr(body, 'seekable') and not body.seekable():
+                return None
+            return body.tell()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    # pylint: disable=too-many-arguments
+    def request(self, path, method, data=None, raw=False, stream=False,
+                chunk_size=65536, deadline=None, **kwargs):
         """Handle requests to API
 
         :param str path: API endpoint's path to request
         :param str method: HTTP method to use
-        :param dict data: Data to send (optional)
+        :param dict data: Data to send (optional), :class:`bytes` and file
+                          objects are sent as is
+        :param bool raw: Return response body as :class:`bytes`, without
+                         parsing it
+        :param bool stream: Return an iterator over response body chunks,
+                            without loading it in memory
+        :param int chunk_size: Size of chunks in *stream* mode
+        :param Deadline deadline: Deadline of the request, the current
+                                  :class:`~powerdns.deadline.Deadline` by
+                                  default
         :return: Parsed json response as :class:`dict`
 
         Additional named argument may be passed and are directly transmitted
-        to :meth:`request` method of :class:`requests.Session` object.
+        to the :meth:`~powerdns.transport.Transport.request` method of the
+        configured transport.
+
+        In *stream* mode, the connection is released once the iterator is
+        exhausted or closed.
 
         :raise PDNSError: If request's response is an error.
+        :raise PDNSDeadlineError: If the deadline has expired.
         """
-        if self._api_key:
-            self.request_headers['X-API-Key'] = self._api_key
-
         LOG.debug("request: original path is %s", path)
         if not path.startswith('http://') and not path.startswith('https://'):
             if path.startswith('/'):
                 path = path.lstrip('/')
-            url = "%s/%s" % (self._api_endpoint, path)
-        else:
-            url = path
+        if deadline is None:
+            deadline = current_deadline()
+
+        # requests with a body or extra arguments (params, ...) are not
+        # identified by their path alone, they are never cached nor shared
+        if method == 'GET' and not stream and not data and not kwargs:
+            if self._cache is not None:
+                content = self._cache.get(path)
+                if content is not None:
+                    LOG.info("request: %s %s (cached)", method, path)
+                    return content if raw else self._codec.decode(content)
+            # a shared call would be bounded by the deadline of its first
+            # caller, callers having a deadline send their own requests
+            if self._single_flight is not None and deadline is None:
+                return self._single_flight.do(
+                    (path, raw),
+                    partial(self._request, path, method, raw=raw)
+                )
+
+        return self._request(path, method, data=data, raw=raw, stream=stream,
+                             chunk_size=chunk_size, deadline=deadline,
+                             **kwargs)
+
+    # pylint: disable=too-many-arguments,too-many-locals
+    def _request(self, path, method, data=None, raw=False, stream=False,
+                 chunk_size=65536, deadline=None, **kwargs):
+        """Send request to API and handle its response
+
+        See :meth:`request` for parameters, *path* being normalized.
+        """
+        if deadline is None:
+            deadline = current_deadline()
+        headers = self._build_headers()
+        cache = self._cache
+        cacheable = cache is not None and method == 'GET' and \
+            not data and not kwargs
+        generation = cache.generation(path) if cacheable else None
 
         if data is None:
             data = {}
-        data = json.dumps(data)
-
-        LOG.info("request: %s %s", method, url)
-        LOG.debug("headers: %s", self.request_headers)
-        LOG.debug("data: %s", data)
-        response = requests.request(method, url,
-                                    data=data,
-                                    headers=self.request_headers,
-                                    timeout=self._timeout,
-                                    verify=self._verify,
-                                    **kwargs)
+        if not isinstance(data, bytes) and not hasattr(data, 'read'):
+            data = self._codec.encode(data)
+
+        debug = LOG.isEnabledFor(logging.DEBUG)
+        if debug:
+            LOG.debug("headers: %s", redact_headers(headers))
+            LOG.debug("data: %s", Payload(data, self._log_payload_size))
+        if self._compress and isinstance(data, bytes) and \
+                len(data) >= self._compress_threshold:
+            data = gzip.compress(data, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+        event = self._start_event(method, path, data)
+        span = tracing.request_span(method, path)
+        try:
+            response = self._send(method, path,
+                                  deadline=deadline,
+                                  data=data,
+                                  headers=headers,
+                                  timeout=self._timeouts,
+                                  verify=self._verify,
+                                  stream=stream,
+                                  **kwargs)
+        except Exception as error:
+            tracing.end_request_span(span, error=error)
+            self._finish_event(event, error=error)
+            # a failed write, such as a timed out one, may still be applied
+            if cache is not None and method not in READ_METHODS:
+                cache.invalidate(path)
+            raise
+        tracing.end_request_span(span, status_code=response.status_code)
+        self._finish_event(event, response=response, stream=stream)
 
         LOG.info("request response code: %d", response.status_code)
-        LOG.debug("response: %s", response.text)
+        if cache is not None and method not in READ_METHODS:
+            cache.invalidate(path)
 
         # Try to handle basic return
         # pylint: disable=no-else-return
         if response.status_code in [200, 201]:
-            return response.json()
+            if stream:
+                return self._iter_content(response, chunk_size)
+            if debug:
+                LOG.debug("response: %s",
+                          Payload(response.content, self._log_payload_size))
+            if cacheable:
+                cache.set(path, response.content, generation)
+            if raw:
+                return response.content
+            return self._codec.decode(response.content)
         elif response.status_code == 204:
-            return ""
+            if stream:
+                return self._iter_content(response, chunk_size)
+            response.close()
+            return b"" if raw else ""
         elif response.status_code == 404:
             error_message = 'Not found'
         else:
             try:
-                error_message = self._get_error(response=response.json())
+                error_message = self._get_error(
+                    response=self._codec.decode(response.content))
             except Exception:
                 error_message = response.text
+        response.close()
 
         LOG.error("raising error code %d", response.status_code)
-        LOG.debug("error response: %s", error_message)
+        if debug:
+            LOG.debug("error response: %s",
+                      Payload(error_message, self._log_payload_size))
         raise PDNSError(url=response.url,
                         status_code=response.status_code,
                         message=error_message)
 
+    def bulk(self, calls, max_workers=None, ordered=True):
+        """Send many independent requests concurrently
+
+        :param calls: Iterable of ``(method, path)`` or
+                      ``(method, path, data)`` tuples
+        :param int max_workers: Maximum number of concurrent requests,
+                                *pool_maxsize* by default
+        :param bool ordered: Yield results in the order of *calls* instead
+                             of as they complete
+        :return: Generator of :class:`~powerdns.bulk.BulkResult`
+
+        Requests are sent by a bounded pool of threads, started when the
+        generator is first iterated. A failed request does not stop the
+        others, its exception is kept in the ``error`` attribute of its
+        result::
+
+            calls = [("PUT", "servers/localhost/zones/%s/notify" % name)
+                     for name in zone_names]
+            for result in api_client.bulk(calls, max_workers=20):
+                if not result.ok:
+                    LOG.error("%s failed: %s", result.path, result.error)
+
+        The current :class:`~powerdns.deadline.Deadline` applies to every
+        request.
+        """
+        return execute(self.request, calls,
+                       max_workers=max_workers or self._pool_maxsize,
+                       ordered=ordered)
+
+    @staticmethod
+    def _iter_content(response, chunk_size):
+        """Iterate over response body chunks, then release the connection
+
+        :param response: :class:`requests.Response` object
+        :param int chunk_size: Size of chunks
+        :return: Generator of :class:`bytes` chunks
+        """
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                yield chunk
+        finally:
+            response.close()
+
     @staticmethod
     def _get_error(response):
         """Get error message from API response
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+powerdns.codec - PowerDNS API JSON codecs
+
+Codecs encode request data straight to :class:`bytes` and decode response
+bodies straight from :class:`bytes`. The standard :mod:`json` module is
+always available, faster backends are used when installed.
+"""
+
+import codecs
+import json
+import logging
+
+
+LOG = logging.getLogger(__name__)
+
+
+class JSONCodec(object):
+    """Standard library :mod:`json` codec"""
+    name = 'json'
+
+    def __repr__(self):
+        return "%s()" % self.__class__.__name__
+
+    @staticmethod
+    def encode(data):
+        """Encode data to JSON
+
+        :param data: Data to encode
+        :return: JSON document as :class:`bytes`
+        """
+        return json.dumps(data).encode('utf-8')
+
+    @staticmethod
+    def decode(content):
+        """Decode a JSON document
+
+        :param bytes content: JSON document
+        :return: Decoded data
+        """
+        return json.loads(content)
+
+
+class OrjsonCodec(JSONCodec):
+    """:mod:`orjson` codec"""
+    name = 'orjson'
+
+    def __init__(self):
+        """Initialization"""
+        import orjson  # pylint: disable=import-outside-toplevel
+        self.encode = orjson.dumps
+        self.decode = orjson.loads
+
+
+class UjsonCodec(JSONCodec):
+    """:mod:`ujson` codec"""
+    name = 'ujson'
+
+    def __init__(self):
+        """Initialization"""
+        import ujson  # pylint: disable=import-outside-toplevel
+        self._ujson = ujson
+        self.decode = ujson.loads
+
+    def encode(self, data):
+        """Encode data to JSON
+
+        :param data: Data to encode
+        :return: JSON document as :class:`bytes`
+        """
+        return self._ujson.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+_DECODER = json.JSONDecoder()
+_WHITESPACES = ' \t\n\r'
+
+
+# pylint: disable=too-many-branches
+def iter_json_items(chunks, key):
+    """Iterate over items of an array member of a JSON object, incrementally
+
+    :param chunks: Iterable of :class:`bytes` chunks of a JSON object
+    :param str key: Name of the top-level array member
+    :return: Generator of decoded items
+
+    Only the current item and the unread part of the current chunk are
+    kept in memory, so arrays of any size are decoded in bounded memory.
+    Top-level members preceding *key* are skipped, members following the
+    array are not read. Nothing is yielded if *key* is missing.
+
+    :raise ValueError: If the document is not a valid JSON object.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    state = {'buffer': '', 'pos': 0, 'eof': False}
+
+    def fill():
+        """Read next chunk, return False at end of document"""
+        if state['eof']:
+            return False
+        buffer = state['buffer'][state['pos']:]
+        try:
+            buffer += decoder.decode(next(chunks))
+        except StopIteration:
+            buffer += decoder.decode(b'', final=True)
+            state['eof'] = True
+        state['buffer'], state['pos'] = buffer, 0
+        return True
+
+    def skip_whitespaces():
+        """Move to next significant character and return it"""
+        while True:
+            buffer, pos = state['buffer'], state['pos']
+            while pos < len(buffer) and buffer[pos] in _WHITESPACES:
+                pos += 1
+            state['pos'] = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not fill():
+                raise ValueError("unexpected end of JSON document")
+
+    def expect(chars):
+        """Consume one of the expected characters and return it"""
+        char = skip_whitespaces()
+        if char not in chars:
+            raise ValueError("expected one of %r at position %d, got %r"
+                             % (chars, state['pos'], char))
+        state['pos'] += 1
+        return char
+
+    def decode_value():
+        """Decode next complete JSON value"""
+        skip_whitespaces()
+        while True:
+            buffer, pos = state['buffer'], state['pos']
+            try:
+                value, end = _DECODER.raw_decode(buffer, pos)
+            except ValueError:
+                if not fill():
+                    raise
+                continue
+            # a value ending the buffer may be a truncated number
+            if end == len(buffer) and fill():
+                continue
+            state['pos'] = end
+            return value
+
+    expect('{')
+    if skip_whitespaces() == '}':
+        return
+    while True:
+        name = decode_value()
+        expect(':')
+        if name == key:
+            break
+        decode_value()
+        if expect(',}') == '}':
+            return
+
+    expect('[')
+    if skip_whitespaces() == ']':
+        return
+    while True:
+        yield decode_value()
+        if expect(',]') == ']':
+            return
+
+
+#: Available codecs by name, by order of preference
+CODECS = {
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+    'json': JSONCodec,
+}
+
+
+def get_codec(codec=None):
+    """Get a JSON codec
+
+    :param codec: Codec name, codec instance or :obj:`None` to use the
+                  fastest installed codec
+    :return: Codec instance
+    :raise ImportError: If the requested codec is not installed
+    """
+    if codec is None:
+        for name in CODECS:
+            try:
+                return get_codec(name)
+            except ImportError:
+                LOG.debug("json codec %s is not installed", name)
+    if isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError("unknown json codec: %s" % codec)
+        return CODECS[codec]()
+    return codec
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+"""
+powerdns.deadline - Time budget of PowerDNS API operations
+"""
+
+import contextvars
+import functools
+import time
+
+from .exceptions import PDNSDeadlineError
+
+
+_CURRENT = contextvars.ContextVar('powerdns_deadline', default=None)
+#: Deadlines current before entering each :class:`Deadline` context
+_PREVIOUS = contextvars.ContextVar('powerdns_deadline_previous', default=())
+
+
+def split_timeout(timeout):
+    """Split a timeout in connect and read timeouts
+
+    :param timeout: Timeout in seconds, ``(connect, read)`` tuple or
+                    :obj:`None`
+    :return: ``(connect, read)`` tuple
+    """
+    if isinstance(timeout, (tuple, list)):
+        return timeout[0], timeout[1]
+    return timeout, timeout
+
+
+class Deadline(object):
+    """Time budget shared by every API request of an operation
+
+    While a deadline is current, each request sent by
+    :class:`~powerdns.client.PDNSApiClient` gets only the remaining budget
+    as connect and read timeouts, retries are not attempted past the
+    deadline, and requests fail with
+    :class:`~powerdns.exceptions.PDNSDeadlineError` once it has expired.
+
+    A deadline is made current as a context manager, for the calling thread
+    or asyncio task, or given to interface operations as their ``deadline``
+    argument. :class:`~powerdns.aio.AsyncPDNSApiClient` requests are bounded
+    by the deadline current in their task::
+
+        with Deadline(30):
+            server.create_zone(name, kind, nameservers, update=True)
+
+        zone.create_records(rrsets, deadline=Deadline(5))
+
+    Nested deadlines never extend an enclosing one, the earliest applies.
+
+    :param float timeout: Budget in seconds, starting at creation
+    """
+    def __init__(self, timeout):
+        """Initialization"""
+        self.timeout = timeout
+        self.expires = time.monotonic() + timeout
+
+    def __repr__(self):
+        return "Deadline(%r, remaining=%.3f)" % (self.timeout,
+                                                 self.remaining())
+
+    def __enter__(self):
+        current = _CURRENT.get()
+        deadline = self
+        if current is not None and current.expires <= self.expires:
+            deadline = current
+        # kept in context variables, not context tokens, so that a deadline
+        # may be entered by several threads or asyncio tasks at once
+        _PREVIOUS.set(_PREVIOUS.get() + (current,))
+        _CURRENT.set(deadline)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        previous = _PREVIOUS.get()
+        _PREVIOUS.set(previous[:-1])
+        _CURRENT.set(previous[-1])
+
+    def remaining(self):
+        """Remaining budget in seconds, ``0`` once expired"""
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        """Tell if the deadline has expired"""
+        return time.monotonic() >= self.expires
+
+    def check(self, url=''):
+        """Ensure the deadline has not expired
+
+        :param str url: Requested URL, for the error
+        :raise PDNSDeadlineError: If the deadline has expired.
+        """
+        if self.expired():
+            raise PDNSDeadlineError(url, self.timeout)
+
+    def clip(self, timeout=None):
+        """Bound request timeouts by the remaining budget
+
+        :param timeout: Timeout in seconds, ``(connect, read)`` tuple or
+                        :obj:`None`
+        :return: ``(connect, read)`` tuple
+        """
+        remaining = self.remaining()
+        return tuple(remaining if value is None else min(value, remaining)
+                     for value in split_timeout(timeout))
+
+
+def current_deadline():
+    """Get the current deadline
+
+    :return: :class:`Deadline` or :obj:`None`
+    """
+    return _CURRENT.get()
+
+
+def set_deadline(deadline):
+    """Make a deadline current for the rest of the calling context
+
+    :param Deadline deadline: Deadline, :obj:`None` to remove the current
+                              one
+
+    Meant for scripts bounding their whole run, operations should rather
+    use :class:`Deadline` as a context manager.
+    """
+    _CURRENT.set(deadline)
+
+
+def with_deadline(func):
+    """Decorator adding a ``deadline`` argument to an operation
+
+    The given :class:`Deadline` is current while the operation runs.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        deadline = kwargs.pop('deadline', None)
+        if deadline is None:
+            return func(*args, **kwargs)
+        with deadline:
+            return func(*args, **kwargs)
+    return wrapper
@@ -49,3 +49,35 @@ class PDNSError(Exception):
         self.url = url
         self.status_code = status_code
         self.message = message
+
+
+class PDNSCircuitOpenError(PDNSError):
+    """PowerDNS API circuit breaker Exception
+
+    Raised without contacting the API while the client circuit breaker is
+    open. As no response is received, :attr:`status_code` is ``0``.
+    """
+    def __repr__(self):
+        return "PDNSCircuitOpenError(\"%s\", \"%s\")" % (self.url,
+                                                         self.message)
+
+    def __init__(self, url, message="circuit breaker is open"):
+        """Initialization"""
+        super(PDNSCircuitOpenError, self).__init__(url, 0, message)
+
+
+class PDNSDeadlineError(PDNSError):
+    """PowerDNS API deadline Exception
+
+    Raised without contacting the API once the
+    :class:`~powerdns.deadline.Deadline` of an operation has expired. As no
+    response is received, :attr:`status_code` is ``0``.
+    """
+    def __repr__(self):
+        return "PDNSDeadlineError(\"%s\", %r)" % (self.url, self.timeout)
+
+    def __init__(self, url, timeout):
+        """Initialization"""
+        super(PDNSDeadlineError, self).__init__(
+            url, 0, "deadline of %ss exceeded" % timeout)
+        self.timeout = timeout
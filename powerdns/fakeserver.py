@@ -0,0 +1,478 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+"""
+powerdns.fakeserver - In-process stand-in of the PowerDNS API
+"""
+
+import fnmatch
+import gzip
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_SOA = "ns.%s hostmaster.%s 1 10800 3600 604800 3600"
+
+ROUTES = [
+    ('GET', r'/servers', 'list_servers'),
+    ('GET', r'/servers/(?P<server_id>[^/]+)', 'get_server'),
+    ('GET', r'/servers/(?P<server_id>[^/]+)/config', 'get_config'),
+    ('GET', r'/servers/(?P<server_id>[^/]+)/search-data', 'search_data'),
+    ('GET', r'/servers/(?P<server_id>[^/]+)/zones', 'list_zones'),
+    ('POST', r'/servers/(?P<server_id>[^/]+)/zones', 'create_zone'),
+    ('GET', r'/servers/(?P<server_id>[^/]+)/zones/(?P<zone_id>[^/]+)',
+     'get_zone'),
+    ('PATCH', r'/servers/(?P<server_id>[^/]+)/zones/(?P<zone_id>[^/]+)',
+     'patch_zone'),
+    ('PUT', r'/servers/(?P<server_id>[^/]+)/zones/(?P<zone_id>[^/]+)',
+     'patch_zone'),
+    ('DELETE', r'/servers/(?P<server_id>[^/]+)/zones/(?P<zone_id>[^/]+)',
+     'delete_zone'),
+    ('PUT', r'/servers/(?P<server_id>[^/]+)/zones/(?P<zone_id>[^/]+)/notify',
+     'notify_zone'),
+]
+
+
+class APIError(Exception):
+    """Error answered to the client as a PowerDNS API error"""
+    def __init__(self, status_code, message):
+        """Initialization"""
+        super(APIError, self).__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def _in_zone(name, zone_name):
+    """Tell if a record name belongs to a zone"""
+    return name == zone_name or name.endswith('.' + zone_name)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler dispatching API calls to :class:`FakePDNSServer`"""
+
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, avoid delayed ACK stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self):
+        fake = self.server.fake
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        try:
+            status_code, data = fake.dispatch(
+                self.command, self.path, self.headers.get("X-API-Key"), body
+            )
+        except APIError as error:
+            status_code, data = error.status_code, {"error": error.message}
+
+        content = b"" if data is None else json.dumps(data).encode()
+        headers = {}
+        if content:
+            headers["Content-Type"] = "application/json"
+            if fake.compress and \
+                    "gzip" in self.headers.get("Accept-Encoding", ""):
+                content = gzip.compress(content, compresslevel=6)
+                headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(len(content))
+        self.send_response(status_code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    """HTTP server ignoring clients disconnections"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super(_HTTPServer, self).handle_error(request, client_address)
+
+
+# pylint: disable=too-many-instance-attributes
+class FakePDNSServer(object):
+    """In-process stand-in of the PowerDNS authoritative server API
+
+    Zones and records are stored in memory. The server implements
+    ``/servers``, zones listing, creation, retrieval and deletion, rrsets
+    ``PATCH`` with ``REPLACE`` and ``DELETE`` changetypes, ``/search-data``
+    and ``/notify``, with PowerDNS API status codes and error bodies.
+
+    It runs in a background thread, from :meth:`start` to :meth:`stop`, or
+    as a context manager::
+
+        with FakePDNSServer(api_key="secret") as server:
+            server.populate(zones=1000, records=100)
+            api_client = PDNSApiClient(server.url, "secret")
+
+    :param str host: Listening address
+    :param int port: Listening port, a free port is picked by default
+    :param str api_key: Expected API key, not checked by default
+    :param str server_id: Server identifier
+    :param float latency: Seconds every request is delayed
+    :param float jitter: Maximum random seconds added to *latency*
+    :param float error_rate: Probability of answering *error_status*
+    :param int error_status: Status code of injected errors
+    :param bool compress: Gzip compress responses accepting it
+    :param int seed: Seed of the random generator of jitter and errors
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, host='127.0.0.1', port=0, api_key=None,
+                 server_id='localhost', latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=503, compress=False,
+                 seed=None):
+        """Initialization"""
+        self.host = host
+        self.port = port
+        self.api_key = api_key
+        self.server_id = server_id
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.compress = compress
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._injected = []
+        self._zones = {}
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._routes = [(method, re.compile('^%s$' % pattern), handler)
+                        for method, pattern, handler in ROUTES]
+
+    def __repr__(self):
+        return "FakePDNSServer(%s, %s)" % (repr(self.host), repr(self.port))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def url(self):
+        """API endpoint of the server"""
+        return "http://%s:%d/api/v1" % (self.host, self.port)
+
+    def start(self):
+        """Start serving in a background thread
+
+        :return: The server itself
+        """
+        self._httpd = _HTTPServer((self.host, self.port), _Handler)
+        self._httpd.fake = self
+        self.port = self._httpd.server_port
+        thread = threading.Thread(target=self._httpd.serve_forever,
+                                  kwargs={'poll_interval': 0.1},
+                                  name="fake-pdns", daemon=True)
+        thread.start()
+        LOG.info("fake PowerDNS API listening on %s", self.url)
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        httpd, self._httpd = self._httpd, None
+        if httpd is not None:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def inject_errors(self, count, status_code=None):
+        """Answer the next *count* requests with an error
+
+        :param int count: Number of requests to fail
+        :param int status_code: Status code, *error_status* by default
+        """
+        with self._lock:
+            self._injected.extend([status_code or self.error_status] * count)
+
+    def add_zone(self, name, kind='Native', nameservers=None, rrsets=None,
+                 masters=None):
+        """Create a zone directly in storage
+
+        :return: Zone details as :class:`dict`
+        """
+        with self._lock:
+            return self._add_zone(name, kind, nameservers or [],
+                                  rrsets or [], masters or [])
+
+    def populate(self, zones=1, records=10, suffix='fake.test.'):
+        """Create zones of A records, to size responses
+
+        :param int zones: Number of zones
+        :param int records: Number of A records per zone
+        :param str suffix: Parent domain of zone names
+        """
+        for zone_idx in range(zones):
+            name = "zone-%d.%s" % (zone_idx, suffix)
+            rrsets = [{"name": "host-%d.%s" % (idx, name), "type": "A",
+                       "ttl": 3600,
+                       "records": [{"content": "10.%d.%d.%d" % (
+                           zone_idx & 255, idx >> 8 & 255, idx & 255),
+                                    "disabled": False}]}
+                      for idx in range(records)]
+            self.add_zone(name, nameservers=["ns1." + name], rrsets=rrsets)
+
+    @property
+    def zones(self):
+        """Names of stored zones"""
+        with self._lock:
+            return list(self._zones)
+
+    def dispatch(self, method, path, api_key, body):
+        """Answer an API request
+
+        :param str method: HTTP method
+        :param str path: Requested path and query string
+        :param str api_key: Received API key
+        :param bytes body: Request body
+        :return: Status code and JSON data, :obj:`None` for empty bodies
+        :raise APIError: On API errors
+        """
+        with self._lock:
+            self.requests += 1
+            injected = self._injected.pop(0) if self._injected else None
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if injected is None and self.error_rate and \
+                    self._random.random() < self.error_rate:
+                injected = self.error_status
+        if delay:
+            time.sleep(delay)
+        if injected is not None:
+            raise APIError(injected, "injected error")
+        if self.api_key is not None and api_key != self.api_key:
+            raise APIError(401, "Unauthorized")
+
+        parts = urlsplit(path)
+        if not parts.path.startswith('/api/v1/'):
+            raise APIError(404, "Not Found")
+        route = unquote(parts.path[len('/api/v1'):])
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(route)
+            if match is None:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            kwargs = match.groupdict()
+            if kwargs.pop('server_id', self.server_id) != self.server_id:
+                raise APIError(404, "Not Found")
+            try:
+                data = json.loads(body.decode()) if body else {}
+            except ValueError:
+                raise APIError(400, "Invalid JSON body")
+            query = dict((key, values[-1]) for key, values
+                         in parse_qs(parts.query).items())
+            with self._lock:
+                return getattr(self, '_' + handler)(data=data, query=query,
+                                                    **kwargs)
+        if allowed:
+            raise APIError(405, "Method Not Allowed")
+        raise APIError(404, "Not Found")
+
+    def _server(self):
+        return {"type": "Server", "id": self.server_id,
+                "daemon_type": "authoritative", "version": "4.fake",
+                "url": "/api/v1/servers/%s" % self.server_id,
+                "config_url": "/api/v1/servers/%s/config{/config_setting}"
+                              % self.server_id,
+                "zones_url": "/api/v1/servers/%s/zones{/zone}"
+                             % self.server_id}
+
+    def _zone_summary(self, zone):
+        summary = dict((key, value) for key, value in zone.items()
+                       if key != 'rrsets')
+        summary['url'] = "/api/v1/servers/%s/zones/%s" % (self.server_id,
+                                                          zone['id'])
+        return summary
+
+    def _zone_details(self, zone):
+        details = self._zone_summary(zone)
+        details['rrsets'] = list(zone['rrsets'].values())
+        return details
+
+    def _get_stored_zone(self, zone_id):
+        zone = self._zones.get(zone_id)
+        if zone is None:
+            raise APIError(404, "Could not find domain '%s'" % zone_id)
+        return zone
+
+    @staticmethod
+    def _check_rrset(zone_name, rrset):
+        for key in ('name', 'type'):
+            if not rrset.get(key):
+                raise APIError(422, "Key '%s' not present or not a String"
+                               % key)
+        if not rrset['name'].endswith('.'):
+            raise APIError(422, "Name '%s' is not canonical"
+                           % rrset['name'])
+        if not _in_zone(rrset['name'], zone_name):
+            raise APIError(422, "RRset %s IN %s: Name is out of zone"
+                           % (rrset['name'], rrset['type']))
+
+    def _add_zone(self, name, kind, nameservers, rrsets, masters):
+        if not name.endswith('.'):
+            raise APIError(422, "DNS Name '%s' is not canonical" % name)
+        if name in self._zones:
+            raise APIError(409, "Conflict")
+        for rrset in rrsets:
+            self._check_rrset(name, rrset)
+        stored = {}
+        for rrset in rrsets:
+            stored[(rrset['name'], rrset['type'])] = {
+                "name": rrset['name'], "type": rrset['type'],
+                "ttl": rrset.get('ttl', 3600),
+                "records": rrset.get('records', []),
+                "comments": rrset.get('comments', []),
+            }
+        if (name, 'SOA') not in stored:
+            stored[(name, 'SOA')] = {
+                "name": name, "type": "SOA", "ttl": 3600, "comments": [],
+                "records": [{"content": DEFAULT_SOA % (name, name),
+                             "disabled": False}],
+            }
+        if nameservers and (name, 'NS') not in stored:
+            stored[(name, 'NS')] = {
+                "name": name, "type": "NS", "ttl": 3600, "comments": [],
+                "records": [{"content": nameserver, "disabled": False}
+                            for nameserver in nameservers],
+            }
+        zone = {"id": name, "name": name, "type": "Zone", "kind": kind,
+                "serial": 1, "notified_serial": 0, "edited_serial": 1,
+                "masters": masters, "dnssec": False, "account": "",
+                "rrsets": stored}
+        self._zones[name] = zone
+        return self._zone_details(zone)
+
+    # pylint: disable=unused-argument
+    def _list_servers(self, data, query):
+        return 200, [self._server()]
+
+    def _get_server(self, data, query):
+        return 200, self._server()
+
+    def _get_config(self, data, query):
+        return 200, [{"type": "ConfigSetting", "name": "api",
+                      "value": "yes"},
+                     {"type": "ConfigSetting", "name": "webserver",
+                      "value": "yes"}]
+
+    def _list_zones(self, data, query):
+        return 200, [self._zone_summary(zone)
+                     for zone in self._zones.values()]
+
+    def _create_zone(self, data, query):
+        if not data.get('name'):
+            raise APIError(422, "Key 'name' not present or not a String")
+        return 201, self._add_zone(data['name'], data.get('kind', 'Native'),
+                                   data.get('nameservers') or [],
+                                   data.get('rrsets') or [],
+                                   data.get('masters') or [])
+
+    def _get_zone(self, data, query, zone_id):
+        return 200, self._zone_details(self._get_stored_zone(zone_id))
+
+    def _patch_zone(self, data, query, zone_id):
+        zone = self._get_stored_zone(zone_id)
+        for key in ('kind', 'masters', 'account'):
+            if key in data:
+                zone[key] = data[key]
+        rrsets = data.get('rrsets') or []
+        for rrset in rrsets:
+            self._check_rrset(zone['name'], rrset)
+            if rrset.get('changetype') not in ('REPLACE', 'DELETE'):
+                raise APIError(422, "Changetype not understood")
+        for rrset in rrsets:
+            key = (rrset['name'], rrset['type'])
+            if rrset['changetype'] == 'DELETE' or \
+                    not rrset.get('records') and not rrset.get('comments'):
+                zone['rrsets'].pop(key, None)
+            else:
+                zone['rrsets'][key] = {
+                    "name": rrset['name'], "type": rrset['type'],
+                    "ttl": rrset.get('ttl', 3600),
+                    "records": rrset.get('records', []),
+                    "comments": rrset.get('comments', []),
+                }
+        if rrsets:
+            zone['serial'] += 1
+            zone['edited_serial'] = zone['serial']
+        return 204, None
+
+    def _delete_zone(self, data, query, zone_id):
+        self._get_stored_zone(zone_id)
+        del self._zones[zone_id]
+        return 204, None
+
+    def _notify_zone(self, data, query, zone_id):
+        zone = self._get_stored_zone(zone_id)
+        zone['notified_serial'] = zone['serial']
+        return 200, {"result": "Notification queued"}
+
+    def _search_data(self, data, query):
+        pattern = query.get('q')
+        if not pattern:
+            raise APIError(422, "Query 'q' is required")
+        pattern = pattern.lower()
+        max_results = int(query.get('max', 100))
+        results = []
+        for zone in self._zones.values():
+            if fnmatch.fnmatchcase(zone['name'], pattern):
+                results.append({"object_type": "zone", "name": zone['name'],
+                                "zone_id": zone['id']})
+            for rrset in zone['rrsets'].values():
+                for record in rrset['records']:
+                    if fnmatch.fnmatchcase(rrset['name'], pattern) or \
+                            fnmatch.fnmatchcase(record['content'].lower(),
+                                                pattern):
+                        results.append({
+                            "object_type": "record", "name": rrset['name'],
+                            "type": rrset['type'], "ttl": rrset['ttl'],
+                            "content": record['content'],
+                            "disabled": record.get('disabled', False),
+                            "zone": zone['name'], "zone_id": zone['id'],
+                        })
+                for comment in rrset['comments']:
+                    if fnmatch.fnmatchcase(comment['content'].lower(),
+                                           pattern):
+                        results.append({
+                            "object_type": "comment", "name": rrset['name'],
+                            "content": comment['content'],
+                            "zone": zone['name'], "zone_id": zone['id'],
+                        })
+                if len(results) >= max_results:
+                    return 200, results[:max_results]
+        return 200, results[:max_results]
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+powerdns.fork - Reset of inherited state in forked child processes
+
+A process forked while other threads are sending requests inherits locks
+held by those threads, and bookkeeping of requests it will never see
+complete. Objects holding such state register themselves with
+:func:`register`, their ``_after_fork()`` method is called in the child
+process right after fork, before any other code runs.
+"""
+
+import os
+import weakref
+
+
+#: Objects reset in forked child processes, by identifier
+_REGISTERED = weakref.WeakValueDictionary()
+
+
+def register(obj):
+    """Reset an object in child processes forked afterwards
+
+    :param obj: Object with an ``_after_fork()`` method
+    """
+    _REGISTERED[id(obj)] = obj
+
+
+def _reset():
+    """Reset registered objects, in a child process"""
+    for obj in list(_REGISTERED.values()):
+        obj._after_fork()  # pylint: disable=protected-access
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset)
@@ -21,12 +21,20 @@
 powerdns.interface - PowerDNS API interface
 """
 
+import copy
 import logging
 import os
 import json
+import tempfile
+import threading
 import time
 
+from .codec import iter_json_items
+from .deadline import with_deadline
 from .exceptions import PDNSCanonicalError
+from .logs import Names, Payload
+from .tracing import traced
+from . import fork
 
 
 LOG = logging.getLogger(__name__)
@@ -38,15 +46,78 @@ class PDNSEndpointBase(object):
     """Powerdns API Endpoint Base
 
     :param PDNSApiClient api_client: Cachet API client instance
+
+    Cached API data is filled and resetted under a per-object lock, so
+    endpoint objects can be shared between threads. Concurrent readers of
+    a cold cache wait for a single API call instead of all querying it.
+
+    Endpoint objects are picklable along with their client and cached API
+    data, so they may be given to :mod:`multiprocessing` workers. A pickled
+    zone carries its details but not the zones list of its server.
+
+    Operations accept a ``deadline`` argument, a
+    :class:`~powerdns.deadline.Deadline` bounding the overall duration of
+    all their API requests. Properties are bounded by a current deadline::
+
+        with Deadline(10):
+            records = zone.records
     """
     def __init__(self, api_client):
         """Initialization method"""
         self.api_client = api_client
-        self._get = api_client.get
-        self._post = api_client.post
-        self._patch = api_client.patch
-        self._put = api_client.put
-        self._delete = api_client.delete
+        self._cache_lock = threading.RLock()
+        self._bind_client()
+        fork.register(self)
+
+    def _bind_client(self):
+        """Bind HTTP methods of the API client"""
+        self._get = self.api_client.get
+        self._post = self.api_client.post
+        self._patch = self.api_client.patch
+        self._put = self.api_client.put
+        self._delete = self.api_client.delete
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attribute in ('_cache_lock', '_get', '_post', '_patch', '_put',
+                          '_delete'):
+            del state[attribute]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cache_lock = threading.RLock()
+        self._bind_client()
+        fork.register(self)
+
+    def _after_fork(self):
+        """Release the cache lock inherited in a forked child process, it
+        may be held by a thread loading data in the parent process"""
+        self._cache_lock = threading.RLock()
+
+    def _get_cached(self, attribute, loader):
+        """Get cached data, loading it once if needed
+
+        :param str attribute: Name of the cache attribute
+        :param callable loader: Function returning data to cache
+        :return: Cached data
+        """
+        data = getattr(self, attribute)
+        if data is None:
+            with self._cache_lock:
+                data = getattr(self, attribute)
+                if data is None:
+                    data = loader()
+                    setattr(self, attribute, data)
+        return data
+
+    def _reset_cache(self, attribute):
+        """Reset cached data
+
+        :param str attribute: Name of the cache attribute
+        """
+        with self._cache_lock:
+            setattr(self, attribute, None)
 
 
 class PDNSEndpoint(PDNSEndpointBase):
@@ -68,6 +139,7 @@ class PDNSEndpoint(PDNSEndpointBase):
         return str(self.api_client)
 
     @property
+    @traced
     def servers(self):
         """List PowerDNS servers
 
@@ -77,13 +149,16 @@ class PDNSEndpoint(PDNSEndpointBase):
         .. seealso:: https://doc.powerdns.com/md/httpapi/api_spec/#servers
         """
         LOG.info("listing available PowerDNS servers")
-        if not self._servers:
-            LOG.info("getting available servers from API")
-            self._servers = [PDNSServer(self.api_client, data)
-                             for data in self._get('/servers')]
-        LOG.info("%d server(s) listed", len(self._servers))
-        LOG.debug("listed servers: %s", self._servers)
-        return self._servers
+        servers = self._get_cached('_servers', self._load_servers)
+        LOG.info("%d server(s) listed", len(servers))
+        LOG.debug("listed servers: %s", Names(servers))
+        return servers
+
+    def _load_servers(self):
+        """Load servers from API"""
+        LOG.info("getting available servers from API")
+        return [PDNSServer(self.api_client, data)
+                for data in self._get('/servers')]
 
 
 class PDNSServer(PDNSEndpointBase):
@@ -126,6 +201,7 @@ class PDNSServer(PDNSEndpointBase):
         return self.sid
 
     @property
+    @traced
     def config(self):
         """Server configuration from PowerDNS API
 
@@ -135,6 +211,7 @@ class PDNSServer(PDNSEndpointBase):
         return self._get('%s/config' % self.url)
 
     @property
+    @traced
     def zones(self):
         """List of DNS zones on a PowerDNS server
 
@@ -145,14 +222,19 @@ class PDNSServer(PDNSEndpointBase):
         .. seealso:: https://doc.powerdns.com/md/httpapi/api_spec/#zone95collection
         """
         LOG.info("listing available zones")
-        if not self._zones:
-            LOG.info("getting available zones from API")
-            self._zones = [PDNSZone(self.api_client, self, data)
-                           for data in self._get('%s/zones' % self.url)]
-        LOG.info("%d zone(s) listed", len(self._zones))
-        LOG.debug("listed zones: %s", self._zones)
-        return self._zones
-
+        zones = self._get_cached('_zones', self._load_zones)
+        LOG.info("%d zone(s) listed", len(zones))
+        LOG.debug("listed zones: %s", Names(zones))
+        return zones
+
+    def _load_zones(self):
+        """Load zones from API"""
+        LOG.info("getting available zones from API")
+        return [PDNSZone(self.api_client, self, data)
+                for data in self._get('%s/zones' % self.url)]
+
+    @traced
+    @with_deadline
     def search(self, search_term, max_result=100):
         """Search term using API search endpoint
 
@@ -200,10 +282,12 @@ class PDNSServer(PDNSEndpointBase):
             max_result
         ))
         LOG.info("%d search result(s)", len(results))
-        LOG.debug("search results: %s", results)
+        LOG.debug("search results: %s", Payload(results))
         return results
 
     # pylint: disable=inconsistent-return-statements
+    @traced
+    @with_deadline
     def get_zone(self, name):
         """Get zone by name
 
@@ -219,6 +303,8 @@ class PDNSServer(PDNSEndpointBase):
                 return zone
         LOG.info("zone not found: %s", name)
 
+    @traced
+    @with_deadline
     def suggest_zone(self, r_name):
         """Suggest best matching zone from existing zone
 
@@ -249,6 +335,8 @@ class PDNSServer(PDNSEndpointBase):
     # pylint: disable=inconsistent-return-statements
     # pylint: disable=too-many-arguments
     # TODO: Full implementation of zones endpoint
+    @traced
+    @with_deadline
     def create_zone(self, name, kind, nameservers, masters=None, servers=None,
                     rrsets=None, update=False):
         """Create or update a (new) zone
@@ -290,22 +378,28 @@ class PDNSServer(PDNSEndpointBase):
 
         if zone_data:
             # reset server object cache
-            self._zones = None
+            self._reset_cache('_zones')
             LOG.info("zone %s successfully processed", name)
             return PDNSZone(self.api_client, self, zone_data)
 
+    @traced
+    @with_deadline
     def delete_zone(self, name):
         """Delete a zone
 
         :param str name: Zone name
         :return: :class:`PDNSApiClient` response
         """
-        # reset server object cache
-        self._zones = None
         LOG.info("deletion of zone: %s", name)
-        return self._delete("%s/zones/%s" % (self.url, name))
+        try:
+            return self._delete("%s/zones/%s" % (self.url, name))
+        finally:
+            # reset server object cache once written
+            self._reset_cache('_zones')
 
     # pylint: disable=inconsistent-return-statements
+    @traced
+    @with_deadline
     def restore_zone(self, json_file):
         """Restore a zone from a json file produced by :meth:`PDNSZone.backup`
 
@@ -314,11 +408,13 @@ class PDNSServer(PDNSEndpointBase):
         """
         with open(json_file) as backup_fp:
             zone_data = json.load(backup_fp)
-        self._zones = None
         zone_name = zone_data['name']
         zone_data['nameservers'] = []
         LOG.info("restoration of zone: %s", zone_name)
-        zone_data = self._post("%s/zones" % self.url, data=zone_data)
+        try:
+            zone_data = self._post("%s/zones" % self.url, data=zone_data)
+        finally:
+            self._reset_cache('_zones')
         if zone_data:
             LOG.info("zone successfully restored: %s", zone_data['name'])
             return PDNSZone(self.api_client, self, zone_data)
@@ -350,14 +446,23 @@ class PDNSZone(PDNSEndpointBase):
     def __str__(self):
         return self.name
 
+    def __getstate__(self):
+        state = super(PDNSZone, self).__getstate__()
+        server = state['server'] = copy.copy(self.server)
+        server._zones = None  # pylint: disable=protected-access
+        return state
+
     @property
+    @traced
     def details(self):
         """Get zone's detailed data"""
         LOG.info("getting %s zone details", self.name)
-        if not self._details:
-            LOG.info("getting %s zone details from api", self.name)
-            self._details = self._get(self.url)
-        return self._details
+        return self._get_cached('_details', self._load_details)
+
+    def _load_details(self):
+        """Load zone's detailed data from API"""
+        LOG.info("getting %s zone details from api", self.name)
+        return self._get(self.url)
 
     @property
     def records(self):
@@ -365,6 +470,32 @@ class PDNSZone(PDNSEndpointBase):
         LOG.info("getting %s zone records", self.name)
         return self.details['rrsets']
 
+    @traced
+    def iter_rrsets(self):
+        """Iterate over zone's resource record sets
+
+        :return: Generator of resource record sets data
+
+        Unless zone details are already cached, the API response is
+        streamed and its rrsets array decoded incrementally, one rrset at a
+        time, so that zones of any size are scanned in bounded memory.
+        Streamed rrsets are not cached.
+        """
+        LOG.info("iterating over %s zone records", self.name)
+        if self._details is not None:
+            for rrset in self._details['rrsets']:
+                yield rrset
+            return
+
+        chunks = self._get(self.url, stream=True)
+        try:
+            for rrset in iter_json_items(chunks, 'rrsets'):
+                yield rrset
+        finally:
+            chunks.close()
+
+    @traced
+    @with_deadline
     def get_record(self, name):
         """Get record data
 
@@ -383,6 +514,8 @@ class PDNSZone(PDNSEndpointBase):
 
         return records
 
+    @traced
+    @with_deadline
     def create_records(self, rrsets):
         """Create resource record sets
 
@@ -390,15 +523,20 @@ class PDNSZone(PDNSEndpointBase):
         :return: Query response
         """
         LOG.info("creating %d record(s) to %s", len(rrsets), self.name)
-        LOG.debug("records: %s", rrsets)
+        LOG.debug("records: %s", Payload(rrsets))
         for rrset in rrsets:
             rrset.ensure_canonical(self.name)
             rrset['changetype'] = 'REPLACE'
 
-        # reset zone object cache
-        self._details = None
-        return self._patch(self.url, data={'rrsets': rrsets})
+        try:
+            return self._patch(self.url, data={'rrsets': rrsets})
+        finally:
+            # reset zone object cache once written, data read meanwhile
+            # may predate the write
+            self._reset_cache('_details')
 
+    @traced
+    @with_deadline
     def delete_records(self, rrsets):
         """Delete resource record sets
 
@@ -406,15 +544,20 @@ class PDNSZone(PDNSEndpointBase):
         :return: Query response
         """
         LOG.info("deletion of %d records from %s", len(rrsets), self.name)
-        LOG.debug("records: %s", rrsets)
+        LOG.debug("records: %s", Payload(rrsets))
         for rrset in rrsets:
             rrset.ensure_canonical(self.name)
             rrset['changetype'] = 'DELETE'
 
-        # reset zone object cache
-        self._details = None
-        return self._patch(self.url, data={'rrsets': rrsets})
+        try:
+            return self._patch(self.url, data={'rrsets': rrsets})
+        finally:
+            # reset zone object cache once written, data read meanwhile
+            # may predate the write
+            self._reset_cache('_details')
 
+    @traced
+    @with_deadline
     def backup(self, directory, filename=None, pretty_json=False):
         """Backup zone data to json file
 
@@ -424,6 +567,12 @@ class PDNSZone(PDNSEndpointBase):
 
         If filename is not provided, destination file is generated with zone
         name (stripping the last dot) and extension `.json`.
+
+        Unless *pretty_json* is requested or zone details are already
+        cached, the API response is streamed to the file as is, without
+        being parsed nor fully loaded in memory. Streamed data is written to
+        a temporary file of *directory*, moved to the destination file once
+        complete, so a failed download never replaces a previous backup.
         """
         LOG.info("backup of zone: %s", self.name)
         if not filename:
@@ -431,6 +580,26 @@ class PDNSZone(PDNSEndpointBase):
         json_file = os.path.join(directory, filename)
         LOG.info("backup file is %s", json_file)
 
+        if not pretty_json and self._details is None:
+            with tempfile.NamedTemporaryFile(dir=directory,
+                                             prefix="." + filename,
+                                             suffix=".tmp",
+                                             delete=False) as backup_fp:
+                try:
+                    for chunk in self._get(self.url, stream=True):
+                        backup_fp.write(chunk)
+                except BaseException:
+                    backup_fp.close()
+                    os.remove(backup_fp.name)
+                    raise
+            # temporary files are private, give the mode of open() files
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(backup_fp.name, 0o666 & ~umask)
+            os.replace(backup_fp.name, json_file)
+            LOG.info("zone %s successfully saved", self.name)
+            return
+
         with open(json_file, "w") as backup_fp:
             if pretty_json:
                 json.dump(self.details,
@@ -442,6 +611,8 @@ class PDNSZone(PDNSEndpointBase):
                 json.dump(self.details, backup_fp)
         LOG.info("zone %s successfully saved", self.name)
 
+    @traced
+    @with_deadline
     def notify(self):
         """Trigger notification for zone updates"""
         LOG.info("notify of zone: %s", self.name)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+powerdns.logs - PowerDNS API client logging helpers
+
+Helpers defined here are lazy: payloads are only decoded, truncated and
+formatted when a log record is actually emitted.
+"""
+
+#: Default maximum size of logged payloads, in characters
+PAYLOAD_LOG_SIZE = 1024
+
+#: Headers redacted from logs (lower case)
+SECRET_HEADERS = frozenset(['x-api-key', 'authorization', 'cookie',
+                            'set-cookie', 'proxy-authorization'])
+
+
+def redact_headers(headers):
+    """Redact secret headers values
+
+    :param dict headers: Request or response headers
+    :return: Headers copy as :class:`dict`, secrets replaced by ``***``
+    """
+    return dict((name, '***' if name.lower() in SECRET_HEADERS else value)
+                for name, value in headers.items())
+
+
+class Payload(object):
+    """Lazily formatted request or response payload
+
+    :param payload: :class:`bytes`, :class:`str` or any object
+    :param int size: Maximum size of formatted payload, in characters
+
+    Payloads longer than *size* are truncated and suffixed with their full
+    length. File objects and iterators are not consumed.
+    """
+    __slots__ = ('payload', 'size')
+
+    def __init__(self, payload, size=PAYLOAD_LOG_SIZE):
+        """Initialization"""
+        self.payload = payload
+        self.size = size
+
+    def __str__(self):
+        payload = self.payload
+        if isinstance(payload, bytes):
+            length = len(payload)
+            text = payload[:self.size].decode('utf-8', 'replace')
+        elif isinstance(payload, str):
+            length = len(payload)
+            text = payload[:self.size]
+        elif hasattr(payload, 'read') or hasattr(payload, '__next__'):
+            return '<%s>' % payload.__class__.__name__
+        else:
+            text = str(payload)
+            length = len(text)
+        if length > self.size:
+            return '%s... (%d bytes)' % (text[:self.size], length)
+        return text
+
+
+class Names(object):
+    """Lazily formatted list of object names
+
+    :param list objects: Objects formatted with :func:`str`
+
+    Used instead of object representations, which may embed secrets such
+    as the API client key.
+    """
+    __slots__ = ('objects',)
+
+    def __init__(self, objects):
+        """Initialization"""
+        self.objects = objects
+
+    def __str__(self):
+        return '[%s]' % ', '.join(str(obj) for obj in self.objects)
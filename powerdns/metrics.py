@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+powerdns.metrics - PowerDNS API client instrumentation
+"""
+
+import bisect
+import threading
+
+
+#: API collections whose next path segment is an object identifier
+COLLECTIONS = {
+    'servers': '{server_id}',
+    'zones': '{zone_id}',
+    'cryptokeys': '{cryptokey_id}',
+    'metadata': '{metadata_kind}',
+    'tsigkeys': '{tsigkey_id}',
+    'config': '{config_setting}',
+    'autoprimaries': '{autoprimary}',
+}
+
+#: Default latency histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def path_template(path):
+    """Get the template of an API path
+
+    :param str path: API path, possibly a full URL with query string
+    :return: Path template as :class:`str`
+
+    Object identifiers are replaced by placeholders, so requests can be
+    aggregated by API endpoint::
+
+        >>> path_template('/servers/localhost/zones/example.org./notify')
+        '/servers/{server_id}/zones/{zone_id}/notify'
+    """
+    segments = api_path(path).split('/')
+    for idx in range(1, len(segments)):
+        placeholder = COLLECTIONS.get(segments[idx - 1])
+        if placeholder and segments[idx] not in COLLECTIONS:
+            segments[idx] = placeholder
+    return '/' + '/'.join(segments)
+
+
+def api_path(path):
+    """Normalize an API path
+
+    :param str path: API path, possibly a full URL with query string
+    :return: Path relative to the API endpoint, without query string
+
+    Full URLs are cut before their ``/servers`` segment::
+
+        >>> api_path('https://pdns/api/v1/servers/localhost?x=1')
+        'servers/localhost'
+    """
+    path = path.split('?', 1)[0]
+    if '://' in path:
+        path = '/' + path.split('://', 1)[1].split('/', 1)[-1]
+        if '/servers' in path:
+            path = path[path.index('/servers'):]
+    return '/'.join(segment for segment in path.split('/') if segment)
+
+
+# pylint: disable=too-many-instance-attributes
+# pylint: disable=too-few-public-methods
+class RequestEvent(object):
+    """Request data given to :class:`~powerdns.client.PDNSApiClient` hooks
+
+    :param str method: HTTP method
+    :param str path: Requested API path or full URL
+
+    Attributes set once the request is done, for ``after_request`` hooks:
+
+    * ``status_code``: HTTP status code, :obj:`None` on error
+    * ``request_bytes``: Request body size
+    * ``response_bytes``: Response body size, :obj:`None` in stream mode
+    * ``duration``: Request duration in seconds, including retries
+    * ``error``: Exception raised by the request, if any
+    """
+    def __init__(self, method, path):
+        """Initialization"""
+        self.method = method
+        self.path = path
+        self.template = path_template(path)
+        self.status_code = None
+        self.request_bytes = 0
+        self.response_bytes = None
+        self.duration = None
+        self.error = None
+
+    def __repr__(self):
+        return "RequestEvent(%s, %s, status_code=%s, duration=%s)" % (
+            repr(self.method), repr(self.path), repr(self.status_code),
+            repr(self.duration)
+        )
+
+
+class ClientMetrics(object):
+    """Requests counters and latency histograms
+
+    Metrics are aggregated by HTTP method and path template, and exported
+    in Prometheus text format by :meth:`render`::
+
+        metrics = ClientMetrics()
+        metrics.register(api_client)
+        ...
+        print(metrics.render())
+
+    :param tuple buckets: Latency histogram buckets upper bounds, in seconds
+    :param str prefix: Metrics names prefix
+    """
+    def __init__(self, buckets=BUCKETS, prefix='powerdns_client'):
+        """Initialization"""
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._requests = {}
+        self._histograms = {}
+        self._bytes = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "ClientMetrics(prefix=%s)" % repr(self.prefix)
+
+    def register(self, api_client):
+        """Collect metrics of a client
+
+        :param PDNSApiClient api_client: API client to instrument
+        """
+        api_client.add_hook('after_request', self.observe)
+
+    def observe(self, event):
+        """Record a finished request
+
+        :param RequestEvent event: Request event
+        """
+        key = (event.method, event.template)
+        status = 'error' if event.status_code is None \
+            else str(event.status_code)
+        bucket = bisect.bisect_left(self.buckets, event.duration)
+        with self._lock:
+            count_key = key + (status,)
+            self._requests[count_key] = self._requests.get(count_key, 0) + 1
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = \
+                    [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][bucket] += 1
+            histogram[1] += event.duration
+            sent, received = self._bytes.get(key, (0, 0))
+            self._bytes[key] = (sent + (event.request_bytes or 0),
+                                received + (event.response_bytes or 0))
+
+    def reset(self):
+        """Forget recorded metrics"""
+        with self._lock:
+            self._requests.clear()
+            self._histograms.clear()
+            self._bytes.clear()
+
+    @staticmethod
+    def _labels(method, path, **extra):
+        """Format metric labels"""
+        labels = [('method', method), ('path', path)]
+        labels.extend(sorted(extra.items()))
+        return '{%s}' % ','.join(
+            '%s="%s"' % (name, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"'))
+            for name, value in labels
+        )
+
+    def render(self):
+        """Export metrics in Prometheus text format
+
+        :return: Metrics as :class:`str`
+        """
+        prefix = self.prefix
+        lines = []
+        with self._lock:
+            lines.append('# HELP %s_requests_total PowerDNS API requests.'
+                         % prefix)
+            lines.append('# TYPE %s_requests_total counter' % prefix)
+            for (method, path, status), count in sorted(
+                    self._requests.items()):
+                lines.append('%s_requests_total%s %d' % (
+                    prefix, self._labels(method, path, status=status), count))
+
+            name = '%s_request_duration_seconds' % prefix
+            lines.append('# HELP %s PowerDNS API requests duration.' % name)
+            lines.append('# TYPE %s histogram' % name)
+            for (method, path), (counts, total) in sorted(
+                    self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += count
+                    lines.append('%s_bucket%s %d' % (
+                        name, self._labels(method, path, le=bound),
+                        cumulative))
+                lines.append('%s_sum%s %r' % (
+                    name, self._labels(method, path), total))
+                lines.append('%s_count%s %d' % (
+                    name, self._labels(method, path), cumulative))
+
+            for direction, index in (('sent', 0), ('received', 1)):
+                name = '%s_%s_bytes_total' % (prefix, direction)
+                lines.append('# HELP %s PowerDNS API bytes %s.'
+                             % (name, direction))
+                lines.append('# TYPE %s counter' % name)
+                for (method, path), values in sorted(self._bytes.items()):
+                    lines.append('%s%s %d' % (
+                        name, self._labels(method, path), values[index]))
+        return '\n'.join(lines) + '\n'
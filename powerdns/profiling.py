@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+"""
+powerdns.profiling - Profiling of PowerDNS API tools
+"""
+
+import atexit
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+
+LOG = logging.getLogger(__name__)
+
+#: Environment variable enabling profiling of bundled tools
+PROFILE_ENV = 'PDNS_PROFILE'
+
+
+# pylint: disable=too-many-instance-attributes
+class Profiler(object):
+    """Profiler of a whole run of a PowerDNS API tool
+
+    It captures :mod:`cProfile` statistics, peak memory traced by
+    :mod:`tracemalloc` and the timings of every API call done by attached
+    clients, aggregated by HTTP method and path template::
+
+        profiler = Profiler("report.txt")
+        profiler.start()
+        profiler.attach(api_client)
+        ...
+        profiler.stop()
+        profiler.write()
+
+    When *output* is a file, raw :mod:`cProfile` statistics are also dumped
+    to *output* suffixed with ``.prof``, to be explored with :mod:`pstats`
+    or graphical tools. Memory tracing slows allocations down noticeably,
+    it may be disabled with *memory*.
+
+    :param str output: Report file, ``-`` or :obj:`None` for stderr
+    :param str sort: :mod:`pstats` sort key of profiled functions
+    :param int limit: Number of profiled functions in the report
+    :param bool memory: Trace peak memory with :mod:`tracemalloc`
+    """
+    def __init__(self, output=None, sort='cumulative', limit=30,
+                 memory=True):
+        """Initialization"""
+        self.output = output
+        self.sort = sort
+        self.limit = limit
+        self.memory = memory
+        self.calls = {}
+        self.peak_memory = None
+        self._profile = cProfile.Profile()
+        self._started = None
+        self._elapsed = None
+        self._cpu = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "Profiler(%s)" % repr(self.output)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def attach(self, api_client):
+        """Record timings of API calls of a client
+
+        :param PDNSApiClient api_client: API client to instrument
+        """
+        api_client.add_hook('after_request', self.observe)
+
+    def observe(self, event):
+        """Record a finished API call
+
+        :param RequestEvent event: Request event
+        """
+        key = (event.method, event.template)
+        with self._lock:
+            stats = self.calls.get(key)
+            if stats is None:
+                stats = self.calls[key] = [0, 0.0, 0.0, 0]
+            stats[0] += 1
+            stats[1] += event.duration
+            stats[2] = max(stats[2], event.duration)
+            if event.status_code is None or event.status_code >= 400:
+                stats[3] += 1
+
+    def start(self):
+        """Start profiling"""
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._started = (time.perf_counter(), time.process_time())
+        self._profile.enable()
+
+    def stop(self):
+        """Stop profiling"""
+        if self._started is None:
+            return
+        self._profile.disable()
+        self._elapsed = time.perf_counter() - self._started[0]
+        self._cpu = time.process_time() - self._started[1]
+        self._started = None
+        if tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self.memory:
+                tracemalloc.stop()
+
+    def report(self):
+        """Build the profiling report
+
+        :return: Report as :class:`str`
+        """
+        lines = ["=== powerdns profiling report ===",
+                 "wall time: %.3fs" % (self._elapsed or 0.0),
+                 "cpu time: %.3fs" % (self._cpu or 0.0)]
+        if self.peak_memory is not None:
+            lines.append("peak memory: %.1f MiB"
+                         % (self.peak_memory / 1048576.0))
+
+        with self._lock:
+            calls = sorted(self.calls.items(), key=lambda item: -item[1][1])
+        lines.append("")
+        lines.append("api calls: %d (%.3fs)" % (
+            sum(stats[0] for _, stats in calls),
+            sum(stats[1] for _, stats in calls)))
+        if calls:
+            lines.append("%-7s %-45s %6s %6s %10s %10s %10s" % (
+                "method", "path", "calls", "errors", "total (s)",
+                "mean (ms)", "max (ms)"))
+        for (method, template), (count, total, slowest, errors) in calls:
+            lines.append("%-7s %-45s %6d %6d %10.3f %10.2f %10.2f" % (
+                method, template, count, errors, total,
+                total / count * 1000, slowest * 1000))
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats.sort_stats(self.sort).print_stats(self.limit)
+        lines.append("")
+        lines.append(stream.getvalue().strip('\n'))
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        """Write the profiling report to *output*"""
+        report = self.report()
+        if not self.output or self.output == '-':
+            sys.stderr.write(report)
+            return
+        with open(self.output, "w") as report_fp:
+            report_fp.write(report)
+        stats_file = self.output + '.prof'
+        self._profile.dump_stats(stats_file)
+        LOG.info("profiling report written to %s (statistics: %s)",
+                 self.output, stats_file)
+
+
+def start_profiling(output=None):
+    """Profile the running program until it exits
+
+    :param str output: Report file, ``-`` or ``1`` for stderr, defaults
+                       to the :data:`PROFILE_ENV` environment variable
+    :return: Started :class:`Profiler`, or :obj:`None` when profiling is
+             not requested
+
+    The report is written at exit. Bundled tools enable it with their
+    ``--profile`` option or the ``PDNS_PROFILE`` environment variable.
+    """
+    if output is None:
+        output = os.environ.get(PROFILE_ENV)
+    if not output:
+        return None
+    if output.lower() in ('1', 'yes', 'true'):
+        output = '-'
+    profiler = Profiler(output)
+
+    def finish():
+        profiler.stop()
+        profiler.write()
+
+    atexit.register(finish)
+    profiler.start()
+    return profiler
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+powerdns.ratelimit - PowerDNS API client rate limiter
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from .exceptions import PDNSDeadlineError
+from . import fork
+
+
+LOG = logging.getLogger(__name__)
+
+#: HTTP methods accounted as reads, others are writes
+READ_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket
+
+    Tokens are refilled at *rate* per second, up to *burst* tokens. Callers
+    reserve a token and sleep outside of the lock until it is available,
+    so waiting threads are served in order without busy looping.
+
+    :param float rate: Tokens refilled per second
+    :param int burst: Bucket capacity, defaults to one second of tokens
+    """
+    def __init__(self, rate, burst=None):
+        """Initialization"""
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def __repr__(self):
+        return "TokenBucket(%s, burst=%s)" % (repr(self.rate),
+                                              repr(self.burst))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def _after_fork(self):
+        """Release the lock inherited in a forked child process"""
+        self._lock = threading.Lock()
+
+    def reserve(self, timeout=None):
+        """Reserve a token
+
+        :param float timeout: Maximum delay to wait, in seconds (optional)
+        :return: Delay to wait before using the token, in seconds, or
+                 :obj:`None` if it exceeds *timeout*, no token being
+                 reserved then
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens +
+                               (now - self._updated) * self.rate)
+            self._updated = now
+            tokens = self._tokens - 1
+            delay = 0.0 if tokens >= 0 else -tokens / self.rate
+            if timeout is not None and delay > timeout:
+                return None
+            self._tokens = tokens
+            return delay
+
+    def acquire(self, timeout=None):
+        """Wait until a token is available
+
+        :param float timeout: Maximum delay to wait, in seconds (optional)
+        :return: :obj:`False` if no token is available within *timeout*
+        """
+        delay = self.reserve(timeout)
+        if delay is None:
+            return False
+        if delay > 0:
+            LOG.debug("rate limited, waiting %.3fs", delay)
+            time.sleep(delay)
+        return True
+
+
+class RateLimiter(object):
+    """Rate limiter of :class:`~powerdns.client.PDNSApiClient`
+
+    Reads (GET, HEAD, OPTIONS) and writes (other methods) are limited
+    separately, by a requests per second rate and a maximum number of
+    in-flight requests. Every limit is optional.
+
+    :param float read_rate: Maximum read requests per second
+    :param float write_rate: Maximum write requests per second
+    :param int read_concurrency: Maximum in-flight read requests
+    :param int write_concurrency: Maximum in-flight write requests
+    :param int burst: Token bucket capacity of both rates (optional)
+
+    A single limiter is shared by every object using the client, and may be
+    shared by several clients to enforce a global limit.
+    Limits are enforced per process, a limiter copied to another process
+    (pickled or inherited by fork) limits that process on its own.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, read_rate=None, write_rate=None, read_concurrency=None,
+                 write_concurrency=None, burst=None):
+        """Initialization"""
+        self._buckets = {
+            'read': TokenBucket(read_rate, burst) if read_rate else None,
+            'write': TokenBucket(write_rate, burst) if write_rate else None,
+        }
+        self._concurrency = {
+            'read': read_concurrency,
+            'write': write_concurrency,
+        }
+        self._semaphores = self._new_semaphores()
+        fork.register(self)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_semaphores']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._semaphores = self._new_semaphores()
+        fork.register(self)
+
+    def _after_fork(self):
+        """Release request slots held in the parent process, which are
+        never released in a forked child process"""
+        self._semaphores = self._new_semaphores()
+
+    def _new_semaphores(self):
+        """Create semaphores bounding in-flight requests
+
+        :return: Semaphores by kind of request
+        """
+        return dict((kind, threading.BoundedSemaphore(concurrency)
+                     if concurrency else None)
+                    for kind, concurrency in self._concurrency.items())
+
+    @staticmethod
+    def _remaining(deadline):
+        """Get the remaining budget of a deadline, if any"""
+        return None if deadline is None else deadline.remaining()
+
+    @staticmethod
+    def kind(method):
+        """Get the kind of a request
+
+        :param str method: HTTP method
+        :return: ``read`` or ``write``
+        """
+        return 'read' if method.upper() in READ_METHODS else 'write'
+
+    @contextmanager
+    def limit(self, method, deadline=None, url=''):
+        """Context manager holding a request slot
+
+        :param str method: HTTP method of the request
+        :param Deadline deadline: Deadline of the request (optional)
+        :param str url: Requested URL, for errors
+
+        Waits for the request rate, then for a free in-flight slot which is
+        released when leaving the context. Waits are bounded by the
+        remaining budget of *deadline*.
+
+        :raise PDNSDeadlineError: If the deadline expires before a slot is
+                                  available.
+        """
+        kind = self.kind(method)
+        bucket = self._buckets[kind]
+        if bucket is not None and \
+                not bucket.acquire(self._remaining(deadline)):
+            LOG.warning("rate limited past deadline, %s %s not sent",
+                        method, url)
+            raise PDNSDeadlineError(url, deadline.timeout)
+        semaphore = self._semaphores[kind]
+        if semaphore is None:
+            yield
+            return
+        if not semaphore.acquire(timeout=self._remaining(deadline)):
+            LOG.warning("no request slot before deadline, %s %s not sent",
+                        method, url)
+            raise PDNSDeadlineError(url, deadline.timeout)
+        try:
+            yield
+        finally:
+            semaphore.release()
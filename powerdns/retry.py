@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+powerdns.retry - PowerDNS API client retry policy
+"""
+
+import collections
+import email.utils
+import logging
+import random
+import threading
+import time
+
+import requests
+
+from . import fork
+
+
+LOG = logging.getLogger(__name__)
+
+
+class RetryBudget(object):
+    """Retry budget shared by every request of a client
+
+    Retries are allowed as long as they stay under *ratio* of the requests
+    sent during the last *window* seconds, plus *min_retries* retries
+    always allowed in that window. This prevents retries from multiplying
+    the load of an already struggling API.
+
+    :param float ratio: Allowed ratio of retries per request
+    :param int min_retries: Retries always allowed in the window
+    :param float window: Sliding window duration in seconds
+    """
+    def __init__(self, ratio=0.2, min_retries=10, window=10.0):
+        """Initialization"""
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests = collections.deque()
+        self._retries = collections.deque()
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def __repr__(self):
+        return "RetryBudget(ratio=%s, min_retries=%s, window=%s)" % (
+            repr(self.ratio), repr(self.min_retries), repr(self.window)
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def _after_fork(self):
+        """Release the lock inherited in a forked child process"""
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        """Forget events older than the window"""
+        limit = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < limit:
+                events.popleft()
+
+    def record_request(self):
+        """Record a new request in the budget"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._requests.append(now)
+
+    def withdraw(self):
+        """Withdraw a retry from the budget
+
+        :return: :obj:`True` if the retry is allowed
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            allowed = self.min_retries + self.ratio * len(self._requests)
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+
+# pylint: disable=too-many-instance-attributes
+class RetryPolicy(object):
+    """Retry policy of :class:`~powerdns.client.PDNSApiClient`
+
+    Failed requests are retried with an exponential backoff and full jitter:
+    the n-th retry waits a random delay between 0 and
+    ``backoff_factor * 2 ** (n - 1)`` seconds, capped to *backoff_max*.
+
+    :param int max_attempts: Maximum number of attempts, including the first
+    :param float backoff_factor: Base backoff delay in seconds
+    :param float backoff_max: Maximum delay between two attempts in seconds
+    :param bool jitter: Randomize backoff delays
+    :param tuple status_codes: HTTP status codes to retry
+    :param tuple methods: HTTP methods to retry, idempotent ones by default
+    :param RetryBudget budget: Retry budget (optional)
+    :param bool respect_retry_after: Wait for the delay requested by
+                                     ``Retry-After`` response headers,
+                                     capped to *backoff_max*
+    :param tuple errors: Exception classes to retry, connection errors and
+                         timeouts by default
+    """
+    STATUS_CODES = (429, 502, 503, 504)
+    METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+    ERRORS = (requests.exceptions.ConnectionError,
+              requests.exceptions.Timeout)
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, max_attempts=3, backoff_factor=0.5, backoff_max=30.0,
+                 jitter=True, status_codes=STATUS_CODES, methods=METHODS,
+                 budget=None, respect_retry_after=True, errors=ERRORS):
+        """Initialization"""
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.status_codes = frozenset(status_codes)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.budget = budget
+        self.respect_retry_after = respect_retry_after
+        self.errors = tuple(errors)
+
+    def __repr__(self):
+        return "RetryPolicy(max_attempts=%s, backoff_factor=%s, " \
+               "backoff_max=%s)" % (repr(self.max_attempts),
+                                    repr(self.backoff_factor),
+                                    repr(self.backoff_max))
+
+    def record_request(self):
+        """Record a new request in the retry budget"""
+        if self.budget is not None:
+            self.budget.record_request()
+
+    def is_retryable(self, method, attempt, response=None, error=None):
+        """Check if a failed attempt must be retried
+
+        :param str method: HTTP method of the request
+        :param int attempt: Number of the failed attempt, starting at 1
+        :param response: Response of the attempt, if any
+        :param Exception error: Error raised by the attempt, if any
+        :return: :obj:`True` if the request must be retried
+        """
+        if attempt >= self.max_attempts:
+            return False
+        if method.upper() not in self.methods:
+            return False
+        if error is not None:
+            if not isinstance(error, self.errors):
+                return False
+        elif response is None or \
+                response.status_code not in self.status_codes:
+            return False
+        if self.budget is not None and not self.budget.withdraw():
+            LOG.warning("retry budget exhausted, not retrying")
+            return False
+        return True
+
+    def get_delay(self, attempt, response=None):
+        """Get delay to wait before the next attempt
+
+        :param int attempt: Number of the failed attempt, starting at 1
+        :param response: Response of the attempt, if any
+        :return: Delay in seconds as :class:`float`
+        """
+        if self.respect_retry_after and response is not None:
+            retry_after = self.parse_retry_after(
+                response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+        delay = min(self.backoff_factor * 2 ** (attempt - 1),
+                    self.backoff_max)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    @staticmethod
+    def parse_retry_after(value):
+        """Parse a ``Retry-After`` header value
+
+        :param str value: Header value, delay in seconds or HTTP date
+        :return: Delay in seconds as :class:`float` or :obj:`None`
+        """
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(date.timestamp() - time.time(), 0.0)
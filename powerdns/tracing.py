@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+powerdns.tracing - PowerDNS API client and interface tracing
+
+Tracing is disabled until a tracer is configured with :func:`set_tracer`
+or :func:`use_opentelemetry`. Tracers follow the OpenTelemetry API:
+interface operations open spans with ``start_as_current_span()``, or
+``start_span()`` for generators, and every API request is a child span
+created with ``start_span()``::
+
+    from powerdns import tracing
+    tracing.use_opentelemetry()
+
+    # PDNSServer.create_zone
+    #   +- PDNS GET /servers/{server_id}/zones
+    #   +- PDNS GET /servers/{server_id}/zones/{zone_id}
+    #   +- PDNS PATCH /servers/{server_id}/zones/{zone_id}
+"""
+
+import functools
+import inspect
+
+from .metrics import path_template
+
+
+_TRACER = None
+
+
+class NoopSpan(object):
+    """Span doing nothing, used when tracing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set_attribute(self, key, value):
+        """Ignore span attribute"""
+
+    def record_exception(self, exception):
+        """Ignore span exception"""
+
+    def end(self):
+        """Ignore span end"""
+
+
+NOOP_SPAN = NoopSpan()
+
+
+def set_tracer(tracer):
+    """Configure the tracer
+
+    :param tracer: OpenTelemetry compatible tracer, :obj:`None` to disable
+                   tracing
+    """
+    global _TRACER  # pylint: disable=global-statement
+    _TRACER = tracer
+
+
+def get_tracer():
+    """Get the configured tracer
+
+    :return: Tracer or :obj:`None` if tracing is disabled
+    """
+    return _TRACER
+
+
+def use_opentelemetry(name='powerdns'):
+    """Trace using the globally configured OpenTelemetry tracer provider
+
+    :param str name: Instrumentation name
+    :raise ImportError: If :mod:`opentelemetry` is not installed
+    """
+    # pylint: disable=import-outside-toplevel
+    from opentelemetry import trace
+    from . import __version__
+    set_tracer(trace.get_tracer(name, __version__))
+
+
+def span(name, attributes=None):
+    """Open a span as current span
+
+    :param str name: Span name
+    :param dict attributes: Span attributes
+    :return: Context manager yielding the span
+    """
+    tracer = _TRACER
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def request_span(method, path):
+    """Start the span of an API request
+
+    :param str method: HTTP method
+    :param str path: Requested API path or full URL
+    :return: Started span, to be ended with :func:`end_request_span`
+    """
+    tracer = _TRACER
+    if tracer is None:
+        return NOOP_SPAN
+    route = path_template(path)
+    return tracer.start_span("PDNS %s %s" % (method, route), attributes={
+        'http.method': method,
+        'http.route': route,
+        'http.target': path,
+    })
+
+
+def end_request_span(started_span, status_code=None, error=None):
+    """End the span of an API request
+
+    :param started_span: Span started by :func:`request_span`
+    :param int status_code: Response status code
+    :param Exception error: Request error
+    """
+    if started_span is NOOP_SPAN:
+        return
+    if status_code is not None:
+        started_span.set_attribute('http.status_code', status_code)
+    if error is not None:
+        started_span.record_exception(error)
+    started_span.end()
+
+
+def _use_span(started_span):
+    """Make a started span current, without ending it
+
+    :param started_span: Span started by the tracer
+    :return: Context manager, doing nothing unless :mod:`opentelemetry` is
+             installed
+    """
+    try:
+        # pylint: disable=import-outside-toplevel
+        from opentelemetry import trace
+    except ImportError:
+        return NOOP_SPAN
+    return trace.use_span(started_span, end_on_exit=False)
+
+
+def traced(func):
+    """Decorator opening a span named after the decorated method
+
+    Spans are named ``Class.method`` and carry the object name in the
+    ``pdns.object`` attribute. Spans of generator methods stay open until
+    the generator is exhausted or closed, they are current only while the
+    generator runs, not while the caller handles its items.
+    """
+    name = func.__qualname__
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(self, *args, **kwargs):
+            if _TRACER is None:
+                yield from func(self, *args, **kwargs)
+                return
+            started_span = _TRACER.start_span(
+                name, attributes={'pdns.object': str(self)})
+            generator = func(self, *args, **kwargs)
+            try:
+                while True:
+                    with _use_span(started_span):
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            return
+                    yield item
+            finally:
+                with _use_span(started_span):
+                    generator.close()
+                started_span.end()
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if _TRACER is None:
+            return func(self, *args, **kwargs)
+        with _TRACER.start_as_current_span(
+                name, attributes={'pdns.object': str(self)}):
+            return func(self, *args, **kwargs)
+    return wrapper
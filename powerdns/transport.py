@@ -0,0 +1,897 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+"""
+powerdns.transport - PowerDNS API client HTTP transports
+"""
+
+import base64
+import io
+import json
+import logging
+import os
+import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlencode, urlsplit
+
+import requests
+import urllib3
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+from .deadline import split_timeout
+from . import fork
+
+
+LOG = logging.getLogger(__name__)
+
+#: Response headers not recorded, bodies being stored decoded
+SKIPPED_HEADERS = frozenset(['content-encoding', 'content-length',
+                             'transfer-encoding', 'connection'])
+
+
+def build_response(url, status_code, content, headers=None):
+    """Build a :class:`requests.Response` from recorded data
+
+    :param str url: Requested URL
+    :param int status_code: HTTP status code
+    :param bytes content: Response body
+    :param dict headers: Response headers
+    :return: :class:`requests.Response` object
+    """
+    response = requests.models.Response()
+    response.url = url
+    response.status_code = status_code
+    response.headers = requests.structures.CaseInsensitiveDict(headers or {})
+    response.encoding = 'utf-8'
+    response.raw = io.BytesIO(content)
+    return response
+
+
+def _with_params(url, params):
+    """Append query string *params* to *url*"""
+    if not params:
+        return url
+    return "%s%s%s" % (url, '&' if '?' in url else '?',
+                       urlencode(params, doseq=True))
+
+
+def _body(data, chunk_size=65536):
+    """Get a request body, reading file objects by chunks"""
+    if hasattr(data, 'read'):
+        return iter(partial(data.read, chunk_size), b"")
+    return data
+
+
+def _dump_body(body):
+    """Serialize a body for a cassette
+
+    :return: Body as :class:`dict`, :obj:`None` for unreadable bodies
+    """
+    if isinstance(body, str):
+        body = body.encode()
+    if not isinstance(body, bytes):
+        return None
+    try:
+        return {'encoding': 'utf-8', 'data': body.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {'encoding': 'base64',
+                'data': base64.b64encode(body).decode('ascii')}
+
+
+def _load_body(body):
+    """Deserialize a body from a cassette
+
+    :return: Body as :class:`bytes`
+    """
+    if body is None:
+        return b""
+    if body['encoding'] == 'base64':
+        return base64.b64decode(body['data'])
+    return body['data'].encode('utf-8')
+
+
+def _url_path(url):
+    """Get path and query string of an URL"""
+    parts = urlsplit(url)
+    if parts.query:
+        return "%s?%s" % (parts.path, parts.query)
+    return parts.path
+
+
+def is_connect_error(error):
+    """Tell if a request failed before reaching the API
+
+    :param Exception error: Error raised by a transport
+    :return: :obj:`True` on connection timeouts and failures to establish
+             connections, after which the request was surely not received
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    # requests wraps urllib3 errors in MaxRetryError
+    reason = getattr(reason, 'reason', reason)
+    if isinstance(reason, urllib3.exceptions.NewConnectionError):
+        return True
+    return httpx is not None and isinstance(reason, httpx.ConnectError)
+
+
+def _check_arguments(transport, kwargs):
+    """Reject request arguments a transport does not support
+
+    :param Transport transport: Transport sending the request
+    :param dict kwargs: Unsupported named arguments given to the request
+    :raise TypeError: If *kwargs* is not empty.
+    """
+    if kwargs:
+        raise TypeError("%s does not support request argument(s): %s" % (
+            transport.__class__.__name__, ", ".join(sorted(kwargs))))
+
+
+def _ssl_options(verify):
+    """Get :mod:`urllib3` pool options of a :mod:`requests` *verify* value
+
+    :param verify: Certificate validation flag, or path of a CA bundle file
+                   or directory
+    :return: Pool options as :class:`dict`
+    """
+    if verify is False:
+        return {'cert_reqs': 'CERT_NONE'}
+    options = {'cert_reqs': 'CERT_REQUIRED'}
+    if isinstance(verify, str):
+        if os.path.isdir(verify):
+            options['ca_cert_dir'] = verify
+        else:
+            options['ca_certs'] = verify
+    return options
+
+
+def _ssl_context(verify):
+    """Get :mod:`httpx` *verify* value of a :mod:`requests` one
+
+    :param verify: Certificate validation flag, or path of a CA bundle file
+                   or directory
+    :return: :class:`bool` or :class:`ssl.SSLContext`
+    """
+    if not isinstance(verify, str):
+        return verify
+    if os.path.isdir(verify):
+        return ssl.create_default_context(capath=verify)
+    return ssl.create_default_context(cafile=verify)
+
+
+def _open_connections(pool, count, timeout=None):
+    """Open connections of a :mod:`urllib3` connection pool in parallel
+
+    :param pool: :class:`urllib3.HTTPConnectionPool` of the host
+    :param int count: Number of connections to open
+    :param float timeout: Connection timeout in seconds
+    :return: Number of connections opened
+
+    Connections are checked out of the pool, connected concurrently and
+    put back as idle connections, ready for the next requests. Already
+    open connections are counted and left as is.
+
+    :mod:`urllib3` has no public API to open pooled connections, this relies
+    on the ``_get_conn`` and ``_put_conn`` methods of connection pools,
+    available in :mod:`urllib3` 1.26 and 2.
+    """
+    # pylint: disable=protected-access
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(pool._get_conn(timeout=0))
+    except urllib3.exceptions.EmptyPoolError:
+        pass
+
+    def connect(connection):
+        try:
+            # urllib3 1.26 connections have no is_connected property
+            if getattr(connection, 'is_connected',
+                       getattr(connection, 'sock', None) is not None):
+                return True
+            if timeout is not None:
+                connection.timeout = timeout
+            connection.connect()
+        except Exception as error:  # pylint: disable=broad-except
+            LOG.warning("connection to %s:%s failed: %s", pool.host,
+                        pool.port, error)
+            connection.close()
+            return False
+        return True
+
+    try:
+        if len(connections) < 2:
+            return sum(connect(connection) for connection in connections)
+        with ThreadPoolExecutor(max_workers=len(connections)) as executor:
+            return sum(executor.map(connect, connections))
+    finally:
+        for connection in connections:
+            pool._put_conn(connection)
+
+
+class Transport(object):
+    """Base class of HTTP transports used by
+    :class:`~powerdns.client.PDNSApiClient`
+
+    A transport sends a single HTTP request and returns a
+    :class:`requests.Response` compatible object. Connection errors are
+    raised as :mod:`requests` exceptions, so that retries and endpoints
+    failover behave the same whatever the transport.
+
+    Transports are picklable, connection pools are not: a transport copied
+    to another process, pickled or inherited by fork, opens its own
+    connections there.
+    """
+    #: Attribute holding the connection pool, created on first use
+    _pool_attribute = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_lock', None)
+        if self._pool_attribute is not None:
+            state[self._pool_attribute] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        if self._pool_attribute is not None:
+            fork.register(self)
+
+    def reset(self):
+        """Forget the connection pool without closing its connections
+
+        Called in child processes after fork, where inherited connections
+        are shared with the parent process and must not be used nor shut
+        down.
+        """
+        self._lock = threading.Lock()
+        if self._pool_attribute is not None:
+            setattr(self, self._pool_attribute, None)
+
+    def _after_fork(self):
+        """Reset the transport in a forked child process"""
+        self.reset()
+
+    def request(self, method, url, **kwargs):
+        """Send a single HTTP request
+
+        :param str method: HTTP method to use
+        :param str url: Full URL to request
+        :return: :class:`requests.Response` object
+
+        Named arguments are those of :meth:`requests.Session.request`.
+        """
+        raise NotImplementedError
+
+    # pylint: disable=unused-argument
+    def connect(self, url, count, timeout=None, verify=None):
+        """Open pooled connections to a host ahead of requests
+
+        :param str url: URL of the host
+        :param int count: Number of connections to open, bounded by the
+                          pool size
+        :param float timeout: Connection timeout in seconds
+        :param verify: Certificate validation of the requests that will use
+                       the connections, the transport one by default
+        :return: Number of connections opened
+
+        Transports without connection pool open none.
+        """
+        return 0
+
+    def close(self):
+        """Release resources held by the transport
+
+        The transport remains usable afterwards.
+        """
+
+
+class Response(object):
+    """Minimal :class:`requests.Response` compatible response
+
+    Responses of lean transports expose the subset of the
+    :class:`requests.Response` API used by the client.
+
+    :param str url: Requested URL
+    :param int status_code: HTTP status code
+    :param headers: Case insensitive response headers
+    :param callable chunks: Function returning an iterator over body chunks
+                            of a given size
+    :param callable release: Function releasing the connection
+    """
+    def __init__(self, url, status_code, headers, chunks, release=None):
+        """Initialization"""
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self._chunks = chunks
+        self._release = release
+        self._content = None
+
+    def __repr__(self):
+        return "<Response [%d]>" % self.status_code
+
+    @property
+    def content(self):
+        """Response body as :class:`bytes`, read on first access"""
+        if self._content is None:
+            self._content = b"".join(self._chunks(65536))
+            self.close()
+        return self._content
+
+    @property
+    def text(self):
+        """Response body as :class:`str`"""
+        return self.content.decode('utf-8', 'replace')
+
+    def iter_content(self, chunk_size=65536):
+        """Iterate over response body chunks"""
+        if self._content is not None:
+            return iter((self._content,))
+        return self._chunks(chunk_size)
+
+    def close(self):
+        """Release the connection"""
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+class RequestsTransport(Transport):
+    """HTTP transport based on a persistent :class:`requests.Session`
+
+    :param bool verify: Control SSL certificate validation
+    :param int pool_connections: Number of per-host connection pools to cache
+    :param int pool_maxsize: Maximum number of connections kept per host
+    :param bool pool_block: Block when no free connection is available
+                            instead of opening a throw-away one
+    """
+    _pool_attribute = '_session'
+
+    def __init__(self, verify=True, pool_connections=10, pool_maxsize=10,
+                 pool_block=False):
+        """Initialization"""
+        self._verify = verify
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self._session = None
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def __repr__(self):
+        return "RequestsTransport(verify=%s, pool_maxsize=%s)" % (
+            repr(self._verify), repr(self._pool_maxsize)
+        )
+
+    @property
+    def session(self):
+        """HTTP session holding the connection pool
+
+        The session is created on first use and reused by every request.
+        """
+        session = self._session
+        if session is None:
+            with self._lock:
+                session = self._session
+                if session is None:
+                    session = self._session = self._new_session()
+        return session
+
+    def _new_session(self):
+        """Create the HTTP session holding the connection pool
+
+        :return: :class:`requests.Session` instance
+        """
+        LOG.debug("creating http session (pool_connections=%d, "
+                  "pool_maxsize=%d, pool_block=%s)", self._pool_connections,
+                  self._pool_maxsize, self._pool_block)
+        session = requests.Session()
+        session.verify = self._verify
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self._pool_connections,
+            pool_maxsize=self._pool_maxsize,
+            pool_block=self._pool_block
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def request(self, method, url, **kwargs):
+        """Send a single HTTP request through the session"""
+        return self.session.request(method, url, **kwargs)
+
+    def connect(self, url, count, timeout=None, verify=None):
+        """Open pooled connections to a host ahead of requests"""
+        session = self.session
+        adapter = session.get_adapter(url)
+        if verify is None:
+            verify = self._verify
+        # same pool as requests, whose key depends on the CA bundle
+        settings = session.merge_environment_settings(url, {}, None,
+                                                      verify, None)
+        if hasattr(adapter, 'get_connection_with_tls_context'):
+            pool = adapter.get_connection_with_tls_context(
+                requests.Request('GET', url).prepare(), settings['verify'],
+                settings['proxies'], settings['cert'])
+        else:
+            pool = adapter.get_connection(url, settings['proxies'])
+        return _open_connections(pool, min(count, self._pool_maxsize),
+                                 timeout)
+
+    def close(self):
+        """Close the HTTP session and its pooled connections
+
+        A new connection pool is created on the next request.
+        """
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            LOG.debug("closing http session")
+            session.close()
+
+
+class Urllib3Transport(Transport):
+    """Lean HTTP transport based on :mod:`urllib3` connection pools
+
+    Requests are sent directly through a :class:`urllib3.PoolManager`,
+    skipping the :mod:`requests` session layer (cookies, hooks, redirects,
+    environment proxies), which noticeably lowers the overhead of small
+    requests. Responses are :class:`Response` objects and errors are raised
+    as :mod:`requests` exceptions.
+
+    :param bool verify: Control SSL certificate validation
+    :param int pool_connections: Number of per-host connection pools to cache
+    :param int pool_maxsize: Maximum number of connections kept per host
+    :param bool pool_block: Block when no free connection is available
+                            instead of opening a throw-away one
+    """
+    _pool_attribute = '_pool'
+
+    def __init__(self, verify=True, pool_connections=10, pool_maxsize=10,
+                 pool_block=False):
+        """Initialization"""
+        self._verify = verify
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self._pool = None
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def __repr__(self):
+        return "Urllib3Transport(verify=%s, pool_maxsize=%s)" % (
+            repr(self._verify), repr(self._pool_maxsize)
+        )
+
+    @property
+    def pool(self):
+        """Pool manager holding the connection pools
+
+        The pool manager is created on first use and reused by every
+        request.
+        """
+        pool = self._pool
+        if pool is None:
+            with self._lock:
+                pool = self._pool
+                if pool is None:
+                    LOG.debug("creating urllib3 pool manager "
+                              "(pool_connections=%d, pool_maxsize=%d)",
+                              self._pool_connections, self._pool_maxsize)
+                    pool = self._pool = urllib3.PoolManager(
+                        num_pools=self._pool_connections,
+                        maxsize=self._pool_maxsize,
+                        block=self._pool_block,
+                        retries=False,
+                        **_ssl_options(self._verify)
+                    )
+        return pool
+
+    def _host_pool(self, url, verify=None):
+        """Get the connection pool of a host
+
+        :param str url: URL of the host
+        :param verify: Certificate validation, the transport one by default
+        :return: :class:`urllib3.HTTPConnectionPool`
+        """
+        if verify is None or verify == self._verify:
+            return self.pool.connection_from_url(url)
+        return self.pool.connection_from_url(url,
+                                             pool_kwargs=_ssl_options(verify))
+
+    def connect(self, url, count, timeout=None, verify=None):
+        """Open pooled connections to a host ahead of requests"""
+        return _open_connections(self._host_pool(url, verify),
+                                 min(count, self._pool_maxsize), timeout)
+
+    # pylint: disable=too-many-arguments,arguments-differ
+    def request(self, method, url, data=None, headers=None, timeout=None,
+                stream=False, params=None, verify=None, **kwargs):
+        """Send a single HTTP request through the pool manager
+
+        *verify* may be a CA bundle path, as with :mod:`requests`, other
+        :mod:`requests` arguments are not supported.
+
+        :raise TypeError: On unsupported arguments.
+        """
+        _check_arguments(self, kwargs)
+        connect, read = split_timeout(timeout)
+        url = _with_params(url, params)
+        try:
+            raw = self._host_pool(url, verify).urlopen(
+                method, urllib3.util.parse_url(url).request_uri,
+                body=_body(data), headers=headers,
+                timeout=urllib3.Timeout(connect=connect, read=read),
+                preload_content=False, decode_content=True,
+                retries=False, redirect=False, assert_same_host=False
+            )
+        except urllib3.exceptions.NewConnectionError as error:
+            # subclass of ConnectTimeoutError, raised on refused connections
+            raise requests.exceptions.ConnectionError(error)
+        except urllib3.exceptions.ConnectTimeoutError as error:
+            raise requests.exceptions.ConnectTimeout(error)
+        except urllib3.exceptions.ReadTimeoutError as error:
+            raise requests.exceptions.ReadTimeout(error)
+        except urllib3.exceptions.SSLError as error:
+            raise requests.exceptions.SSLError(error)
+        except urllib3.exceptions.HTTPError as error:
+            raise requests.exceptions.ConnectionError(error)
+
+        def chunks(chunk_size):
+            try:
+                for chunk in raw.stream(chunk_size):
+                    yield chunk
+            except urllib3.exceptions.ReadTimeoutError as error:
+                raise requests.exceptions.ReadTimeout(error)
+            except urllib3.exceptions.HTTPError as error:
+                raise requests.exceptions.ConnectionError(error)
+
+        def release():
+            if not raw.isclosed():
+                # unread body, the connection can not be reused
+                raw.close()
+            raw.release_conn()
+
+        response = Response(url, raw.status, raw.headers, chunks, release)
+        if not stream:
+            response.content  # pylint: disable=pointless-statement
+        return response
+
+    def close(self):
+        """Close pooled connections
+
+        A new pool manager is created on the next request.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            LOG.debug("closing urllib3 pool manager")
+            pool.clear()
+
+
+class HttpxTransport(Transport):
+    """HTTP/2 capable transport based on :mod:`httpx`
+
+    With *http2* enabled, many in-flight requests from concurrent threads
+    are multiplexed over a single connection per host. HTTP/2 is negotiated
+    with TLS (ALPN), plain HTTP endpoints use HTTP/1.1 unless *http1* is
+    disabled (HTTP/2 prior knowledge). The PowerDNS webserver speaks
+    HTTP/1.1 only, HTTP/2 requires a proxy in front of it.
+
+    It requires the :mod:`httpx` package with HTTP/2 support, installed
+    with the ``http2`` extra (``pip install python-powerdns[http2]``).
+    Responses are :class:`Response` objects and errors are raised as
+    :mod:`requests` exceptions.
+
+    :param bool verify: Control SSL certificate validation
+    :param int pool_connections: Ignored, for compatibility
+    :param int pool_maxsize: Maximum number of connections
+    :param bool pool_block: Ignored, :mod:`httpx` always waits for a free
+                            connection
+    :param bool http2: Enable HTTP/2
+    :param bool http1: Enable HTTP/1.1
+    """
+    _pool_attribute = '_client'
+
+    # pylint: disable=too-many-arguments,unused-argument
+    def __init__(self, verify=True, pool_connections=10, pool_maxsize=10,
+                 pool_block=False, http2=True, http1=True):
+        """Initialization"""
+        if httpx is None:
+            raise ImportError("httpx is required by HttpxTransport")
+        self._verify = verify
+        self._pool_maxsize = pool_maxsize
+        self._http2 = http2
+        self._http1 = http1
+        self._client = None
+        self._clients = {}
+        self._lock = threading.Lock()
+        fork.register(self)
+
+    def __repr__(self):
+        return "HttpxTransport(verify=%s, http2=%s)" % (
+            repr(self._verify), repr(self._http2)
+        )
+
+    def __getstate__(self):
+        state = super(HttpxTransport, self).__getstate__()
+        state['_clients'] = {}
+        return state
+
+    def reset(self):
+        super(HttpxTransport, self).reset()
+        self._clients = {}
+
+    def _new_client(self, verify):
+        """Create an HTTP client holding a connection pool
+
+        :param verify: Certificate validation
+        :return: :class:`httpx.Client` instance
+        """
+        LOG.debug("creating httpx client (http2=%s, pool_maxsize=%d, "
+                  "verify=%s)", self._http2, self._pool_maxsize, verify)
+        return httpx.Client(
+            verify=_ssl_context(verify), http1=self._http1,
+            http2=self._http2, trust_env=False,
+            limits=httpx.Limits(
+                max_connections=self._pool_maxsize,
+                max_keepalive_connections=self._pool_maxsize)
+        )
+
+    @property
+    def client(self):
+        """HTTP client holding the connection pool
+
+        The client is created on first use and reused by every request.
+        """
+        client = self._client
+        if client is None:
+            with self._lock:
+                client = self._client
+                if client is None:
+                    client = self._client = self._new_client(self._verify)
+        return client
+
+    def _client_for(self, verify=None):
+        """Get the HTTP client of a certificate validation setting
+
+        :param verify: Certificate validation, the transport one by default
+        :return: :class:`httpx.Client` instance
+
+        :mod:`httpx` validates certificates per client, requests with
+        another *verify* value than the transport one get their own client.
+        """
+        if verify is None or verify == self._verify:
+            return self.client
+        with self._lock:
+            client = self._clients.get(verify)
+            if client is None:
+                client = self._clients[verify] = self._new_client(verify)
+        return client
+
+    # pylint: disable=too-many-arguments,arguments-differ
+    def request(self, method, url, data=None, headers=None, timeout=None,
+                stream=False, params=None, verify=None, **kwargs):
+        """Send a single HTTP request through the httpx client
+
+        *verify* may be a CA bundle path, as with :mod:`requests`, other
+        :mod:`requests` arguments are not supported.
+
+        :raise TypeError: On unsupported arguments.
+        """
+        _check_arguments(self, kwargs)
+        connect, read = split_timeout(timeout)
+        client = self._client_for(verify)
+        request = client.build_request(
+            method, url, content=_body(data), headers=headers, params=params,
+            timeout=httpx.Timeout(read, connect=connect)
+        )
+        try:
+            raw = client.send(request, stream=True)
+        except httpx.ConnectTimeout as error:
+            raise requests.exceptions.ConnectTimeout(error)
+        except httpx.TimeoutException as error:
+            raise requests.exceptions.ReadTimeout(error)
+        except httpx.TransportError as error:
+            raise requests.exceptions.ConnectionError(error)
+
+        def chunks(chunk_size):
+            try:
+                for chunk in raw.iter_bytes(chunk_size):
+                    yield chunk
+            except httpx.TimeoutException as error:
+                raise requests.exceptions.ReadTimeout(error)
+            except httpx.TransportError as error:
+                raise requests.exceptions.ConnectionError(error)
+
+        response = Response(str(raw.url), raw.status_code, raw.headers,
+                            chunks, raw.close)
+        if not stream:
+            response.content  # pylint: disable=pointless-statement
+        return response
+
+    def close(self):
+        """Close the httpx client and its pooled connections
+
+        A new client is created on the next request.
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            if self._client is not None:
+                clients.append(self._client)
+            self._client = None
+            self._clients = {}
+        for client in clients:
+            LOG.debug("closing httpx client")
+            client.close()
+
+
+#: Available transports by name
+TRANSPORTS = {
+    'requests': RequestsTransport,
+    'urllib3': Urllib3Transport,
+    'httpx': HttpxTransport,
+}
+
+
+def get_transport(transport=None, **options):
+    """Get an HTTP transport
+
+    :param transport: Transport name (``requests``, ``urllib3`` or
+                      ``httpx``) or instance, ``requests`` by default
+    :param options: Options of transports built from their name
+    :return: :class:`Transport` instance
+
+    :raise ValueError: If the transport name is unknown.
+    :raise ImportError: If the transport requires a missing package.
+    """
+    if transport is None:
+        transport = 'requests'
+    if not isinstance(transport, str):
+        return transport
+    if transport not in TRANSPORTS:
+        raise ValueError("unknown transport: %s" % transport)
+    return TRANSPORTS[transport](**options)
+
+
+class RecordingTransport(Transport):
+    """HTTP transport recording API exchanges to a cassette file
+
+    Requests are sent through *transport* and every exchange is recorded:
+    method, URL path, request body, response status code, headers and
+    body. Request headers, holding the API key, are never recorded. The
+    cassette is written by :meth:`save`, called on :meth:`close`.
+
+    Responses are fully read to be recorded, even in stream mode.
+
+    :param str cassette: Path of the cassette file to write
+    :param Transport transport: Transport sending requests, a
+                                :class:`RequestsTransport` by default
+    """
+    def __init__(self, cassette, transport=None):
+        """Initialization"""
+        self.cassette = cassette
+        self.transport = transport or RequestsTransport()
+        self.exchanges = []
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "RecordingTransport(%s, %s)" % (repr(self.cassette),
+                                               repr(self.transport))
+
+    def request(self, method, url, **kwargs):
+        """Send a single HTTP request and record the exchange"""
+        response = self.transport.request(method, url, **kwargs)
+        try:
+            content = response.content
+        finally:
+            response.close()
+        headers = dict((name, value)
+                       for name, value in response.headers.items()
+                       if name.lower() not in SKIPPED_HEADERS)
+        exchange = {
+            'method': method,
+            'path': _url_path(_with_params(url, kwargs.get('params'))),
+            'request': {'body': _dump_body(kwargs.get('data'))},
+            'response': {'status_code': response.status_code,
+                         'headers': headers,
+                         'body': _dump_body(content)},
+        }
+        with self._lock:
+            self.exchanges.append(exchange)
+        return build_response(response.url, response.status_code, content,
+                              headers)
+
+    def connect(self, url, count, timeout=None, verify=None):
+        """Open pooled connections of the underlying transport"""
+        return self.transport.connect(url, count, timeout, verify)
+
+    def save(self):
+        """Write recorded exchanges to the cassette file"""
+        with self._lock:
+            exchanges = list(self.exchanges)
+        LOG.info("saving %d exchange(s) to %s", len(exchanges),
+                 self.cassette)
+        with open(self.cassette, "w") as cassette_fp:
+            json.dump({'version': 1, 'exchanges': exchanges}, cassette_fp,
+                      indent=2, sort_keys=True)
+
+    def close(self):
+        """Save the cassette and close the underlying transport"""
+        self.save()
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    """HTTP transport replaying API exchanges from a cassette file
+
+    No connection is ever opened. Each request is answered with the next
+    recorded exchange of the same method and URL path, including query
+    parameters, in recording order,
+    so a sequence of reads and writes is replayed deterministically. Once
+    exchanges of a request are exhausted, the last one is replayed again.
+    URL paths are matched without the endpoint host, a cassette recorded
+    on one API endpoint may be replayed on any other.
+
+    :param str cassette: Path of the cassette file to read
+    :raise LookupError: On requests not recorded in the cassette.
+    """
+    def __init__(self, cassette):
+        """Initialization"""
+        self.cassette = cassette
+        with open(cassette) as cassette_fp:
+            exchanges = json.load(cassette_fp)['exchanges']
+        self._exchanges = {}
+        for exchange in exchanges:
+            key = (exchange['method'], exchange['path'])
+            self._exchanges.setdefault(key, []).append(exchange['response'])
+        self._positions = dict.fromkeys(self._exchanges, 0)
+        self._lock = threading.Lock()
+        LOG.debug("loaded %d exchange(s) from %s", len(exchanges), cassette)
+
+    def __repr__(self):
+        return "ReplayTransport(%s)" % repr(self.cassette)
+
+    def request(self, method, url, **kwargs):
+        """Answer a single HTTP request with a recorded response"""
+        key = (method, _url_path(_with_params(url, kwargs.get('params'))))
+        with self._lock:
+            responses = self._exchanges.get(key)
+            if not responses:
+                raise LookupError("no recorded exchange for %s %s"
+                                  % (method, key[1]))
+            position = self._positions[key]
+            self._positions[key] = min(position + 1, len(responses) - 1)
+        recorded = responses[position]
+        return build_response(url, recorded['status_code'],
+                              _load_body(recorded['body']),
+                              recorded['headers'])
+
+    def rewind(self):
+        """Replay exchanges from the beginning"""
+        with self._lock:
+            self._positions = dict.fromkeys(self._exchanges, 0)
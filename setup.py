@@ -49,15 +49,21 @@ if __name__ == '__main__':
             'Operating System :: POSIX :: BSD',
             'Operating System :: POSIX :: Linux',
             'License :: OSI Approved :: MIT License',
-            'Programming Language :: Python :: 2.7',
-            'Programming Language :: Python :: 3.4',
-            'Programming Language :: Python :: 3.5',
-            'Programming Language :: Python :: 3.6',
+            'Programming Language :: Python :: 3 :: Only',
             'Programming Language :: Python :: 3.7',
             'Programming Language :: Python :: 3.8',
             'Programming Language :: Python :: 3.9',
+            'Programming Language :: Python :: 3.10',
+            'Programming Language :: Python :: 3.11',
             'Environment :: Web Environment',
             'Topic :: Utilities',
             ],
-        requires=['urllib3', 'requests']
+        python_requires='>=3.7',
+        requires=['urllib3', 'requests'],
+        extras_require={
+            'async': ['aiohttp'],
+            'fast': ['orjson'],
+            'http2': ['httpx[http2]'],
+            'tracing': ['opentelemetry-api'],
+        }
     )
@@ -17,18 +17,41 @@
 #  You should have received a copy of the MIT License along with this
 #  program; if not, see <https://opensource.org/licenses/MIT>.
 
+import atexit
+import os
 import powerdns
 
 from logging import Logger
 from unittest import TestCase
 
+from powerdns.fakeserver import FakePDNSServer
+from powerdns.transport import RecordingTransport, ReplayTransport
 
-PDNS_KEY = "MySupErS3cureK3y"
-PDNS_API = "http://172.17.0.2:8081/api/v1"
+
+PDNS_KEY = os.environ.get("PDNS_KEY", "MySupErS3cureK3y")
+PDNS_API = os.environ.get("PDNS_API")
+
+# Without live API (eg. http://172.17.0.2:8081/api/v1), tests run against
+# an in-process fake PowerDNS API
+if not PDNS_API:
+    FAKE_SERVER = FakePDNSServer(api_key=PDNS_KEY).start()
+    atexit.register(FAKE_SERVER.stop)
+    PDNS_API = FAKE_SERVER.url
+
+# Record live API exchanges to, or replay them from, a cassette file
+PDNS_CASSETTE = os.environ.get("PDNS_CASSETTE")
+if PDNS_CASSETTE and os.environ.get("PDNS_RECORD"):
+    TRANSPORT = RecordingTransport(PDNS_CASSETTE)
+    atexit.register(TRANSPORT.save)
+elif PDNS_CASSETTE:
+    TRANSPORT = ReplayTransport(PDNS_CASSETTE)
+else:
+    TRANSPORT = None
 
 API_CLIENT = powerdns.PDNSApiClient(api_endpoint=PDNS_API,
                                     api_key=PDNS_KEY,
-                                    verify=False)
+                                    verify=False,
+                                    transport=TRANSPORT)
 
 
 class TestLogger(TestCase):
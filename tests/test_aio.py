@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import IsolatedAsyncioTestCase, skipIf
+
+from powerdns import aio
+from powerdns.deadline import Deadline
+from powerdns.exceptions import PDNSDeadlineError, PDNSError
+from powerdns.fakeserver import FakePDNSServer
+from powerdns.interface import RRSet
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    """Minimal PowerDNS API answering canned data"""
+
+    routes = {
+        "/api/v1/servers": [{"id": "localhost", "version": "4.4.1",
+                             "daemon_type": "authoritative"}],
+        "/api/v1/servers/localhost/zones": [{"name": "test.outini.net."}],
+        "/api/v1/servers/localhost/zones/test.outini.net.": {
+            "id": "test.outini.net.", "name": "test.outini.net.",
+            "rrsets": []},
+    }
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, code, data=None):
+        body = json.dumps(data).encode() if data is not None else b""
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.hits.append(("GET", self.path))
+        if self.path not in self.routes:
+            return self.reply(404)
+        self.reply(200, self.routes[self.path])
+
+    def do_PATCH(self):
+        length = int(self.headers["Content-Length"])
+        self.server.hits.append(("PATCH", self.path,
+                                 json.loads(self.rfile.read(length))))
+        self.reply(204)
+
+
+@skipIf(aio.aiohttp is None, "aiohttp is not installed")
+class TestAsyncInterface(IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeAPIHandler)
+        cls.httpd.hits = []
+        cls.thread = threading.Thread(target=cls.httpd.serve_forever,
+                                      daemon=True)
+        cls.thread.start()
+        cls.api_url = "http://127.0.0.1:%d/api/v1" % cls.httpd.server_port
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+
+    async def asyncSetUp(self):
+        self.httpd.hits.clear()
+        self.client = aio.AsyncPDNSApiClient(self.api_url, "secret")
+        self.api = aio.AsyncPDNSEndpoint(self.client)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def test_concurrent_get_zone(self):
+        servers = await self.api.get_servers()
+        self.assertIsInstance(servers[0], aio.AsyncPDNSServer)
+        zones = await asyncio.gather(*[
+            servers[0].get_zone("test.outini.net.") for _ in range(50)
+        ])
+        self.assertTrue(all(zone is zones[0] for zone in zones))
+        self.assertIsInstance(zones[0], aio.AsyncPDNSZone)
+        self.assertEqual(self.httpd.hits, [
+            ("GET", "/api/v1/servers"),
+            ("GET", "/api/v1/servers/localhost/zones"),
+        ])
+        self.assertIsNone(await servers[0].get_zone("nonexistent."))
+
+    async def test_create_records(self):
+        server = (await self.api.get_servers())[0]
+        zone = await server.get_zone("test.outini.net.")
+        self.assertEqual((await zone.get_details())["id"], zone.name)
+        result = await zone.create_records([RRSet("www", "A", ["1.2.3.4"])])
+        self.assertEqual(result, "")
+        method, path, data = self.httpd.hits[-1]
+        self.assertEqual((method, path), ("PATCH", "/api/v1" + zone.url))
+        self.assertEqual(data["rrsets"][0]["name"], "www.test.outini.net.")
+        self.assertIsNone(zone._details)
+
+    async def test_error(self):
+        with self.assertRaises(PDNSError) as context:
+            await self.client.get("/nonexistent")
+        self.assertEqual(context.exception.status_code, 404)
+
+    async def test_deadline(self):
+        with FakePDNSServer(api_key="secret", latency=0.3) as server:
+            client = aio.AsyncPDNSApiClient(server.url, "secret")
+            deadline = Deadline(0.1)
+
+            async def get_servers():
+                with deadline:
+                    return await client.get("/servers")
+
+            results = await asyncio.gather(get_servers(), get_servers(),
+                                           return_exceptions=True)
+            await client.close()
+        self.assertTrue(all(isinstance(result, PDNSDeadlineError)
+                            for result in results))
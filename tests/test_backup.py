@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import json
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from powerdns.client import PDNSApiClient
+from powerdns.interface import PDNSServer, PDNSZone
+
+from . import PDNS_API, PDNS_KEY
+from .test_client import stream_response
+
+
+DETAILS = {"id": "test.outini.net.", "name": "test.outini.net.",
+           "rrsets": [{"name": "test.outini.net.", "type": "SOA"}]}
+
+
+class TestZoneBackup(TestCase):
+
+    def setUp(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY)
+        server = PDNSServer(client, {"id": "localhost", "version": "4",
+                                     "daemon_type": "authoritative"})
+        self.zone = PDNSZone(client, server, {"name": "test.outini.net."})
+        patcher = mock.patch.object(client.session, "request")
+        self.request = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def backup(self, **kwargs):
+        content = json.dumps(DETAILS).encode()
+        self.request.return_value = stream_response(200, content)
+        self.zone.backup(self.directory.name, **kwargs)
+        with open(os.path.join(self.directory.name,
+                               "test.outini.net.json")) as backup_fp:
+            return backup_fp.read()
+
+    def test_backup_streamed(self):
+        self.assertEqual(json.loads(self.backup()), DETAILS)
+        self.assertTrue(self.request.call_args[1]["stream"])
+        self.assertIsNone(self.zone._details)
+
+    def test_backup_streamed_failure(self):
+        json_file = os.path.join(self.directory.name, "test.outini.net.json")
+        with open(json_file, "w") as backup_fp:
+            backup_fp.write("previous")
+        response = stream_response(200, b"")
+        response.raw = mock.Mock(spec=["read", "close"])
+        response.raw.read.side_effect = [b'{"id": ', IOError("reset")]
+        self.request.return_value = response
+        with self.assertRaises(IOError):
+            self.zone.backup(self.directory.name)
+        self.assertEqual(os.listdir(self.directory.name),
+                         ["test.outini.net.json"])
+        with open(json_file) as backup_fp:
+            self.assertEqual(backup_fp.read(), "previous")
+        self.assertEqual(json.loads(self.backup()), DETAILS)
+
+    def test_backup_mode(self):
+        umask = os.umask(0o022)
+        self.addCleanup(os.umask, umask)
+        self.backup()
+        json_file = os.path.join(self.directory.name, "test.outini.net.json")
+        self.assertEqual(os.stat(json_file).st_mode & 0o777, 0o644)
+
+    def test_backup_pretty(self):
+        backup = self.backup(pretty_json=True)
+        self.assertEqual(json.loads(backup), DETAILS)
+        self.assertIn('\n  "id"', backup)
+        self.assertEqual(self.zone._details, DETAILS)
+
+
+class TestZoneIterRRSets(TestZoneBackup):
+
+    def test_iter_rrsets_streamed(self):
+        content = json.dumps(DETAILS).encode()
+        self.request.return_value = stream_response(200, content)
+        self.assertEqual(list(self.zone.iter_rrsets()), DETAILS["rrsets"])
+        self.assertTrue(self.request.call_args[1]["stream"])
+        self.assertIsNone(self.zone._details)
+
+    def test_iter_rrsets_no_content(self):
+        response = stream_response(204, b"")
+        self.request.return_value = response
+        with mock.patch.object(response, "close") as close:
+            with self.assertRaises(ValueError):
+                list(self.zone.iter_rrsets())
+        close.assert_called_once_with()
+
+    def test_iter_rrsets_cached(self):
+        self.zone._details = DETAILS
+        self.assertEqual(list(self.zone.iter_rrsets()), DETAILS["rrsets"])
+        self.request.assert_not_called()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+from unittest import TestCase, mock
+
+import requests
+import urllib3
+
+from powerdns.balancer import EndpointPool
+from powerdns.client import PDNSApiClient
+
+from . import PDNS_KEY
+from .test_client import fake_response
+
+
+NODES = ["http://pdns-01/api/v1", "http://pdns-02/api/v1",
+         "http://pdns-03/api/v1"]
+
+
+class TestEndpointPool(TestCase):
+
+    def test_round_robin(self):
+        pool = EndpointPool(NODES)
+        self.assertEqual([pool.select("GET")[0] for _ in range(4)],
+                         NODES + NODES[:1])
+        self.assertEqual([pool.select("PATCH")[0] for _ in range(2)],
+                         NODES[:1] * 2)
+
+    def test_least_latency(self):
+        pool = EndpointPool(NODES, strategy="least-latency")
+        for endpoint, latency in zip(NODES, [0.3, 0.1, 0.2]):
+            pool.record_latency(endpoint, latency)
+        self.assertEqual(pool.select("GET"), [NODES[1], NODES[2], NODES[0]])
+        self.assertEqual(pool.select("POST"), NODES)
+
+    def test_mark_down(self):
+        pool = EndpointPool(NODES)
+        pool.mark_down(NODES[0])
+        self.assertEqual(pool.select("DELETE"), NODES[1:] + NODES[:1])
+        pool.record_latency(NODES[0], 0.1)
+        self.assertEqual(pool.select("DELETE"), NODES)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            EndpointPool([])
+        with self.assertRaises(ValueError):
+            EndpointPool(NODES, strategy="random")
+
+
+def connect_error(url):
+    """Build the error of requests failing to connect"""
+    return requests.exceptions.ConnectionError(
+        urllib3.exceptions.MaxRetryError(
+            None, url,
+            urllib3.exceptions.NewConnectionError(None, "refused")))
+
+
+class TestClientEndpoints(TestCase):
+
+    def test_client_failover(self):
+        client = PDNSApiClient(NODES, PDNS_KEY)
+        self.assertEqual(str(client), ", ".join(NODES))
+
+        def api(method, url, **kwargs):
+            if url.startswith(NODES[0]):
+                raise connect_error(url)
+            return fake_response(200, [])
+
+        with mock.patch.object(client.session, "request",
+                               side_effect=api) as request:
+            client.patch("/servers/localhost/zones/test.", data={})
+            for _ in range(3):
+                client.get("/servers")
+        self.assertEqual([call[0][1] for call in request.call_args_list], [
+            NODES[0] + "/servers/localhost/zones/test.",
+            NODES[1] + "/servers/localhost/zones/test.",
+            NODES[1] + "/servers",
+            NODES[1] + "/servers",
+            NODES[2] + "/servers",
+        ])
+
+    def test_client_write_not_replayed(self):
+        client = PDNSApiClient(NODES, PDNS_KEY)
+        aborted = requests.exceptions.ConnectionError(
+            "Connection aborted.", ConnectionResetError())
+        with mock.patch.object(client.session, "request") as request:
+            request.side_effect = [aborted, fake_response(200, [])]
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                client.post("/servers/localhost/zones", data={})
+            self.assertEqual(request.call_count, 1)
+            # reads may be sent again
+            request.side_effect = [aborted, fake_response(200, [])]
+            self.assertEqual(client.get("/servers"), [])
+            self.assertEqual(request.call_count, 3)
+
+    def test_client_all_down(self):
+        client = PDNSApiClient(NODES[:2], PDNS_KEY)
+        with mock.patch.object(client.session, "request") as request:
+            request.side_effect = requests.exceptions.ConnectionError()
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                client.get("/servers")
+        self.assertEqual(request.call_count, 2)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+from unittest import TestCase, mock
+
+import requests
+
+from powerdns.breaker import CircuitBreaker
+from powerdns.client import PDNSApiClient
+from powerdns.exceptions import PDNSCircuitOpenError, PDNSError
+
+from . import PDNS_API, PDNS_KEY
+from .test_client import fake_response
+
+
+class TestCircuitBreaker(TestCase):
+
+    def test_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3)
+        for _ in range(2):
+            breaker.record_failure()
+        breaker.record_success()
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_error_rate(self):
+        breaker = CircuitBreaker(failure_threshold=100,
+                                 error_rate_threshold=0.5, window_size=10,
+                                 min_requests=10)
+        for _ in range(5):
+            breaker.record_success()
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    @mock.patch("time.monotonic")
+    def test_half_open(self, monotonic):
+        monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+        breaker.record_failure()
+        monotonic.return_value = 110
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        monotonic.return_value = 120
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    @mock.patch("time.monotonic")
+    def test_release_probe(self, monotonic):
+        monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+        breaker.record_failure()
+        monotonic.return_value = 110
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.release_probe()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+
+    def test_client_fast_fail(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY,
+                               circuit_breaker=CircuitBreaker(2))
+        with mock.patch.object(client.session, "request") as request:
+            request.side_effect = [requests.exceptions.ConnectTimeout(),
+                                   fake_response(503, {"error": "down"})]
+            with self.assertRaises(requests.exceptions.ConnectTimeout):
+                client.get("/servers")
+            with self.assertRaises(PDNSError):
+                client.get("/servers")
+            with self.assertRaises(PDNSCircuitOpenError):
+                client.get("/servers")
+        self.assertEqual(request.call_count, 2)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import time
+from unittest import TestCase
+
+from powerdns.client import PDNSApiClient
+from powerdns.deadline import Deadline
+from powerdns.exceptions import PDNSDeadlineError, PDNSError
+from powerdns.fakeserver import FakePDNSServer
+
+
+ZONES = "servers/localhost/zones"
+
+
+class TestBulk(TestCase):
+
+    def setUp(self):
+        self.server = FakePDNSServer(api_key="secret").start()
+        self.addCleanup(self.server.stop)
+        self.server.populate(zones=20, records=1, suffix="bulk.test.")
+        self.client = PDNSApiClient(self.server.url, "secret")
+        self.addCleanup(self.client.close)
+
+    def test_ordered_with_errors(self):
+        calls = [("GET", "%s/zone-%d.bulk.test." % (ZONES, idx))
+                 for idx in range(20)]
+        calls.insert(5, ("GET", "%s/missing.bulk.test." % ZONES))
+        results = list(self.client.bulk(calls, max_workers=4))
+        self.assertEqual([result.index for result in results],
+                         list(range(21)))
+        self.assertEqual([result.path for result in results],
+                         [path for _, path in calls])
+        self.assertFalse(results[5].ok)
+        self.assertIsInstance(results[5].error, PDNSError)
+        self.assertRaises(PDNSError, results[5].get)
+        self.assertEqual(results[6].get()["name"], "zone-5.bulk.test.")
+        self.assertEqual(sum(result.ok for result in results), 20)
+
+    def test_as_completed(self):
+        self.server.latency = 0.1
+        calls = [("PUT", "%s/zone-%d.bulk.test./notify" % (ZONES, idx))
+                 for idx in range(20)]
+        start = time.monotonic()
+        results = list(self.client.bulk(iter(calls), max_workers=10,
+                                        ordered=False))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(sorted(result.index for result in results),
+                         list(range(20)))
+        self.assertTrue(all(result.ok for result in results))
+
+    def test_data_and_deadline(self):
+        rrsets = {"rrsets": [{"name": "new.zone-0.bulk.test.", "type": "A",
+                              "ttl": 60, "changetype": "REPLACE",
+                              "records": [{"content": "10.0.0.1",
+                                           "disabled": False}]}]}
+        path = "%s/zone-0.bulk.test." % ZONES
+        with Deadline(0):
+            results = list(self.client.bulk([("PATCH", path, rrsets)]))
+        self.assertIsInstance(results[0].error, PDNSDeadlineError)
+        results = list(self.client.bulk([("PATCH", path, rrsets),
+                                         ("GET", path)], max_workers=1))
+        self.assertTrue(results[0].ok)
+        self.assertIn("new.zone-0.bulk.test.",
+                      [rrset["name"] for rrset in results[1].get()["rrsets"]])
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+import requests
+
+from powerdns.cache import ResponseCache, SingleFlight
+from powerdns.client import PDNSApiClient
+from powerdns.deadline import Deadline
+from powerdns.exceptions import PDNSDeadlineError, PDNSError
+from powerdns.fakeserver import FakePDNSServer
+from powerdns.interface import PDNSEndpoint
+
+from . import PDNS_API, PDNS_KEY
+from .test_client import fake_response
+
+
+ZONE = "servers/localhost/zones/test.outini.net."
+
+
+class TestResponseCache(TestCase):
+
+    def test_lru(self):
+        cache = ResponseCache(maxsize=2)
+        cache.set("servers", b"1")
+        cache.set("/servers/localhost", b"2")
+        self.assertEqual(cache.get("/servers"), b"1")
+        cache.set("servers/localhost/zones", b"3")
+        self.assertIsNone(cache.get("servers/localhost"))
+        self.assertEqual(cache.get("servers"), b"1")
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    @mock.patch("time.monotonic")
+    def test_ttl(self, monotonic):
+        monotonic.return_value = 0
+        cache = ResponseCache(ttl=60, ttls={
+            "/servers/{server_id}/zones/{zone_id}": 10,
+            "/servers/{server_id}/search-data": 0,
+        })
+        cache.set("servers/localhost/zones", b"zones")
+        cache.set(ZONE, b"zone")
+        cache.set("servers/localhost/search-data?q=a", b"search")
+        self.assertEqual(len(cache), 2)
+        monotonic.return_value = 30
+        self.assertIsNone(cache.get(ZONE))
+        self.assertEqual(cache.get("servers/localhost/zones"), b"zones")
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        for path in ("servers", "servers/localhost", "servers/localhost/zones",
+                     ZONE, ZONE + "/metadata", "servers/localhost/zones/b.",
+                     "servers/localhost/search-data?q=a",
+                     "servers/localhost/config"):
+            cache.set(path, b"{}")
+        cache.invalidate(PDNS_API + "/" + ZONE)
+        self.assertEqual(sorted(cache._entries), [
+            "servers/localhost/config", "servers/localhost/zones/b.",
+        ])
+
+    def test_invalidated_in_flight(self):
+        cache = ResponseCache(maxsize=2)
+        generation = cache.generation(ZONE)
+        other = cache.generation("servers/localhost/config")
+        cache.invalidate(ZONE + "/metadata")
+        cache.set(ZONE, b"stale", generation)
+        cache.set("servers/localhost/config", b"{}", other)
+        self.assertIsNone(cache.get(ZONE))
+        self.assertEqual(cache.get("servers/localhost/config"), b"{}")
+        cache.set(ZONE, b"fresh", cache.generation(ZONE))
+        self.assertEqual(cache.get(ZONE), b"fresh")
+
+
+class TestClientCache(TestCase):
+
+    def test_fresh_endpoints(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, cache=ResponseCache())
+        servers = [{"id": "localhost", "version": "4",
+                    "daemon_type": "authoritative"}]
+        with mock.patch.object(client.session, "request") as request:
+            request.return_value = fake_response(200, servers)
+            for _ in range(3):
+                self.assertEqual(PDNSEndpoint(client).servers[0].sid,
+                                 "localhost")
+            self.assertEqual(client.get("/servers", raw=True),
+                             request.return_value.content)
+            self.assertEqual(request.call_count, 1)
+            request.return_value = fake_response(204)
+            client.delete("/servers/localhost/zones/test.")
+            request.return_value = fake_response(200, servers)
+            client.get("/servers")
+        self.assertEqual(request.call_count, 3)
+
+    def test_write_during_read(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, cache=ResponseCache())
+
+        def api(method, url, **kwargs):
+            if method == "GET":
+                # the zone is written while its details are requested
+                client.patch(ZONE, data={})
+                return fake_response(200, {"serial": 1})
+            return fake_response(204)
+
+        with mock.patch.object(client.session, "request", side_effect=api):
+            client.get(ZONE)
+        self.assertEqual(len(client._cache), 0)
+
+    def test_failed_write_invalidates(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, cache=ResponseCache())
+        with mock.patch.object(client.session, "request") as request:
+            request.return_value = fake_response(200, {"serial": 1})
+            client.get(ZONE)
+            request.side_effect = requests.exceptions.ReadTimeout()
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                client.patch(ZONE, data={})
+        self.assertEqual(len(client._cache), 0)
+
+    def test_params_not_cached(self):
+        with FakePDNSServer(api_key="secret") as server:
+            server.populate(zones=2, records=1, suffix="cache.test.")
+            client = PDNSApiClient(server.url, "secret",
+                                   cache=ResponseCache())
+            path = "servers/localhost/search-data"
+            results = [client.get(path, params={"q": "zone-%d*" % idx})
+                       for idx in range(2)]
+            client.close()
+        self.assertNotEqual(results[0], results[1])
+        self.assertTrue(all(item["name"].startswith("zone-1")
+                            for item in results[1]))
+        self.assertEqual(len(client._cache), 0)
+
+
+class TestSingleFlight(TestCase):
+
+    def test_error_shared(self):
+        flight = SingleFlight()
+        with self.assertRaises(KeyError):
+            flight.do("key", lambda: {}["missing"])
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+
+    def test_client_coalesce(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, coalesce=True,
+                               pool_maxsize=50)
+
+        def slow_api(method, url, **kwargs):
+            time.sleep(0.1)
+            return fake_response(200, {"name": "test."})
+
+        with mock.patch.object(client.session, "request",
+                               side_effect=slow_api) as request:
+            with ThreadPoolExecutor(max_workers=50) as pool:
+                results = list(pool.map(lambda _: client.get("/" + ZONE),
+                                        range(50)))
+            self.assertEqual(request.call_count, 1)
+            self.assertTrue(all(result is results[0] for result in results))
+            client.get(ZONE)
+            self.assertEqual(request.call_count, 2)
+
+            request.side_effect = None
+            request.return_value = fake_response(500, {"error": "failed"})
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                futures = [pool.submit(client.get, ZONE) for _ in range(4)]
+            for future in futures:
+                self.assertIsInstance(future.exception(), PDNSError)
+
+    def test_deadline_not_coalesced(self):
+        with FakePDNSServer(api_key="secret") as server:
+            server.latency = 0.3
+            client = PDNSApiClient(server.url, "secret", coalesce=True)
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                bounded = pool.submit(client.get, "/servers",
+                                      deadline=Deadline(0.1))
+                time.sleep(0.05)
+                unbounded = pool.submit(client.get, "/servers")
+            client.close()
+            self.assertIsInstance(bounded.exception(), PDNSDeadlineError)
+            self.assertEqual(unbounded.result()[0]["id"], "localhost")
+            self.assertEqual(server.requests, 2)
@@ -17,11 +17,36 @@
 #  You should have received a copy of the MIT License along with this
 #  program; if not, see <https://opensource.org/licenses/MIT>.
 
-from unittest import TestCase
+import gzip
+import io
+import json
+from unittest import TestCase, mock
+
+import requests
+
+from powerdns.client import PDNSApiClient
 
 from . import API_CLIENT, PDNS_API, PDNS_KEY
 
 
+def fake_response(status_code=200, json_data=None):
+    """Build a fake :class:`requests.Response` like object"""
+    response = mock.Mock(status_code=status_code, url=PDNS_API,
+                         text=str(json_data), headers={},
+                         content=json.dumps(json_data).encode())
+    response.json.return_value = json_data
+    return response
+
+
+def stream_response(status_code, content):
+    """Build a :class:`requests.Response` reading *content* lazily"""
+    response = requests.models.Response()
+    response.status_code = status_code
+    response.url = PDNS_API
+    response.raw = io.BytesIO(content)
+    return response
+
+
 class TestClient(TestCase):
 
     def test_client_repr_and_str(self):
@@ -33,3 +58,66 @@ class TestClient(TestCase):
 
     def test_client_full_uri(self):
         self.assertIsInstance(API_CLIENT.get(PDNS_API + "/servers"), list)
+
+    def test_client_session_reused(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, pool_maxsize=4)
+        session = client.session
+        self.assertIs(client.session, session)
+        with mock.patch.object(session, "request",
+                               return_value=fake_response()) as request:
+            client.get("/servers")
+            client.patch("/servers/localhost/zones/test.", data={})
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(request.call_args[0],
+                         ("PATCH",
+                          PDNS_API + "/servers/localhost/zones/test."))
+        adapter = session.get_adapter(PDNS_API)
+        self.assertEqual(adapter._pool_maxsize, 4)
+
+    def test_client_context_manager(self):
+        with PDNSApiClient(PDNS_API, PDNS_KEY) as client:
+            session = client.session
+        self.assertIsNone(client.transport._session)
+        self.assertIsNot(client.session, session)
+
+    def test_client_codec(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, codec="json")
+        with mock.patch.object(client.session, "request",
+                               return_value=fake_response(200, [1])) as req:
+            self.assertEqual(client.post("/servers", data={"a": "é"}), [1])
+        self.assertEqual(req.call_args[1]["data"], b'{"a": "\\u00e9"}')
+        with self.assertRaises(ValueError):
+            PDNSApiClient(PDNS_API, PDNS_KEY, codec="nonexistent")
+
+    def test_client_raw_and_stream(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY)
+        content = b'{"name": "test."}' * 10
+        with mock.patch.object(client.session, "request") as request:
+            request.return_value = stream_response(200, content)
+            self.assertEqual(client.get("/zone", raw=True), content)
+            request.return_value = stream_response(200, content)
+            chunks = list(client.get("/zone", stream=True, chunk_size=16))
+            self.assertEqual(request.call_args[1]["stream"], True)
+            request.return_value = stream_response(204, b"")
+            self.assertEqual(list(client.get("/zone", stream=True)), [])
+            request.return_value = stream_response(200, b"{}")
+            client.put("/zone", data=content)
+            self.assertIs(request.call_args[1]["data"], content)
+        self.assertEqual(b"".join(chunks), content)
+        self.assertEqual(len(chunks[0]), 16)
+
+    def test_client_compress(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, compress=True,
+                               compress_threshold=64, codec="json")
+        with mock.patch.object(client.session, "request",
+                               return_value=fake_response(204)) as request:
+            client.patch("/zone", data={"rrsets": ["x" * 100]})
+            headers = request.call_args[1]["headers"]
+            self.assertEqual(headers["Content-Encoding"], "gzip")
+            self.assertEqual(headers["Accept-Encoding"], "gzip")
+            self.assertEqual(gzip.decompress(request.call_args[1]["data"]),
+                             b'{"rrsets": ["' + b"x" * 100 + b'"]}')
+            client.patch("/zone", data={})
+            self.assertNotIn("Content-Encoding",
+                             request.call_args[1]["headers"])
+            self.assertEqual(request.call_args[1]["data"], b"{}")
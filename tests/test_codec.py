@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import json
+from unittest import TestCase, skipIf
+
+from powerdns import codec
+from powerdns.interface import RRSet
+
+
+def installed(name):
+    try:
+        codec.get_codec(name)
+    except ImportError:
+        return False
+    return True
+
+
+class TestCodec(TestCase):
+
+    data = {"rrsets": [RRSet("a.test.", "A", ["1.2.3.4"])], "name": "é."}
+
+    def check_codec(self, name):
+        json_codec = codec.get_codec(name)
+        self.assertEqual(json_codec.name, name)
+        encoded = json_codec.encode(self.data)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(json_codec.decode(encoded), self.data)
+
+    def test_json(self):
+        self.check_codec("json")
+
+    @skipIf(not installed("orjson"), "orjson is not installed")
+    def test_orjson(self):
+        self.check_codec("orjson")
+
+    @skipIf(not installed("ujson"), "ujson is not installed")
+    def test_ujson(self):
+        self.check_codec("ujson")
+
+    def test_get_codec(self):
+        self.assertIn(codec.get_codec().name, codec.CODECS)
+        instance = codec.JSONCodec()
+        self.assertIs(codec.get_codec(instance), instance)
+        with self.assertRaises(ValueError):
+            codec.get_codec("yaml")
+
+
+class TestIterJsonItems(TestCase):
+
+    document = {"account": "", "comments": [{"a": [1, 2.5]}],
+                "rrsets": [{"name": "%d.test." % i, "ttl": i * 3600,
+                            "records": [{"content": "é"}]}
+                           for i in range(50)],
+                "serial": 2018010100}
+
+    def items(self, content, size, key="rrsets"):
+        chunks = [content[i:i + size] for i in range(0, len(content), size)]
+        return list(codec.iter_json_items(chunks, key))
+
+    def test_iter_items(self):
+        content = json.dumps(self.document, ensure_ascii=False).encode()
+        for size in (1, 2, 7, 64, len(content)):
+            self.assertEqual(self.items(content, size),
+                             self.document["rrsets"])
+
+    def test_iter_items_missing(self):
+        self.assertEqual(self.items(b'{"serial": 1}', 3), [])
+        self.assertEqual(self.items(b' { } ', 3), [])
+        self.assertEqual(self.items(b'{"rrsets": [ ]}', 3), [])
+
+    def test_iter_items_invalid(self):
+        for content in (b'[]', b'{"rrsets": [1, 2', b'{"rrsets": [1 2]}'):
+            with self.assertRaises(ValueError):
+                self.items(content, 4)
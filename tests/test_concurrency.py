@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+from powerdns.client import PDNSApiClient
+from powerdns.interface import PDNSEndpoint
+
+from . import PDNS_API, PDNS_KEY
+from .test_client import fake_response
+
+
+WORKERS = 32
+
+SERVERS = [{"id": "localhost", "version": "4.4.1",
+            "daemon_type": "authoritative"}]
+ZONES = [{"name": "zone%d.test." % idx} for idx in range(10)]
+DETAILS = {"name": "zone0.test.", "rrsets": []}
+
+
+def slow_api(method, url, **kwargs):
+    """Fake API answering slowly to widen race windows"""
+    time.sleep(0.05)
+    if url.endswith("/servers"):
+        data = SERVERS
+    elif url.endswith("/zones"):
+        data = ZONES
+    else:
+        data = DETAILS
+    return fake_response(200, data)
+
+
+class TestConcurrency(TestCase):
+
+    def setUp(self):
+        self.client = PDNSApiClient(PDNS_API, PDNS_KEY, pool_maxsize=WORKERS)
+        patcher = mock.patch.object(self.client.session, "request",
+                                    side_effect=slow_api)
+        self.request = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def urls(self):
+        return [call[0][1] for call in self.request.call_args_list]
+
+    def test_shared_tree_single_fill(self):
+        api = PDNSEndpoint(self.client)
+
+        def worker(_):
+            zone = api.servers[0].get_zone("zone0.test.")
+            return zone.details
+
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            results = list(pool.map(worker, range(WORKERS * 4)))
+
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(sorted(self.urls()), [
+            PDNS_API + "/servers",
+            PDNS_API + "/servers/localhost/zones",
+            PDNS_API + "/servers/localhost/zones/zone0.test.",
+        ])
+
+    def test_headers_built_per_request(self):
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            list(pool.map(lambda _: self.client.get("/servers"),
+                          range(WORKERS)))
+
+        headers = [call[1]["headers"] for call in self.request.call_args_list]
+        self.assertEqual(len(set(id(header) for header in headers)), WORKERS)
+        self.assertTrue(all(header["X-API-Key"] == PDNS_KEY
+                            for header in headers))
+        self.assertNotIn("X-API-Key", self.client.request_headers)
+
+    def test_read_during_write(self):
+        zone = PDNSEndpoint(self.client).servers[0].get_zone("zone0.test.")
+
+        def api(method, url, **kwargs):
+            if method == "PATCH":
+                # details read concurrently, before the write is applied
+                zone.details
+                return fake_response(204)
+            return slow_api(method, url, **kwargs)
+
+        self.request.side_effect = api
+        zone.create_records([])
+        self.assertIsNone(zone._details)
+        zone.details
+        zone.delete_records([])
+        self.assertIsNone(zone._details)
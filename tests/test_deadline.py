@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import asyncio
+import time
+from unittest import TestCase, mock
+
+import requests
+
+from powerdns.breaker import CircuitBreaker
+from powerdns.client import PDNSApiClient
+from powerdns.deadline import Deadline, current_deadline
+from powerdns.exceptions import PDNSDeadlineError, PDNSError
+from powerdns.fakeserver import FakePDNSServer
+from powerdns.interface import PDNSEndpoint, RRSet
+from powerdns.retry import RetryPolicy
+
+from . import PDNS_API, PDNS_KEY
+from .test_client import fake_response
+
+
+class TestDeadline(TestCase):
+
+    def test_clip(self):
+        deadline = Deadline(2)
+        connect, read = deadline.clip((1, 10))
+        self.assertEqual(connect, 1)
+        self.assertTrue(1.9 < read <= 2)
+        self.assertTrue(all(1.9 < value <= 2 for value in deadline.clip()))
+        self.assertFalse(deadline.expired())
+        self.assertTrue(Deadline(0).expired())
+
+    def test_nesting(self):
+        outer = Deadline(1)
+        with outer:
+            with Deadline(10):
+                self.assertIs(current_deadline(), outer)
+            inner = Deadline(0.5)
+            with inner:
+                self.assertIs(current_deadline(), inner)
+            self.assertIs(current_deadline(), outer)
+        self.assertIsNone(current_deadline())
+
+    def test_concurrent_tasks(self):
+        deadline = Deadline(10)
+
+        async def task(inner):
+            with deadline:
+                await asyncio.sleep(0.01)
+                with inner:
+                    await asyncio.sleep(0.01)
+                    return current_deadline()
+
+        async def main():
+            return await asyncio.gather(task(Deadline(1)), task(Deadline(20)))
+
+        inner, outer = asyncio.run(main())
+        self.assertEqual(inner.timeout, 1)
+        self.assertIs(outer, deadline)
+        self.assertIsNone(current_deadline())
+
+    def test_client_timeouts(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, timeout=10,
+                               connect_timeout=1)
+        with mock.patch.object(client.session, "request",
+                               return_value=fake_response()) as request:
+            client.get("/servers")
+            self.assertEqual(request.call_args[1]["timeout"], (1, 10))
+            with Deadline(5):
+                client.get("/servers")
+            connect, read = request.call_args[1]["timeout"]
+            self.assertEqual(connect, 1)
+            self.assertTrue(4.9 < read <= 5)
+            with self.assertRaises(PDNSDeadlineError) as context:
+                client.get("/servers", deadline=Deadline(0))
+            self.assertEqual(context.exception.status_code, 0)
+        self.assertEqual(request.call_count, 2)
+
+
+class TestDeadlineOperations(TestCase):
+
+    def setUp(self):
+        self.server = FakePDNSServer(api_key="secret").start()
+        self.addCleanup(self.server.stop)
+        self.server.add_zone("fake.test.")
+        self.client = PDNSApiClient(self.server.url, "secret")
+        self.addCleanup(self.client.close)
+        self.api = PDNSEndpoint(self.client)
+
+    def test_remaining_budget(self):
+        self.server.latency = 0.2
+        start = time.monotonic()
+        with self.assertRaises(PDNSDeadlineError) as context:
+            with Deadline(0.3):
+                self.api.servers[0].get_zone("fake.test.")
+        self.assertLess(time.monotonic() - start, 0.45)
+        self.assertIsInstance(context.exception.__cause__,
+                              requests.exceptions.Timeout)
+
+    def test_connect_timeout_by_deadline(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        client = PDNSApiClient([self.server.url,
+                                self.server.url.replace("127.0.0.1",
+                                                        "localhost")],
+                               "secret", circuit_breaker=breaker)
+        self.addCleanup(client.close)
+
+        def connect(*args, **kwargs):
+            time.sleep(kwargs["timeout"][0])
+            raise requests.exceptions.ConnectTimeout("connect timed out")
+
+        with mock.patch.object(client.session, "request",
+                               side_effect=connect) as request:
+            with self.assertRaises(PDNSDeadlineError):
+                client.get("/servers", deadline=Deadline(0.1))
+        # no failover, healthy endpoint and closed circuit
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(client._endpoints._down_until, {})
+        self.assertEqual(breaker.state, breaker.CLOSED)
+        self.assertEqual(client.get("/servers")[0]["id"], "localhost")
+
+    def test_probe_stopped_by_deadline(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        client = PDNSApiClient(self.server.url, "secret",
+                               circuit_breaker=breaker)
+        self.addCleanup(client.close)
+        with mock.patch.object(client, "_send_limited",
+                               side_effect=PDNSDeadlineError("url", 1)):
+            with self.assertRaises(PDNSDeadlineError):
+                client.get("/servers")
+        self.assertEqual(breaker.state, breaker.HALF_OPEN)
+        self.assertEqual(client.get("/servers")[0]["id"], "localhost")
+        self.assertEqual(breaker.state, breaker.CLOSED)
+
+    def test_operation_deadline(self):
+        zone = self.api.servers[0].get_zone("fake.test.")
+        with self.assertRaises(PDNSDeadlineError):
+            zone.create_records([RRSet("a", "A", ["10.0.0.1"])],
+                                deadline=Deadline(0))
+        zone.create_records([RRSet("a", "A", ["10.0.0.1"])],
+                            deadline=Deadline(5))
+        self.assertEqual(len(zone.get_record("a.fake.test.",
+                                             deadline=Deadline(5))), 1)
+
+    def test_no_retry_past_deadline(self):
+        client = PDNSApiClient(self.server.url, "secret",
+                               retry=RetryPolicy(max_attempts=5,
+                                                 backoff_factor=1,
+                                                 jitter=False))
+        self.server.inject_errors(5)
+        start = time.monotonic()
+        with self.assertRaises(PDNSError) as context:
+            client.get("/servers", deadline=Deadline(1.5))
+        self.assertEqual(context.exception.status_code, 503)
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual(self.server.requests, 2)
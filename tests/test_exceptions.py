@@ -38,3 +38,12 @@ class TestExceptions(TestCase):
         self.assertEqual(str(exc), "fake-name.tld")
         self.assertEqual(exc.name, "fake-name.tld")
         self.assertEqual(exc.message, "'fake-name.tld' is not canonical")
+
+    def test_exception_pdns_circuit_open_error(self):
+        self.assertTrue(issubclass(exceptions.PDNSCircuitOpenError,
+                                   exceptions.PDNSError))
+        exc = exceptions.PDNSCircuitOpenError("/fake-url")
+        self.assertEqual(exc.status_code, 0)
+        self.assertEqual(repr(exc), 'PDNSCircuitOpenError("/fake-url", '
+                                    '"circuit breaker is open")')
+        self.assertEqual(str(exc), 'code=0 /fake-url: circuit breaker is open')
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import time
+from unittest import TestCase
+
+from powerdns.client import PDNSApiClient
+from powerdns.exceptions import PDNSError
+from powerdns.fakeserver import FakePDNSServer
+from powerdns.interface import PDNSEndpoint, RRSet, Comment
+from powerdns.retry import RetryPolicy
+
+
+ZONE = "servers/localhost/zones/fake.test."
+
+
+class TestFakeServer(TestCase):
+
+    def setUp(self):
+        self.server = FakePDNSServer(api_key="secret", seed=1).start()
+        self.addCleanup(self.server.stop)
+        self.client = PDNSApiClient(self.server.url, "secret")
+        self.addCleanup(self.client.close)
+        self.api = PDNSEndpoint(self.client)
+
+    def test_zones(self):
+        server = self.api.servers[0]
+        zone = server.create_zone("fake.test.", "Native", ["ns1.fake.test."])
+        self.assertEqual(zone.name, "fake.test.")
+        with self.assertRaises(PDNSError) as context:
+            server.create_zone("fake.test.", "Native", [])
+        self.assertEqual(context.exception.status_code, 409)
+        self.assertEqual(server.get_zone("fake.test.").details["kind"],
+                         "Native")
+        self.assertEqual(sorted(rrset["type"] for rrset in zone.records),
+                         ["NS", "SOA"])
+        self.assertEqual(zone.notify(), {"result": "Notification queued"})
+        server.delete_zone("fake.test.")
+        self.assertIsNone(server.get_zone("fake.test."))
+        with self.assertRaises(PDNSError) as context:
+            self.client.get(ZONE)
+        self.assertEqual(context.exception.status_code, 404)
+
+    def test_records(self):
+        self.server.add_zone("fake.test.")
+        zone = self.api.servers[0].get_zone("fake.test.")
+        zone.create_records([
+            RRSet("a", "A", ["10.0.0.1"], comments=[Comment("web", "me")]),
+            RRSet("b", "A", ["10.0.0.2"]),
+        ])
+        self.assertEqual(zone.get_record("a.fake.test.")[0]["records"],
+                         [{"content": "10.0.0.1", "disabled": False}])
+        zone.create_records([RRSet("a", "A", ["10.0.0.3"])])
+        zone.delete_records([RRSet("b", "A", [])])
+        self.assertEqual(zone.get_record("a.fake.test.")[0]["records"],
+                         [{"content": "10.0.0.3", "disabled": False}])
+        self.assertEqual(zone.get_record("b.fake.test."), [])
+        self.assertEqual(zone.details["serial"], 4)
+        with self.assertRaises(PDNSError) as context:
+            zone.create_records([RRSet("a.other.test.", "A", ["10.0.0.4"])])
+        self.assertEqual(context.exception.status_code, 422)
+
+    def test_search(self):
+        self.server.populate(zones=3, records=5)
+        results = self.api.servers[0].search("host-1.zone-*")
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["object_type"], "record")
+        self.assertEqual(len(self.api.servers[0].search("*", 4)), 4)
+
+    def test_auth(self):
+        client = PDNSApiClient(self.server.url, "wrong")
+        with self.assertRaises(PDNSError) as context:
+            client.get("/servers")
+        self.assertEqual(context.exception.status_code, 401)
+
+    def test_errors_injection(self):
+        self.server.inject_errors(2)
+        client = PDNSApiClient(self.server.url, "secret",
+                               retry=RetryPolicy(max_attempts=3,
+                                                 backoff_factor=0))
+        self.assertEqual(client.get("/servers")[0]["id"], "localhost")
+        self.assertEqual(self.server.requests, 3)
+        self.server.error_rate = 1.0
+        with self.assertRaises(PDNSError) as context:
+            self.client.get("/servers")
+        self.assertEqual(context.exception.status_code, 503)
+
+    def test_latency(self):
+        self.server.latency = 0.05
+        start = time.monotonic()
+        self.client.get("/servers")
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import logging
+from unittest import TestCase, mock
+
+from powerdns.client import PDNSApiClient
+from powerdns.logs import Names, Payload, redact_headers
+
+from . import PDNS_API, PDNS_KEY
+from .test_client import fake_response
+
+
+class TestLogs(TestCase):
+
+    def test_redact_headers(self):
+        headers = {"X-API-Key": PDNS_KEY, "Accept": "application/json"}
+        self.assertEqual(redact_headers(headers),
+                         {"X-API-Key": "***", "Accept": "application/json"})
+        self.assertEqual(headers["X-API-Key"], PDNS_KEY)
+
+    def test_payload(self):
+        self.assertEqual(str(Payload(b"abc")), "abc")
+        self.assertEqual(str(Payload(b"a" * 10, size=4)),
+                         "aaaa... (10 bytes)")
+        self.assertEqual(str(Payload("é" * 10, size=2)), "éé... (10 bytes)")
+        self.assertEqual(str(Payload({"a": 1})), "{'a': 1}")
+        self.assertEqual(str(Payload(iter([]))), "<list_iterator>")
+
+    def test_names(self):
+        self.assertEqual(str(Names(["a.", "b."])), "[a., b.]")
+
+    def test_client_logs(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, log_payload_size=8)
+        response = fake_response(200, {"name": "x" * 100})
+        with mock.patch.object(client.session, "request",
+                               return_value=response):
+            with self.assertLogs("powerdns.client", logging.DEBUG) as logs:
+                client.get("/servers")
+        output = "\n".join(logs.output)
+        self.assertNotIn(PDNS_KEY, output)
+        self.assertIn("'X-API-Key': '***'", output)
+        self.assertIn('response: {"name":... (', output)
+
+    def test_client_no_payload_at_info(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY)
+        with mock.patch("powerdns.client.Payload") as payload, \
+                mock.patch.object(client.session, "request",
+                                  return_value=fake_response(200, {})):
+            with self.assertLogs("powerdns.client", logging.INFO):
+                client.get("/servers")
+        payload.assert_not_called()
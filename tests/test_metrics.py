@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+from unittest import TestCase, mock
+
+import requests
+
+from powerdns.client import PDNSApiClient
+from powerdns.metrics import ClientMetrics, RequestEvent, path_template
+
+from . import PDNS_API, PDNS_KEY
+from .test_client import fake_response
+
+
+class TestMetrics(TestCase):
+
+    def test_path_template(self):
+        self.assertEqual(path_template("servers"), "/servers")
+        self.assertEqual(
+            path_template("/servers/localhost/zones/test./notify"),
+            "/servers/{server_id}/zones/{zone_id}/notify")
+        self.assertEqual(
+            path_template(PDNS_API + "/servers/localhost/search-data?q=a"),
+            "/servers/{server_id}/search-data")
+
+    def test_render(self):
+        metrics = ClientMetrics(buckets=(0.1, 1))
+        for duration, status in ((0.05, 200), (0.5, 200), (5, None)):
+            event = RequestEvent("GET", "/servers/localhost/zones")
+            event.duration = duration
+            event.status_code = status
+            event.request_bytes = 2
+            event.response_bytes = 10
+            metrics.observe(event)
+        output = metrics.render()
+        labels = 'method="GET",path="/servers/{server_id}/zones"'
+        self.assertIn('powerdns_client_requests_total{%s,status="200"} 2'
+                      % labels, output)
+        self.assertIn('powerdns_client_requests_total{%s,status="error"} 1'
+                      % labels, output)
+        self.assertIn('powerdns_client_request_duration_seconds_bucket'
+                      '{%s,le="0.1"} 1' % labels, output)
+        self.assertIn('powerdns_client_request_duration_seconds_bucket'
+                      '{%s,le="+Inf"} 3' % labels, output)
+        self.assertIn('powerdns_client_request_duration_seconds_count'
+                      '{%s} 3' % labels, output)
+        self.assertIn('powerdns_client_received_bytes_total{%s} 30'
+                      % labels, output)
+        metrics.reset()
+        self.assertNotIn(labels, metrics.render())
+
+    def test_client_hooks(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY)
+        metrics = ClientMetrics()
+        metrics.register(client)
+        before = mock.Mock(side_effect=RuntimeError("ignored"))
+        client.add_hook("before_request", before)
+        with mock.patch.object(client.session, "request") as request:
+            request.return_value = fake_response(200, [])
+            client.get("/servers/localhost/zones")
+            request.side_effect = requests.exceptions.ConnectionError()
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                client.get("/servers")
+        event = before.call_args[0][0]
+        self.assertIsInstance(event.error, requests.exceptions.ConnectionError)
+        self.assertEqual(before.call_count, 2)
+        output = metrics.render()
+        self.assertIn('path="/servers/{server_id}/zones",status="200"} 1',
+                      output)
+        self.assertIn('path="/servers",status="error"} 1', output)
+        client.remove_hook("before_request", before)
+        with self.assertRaises(ValueError):
+            client.add_hook("on_error", before)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import multiprocessing
+import os
+import pickle
+import signal
+import threading
+import time
+from unittest import TestCase, skipUnless
+
+from powerdns import (CircuitBreaker, RateLimiter, ResponseCache,
+                      RetryBudget, RetryPolicy)
+from powerdns.client import PDNSApiClient
+from powerdns.codec import JSONCodec
+from powerdns.fakeserver import FakePDNSServer
+from powerdns.interface import PDNSEndpoint
+
+
+class CustomCodec(object):
+    """Codec defined by users"""
+    name = "mine"
+
+    @staticmethod
+    def encode(data):
+        return JSONCodec.encode(data)
+
+    @staticmethod
+    def decode(content):
+        return JSONCodec.decode(content)
+
+
+class SubclassCodec(JSONCodec):
+    """Subclass of a built-in codec"""
+
+
+def count_records(zone):
+    """Count records of a zone, in a worker process"""
+    return zone.name, len(zone.records)
+
+
+def get_servers(api_client):
+    """List servers, in a worker process"""
+    return [server["id"] for server in api_client.get("/servers")]
+
+
+class TestPickle(TestCase):
+
+    def setUp(self):
+        self.server = FakePDNSServer(api_key="secret").start()
+        self.addCleanup(self.server.stop)
+        self.server.populate(zones=4, records=2, suffix="mp.test.")
+        self.client = PDNSApiClient(
+            self.server.url, "secret", coalesce=True, cache=ResponseCache(),
+            retry=RetryPolicy(budget=RetryBudget()),
+            rate_limiter=RateLimiter(read_rate=1000, read_concurrency=4),
+            circuit_breaker=CircuitBreaker()
+        )
+        self.addCleanup(self.client.close)
+        self.api = PDNSEndpoint(self.client)
+
+    def test_client(self):
+        self.client.get("/servers")
+        self.client.add_hook("after_request", lambda event: None)
+        client = pickle.loads(pickle.dumps(self.client))
+        self.assertEqual(repr(client), repr(self.client))
+        self.assertIsNone(client.transport._session)
+        self.assertEqual(client.hooks["after_request"], [])
+        self.assertEqual(get_servers(client), ["localhost"])
+        client.close()
+
+    def test_codecs(self):
+        for codec in ("json", CustomCodec(), SubclassCodec()):
+            client = PDNSApiClient(self.server.url, "secret", codec=codec)
+            copy = pickle.loads(pickle.dumps(client))
+            self.assertIs(type(copy._codec), type(client._codec))
+            self.assertEqual(get_servers(copy), ["localhost"])
+            copy.close()
+            client.close()
+
+    def test_zone_cached_data(self):
+        zone = self.api.servers[0].zones[1]
+        records = zone.records
+        requests = self.server.requests
+        copy = pickle.loads(pickle.dumps(zone))
+        self.assertEqual(copy.records, records)
+        self.assertEqual(self.server.requests, requests)
+        self.assertIsNone(copy.server._zones)
+        self.assertEqual(copy.server.get_zone(zone.name).name, zone.name)
+        copy.api_client.close()
+
+    def test_endpoint_tree(self):
+        zones = self.api.servers[0].zones
+        api = pickle.loads(pickle.dumps(self.api))
+        self.assertEqual([zone.name for zone in api.servers[0].zones],
+                         [zone.name for zone in zones])
+        self.assertIs(api.servers[0].zones[0].api_client, api.api_client)
+
+
+@skipUnless(hasattr(os, "fork"), "fork is not available")
+class TestFork(TestCase):
+
+    def setUp(self):
+        self.server = FakePDNSServer(api_key="secret").start()
+        self.addCleanup(self.server.stop)
+        self.server.populate(zones=4, records=2, suffix="mp.test.")
+
+    def test_fork_resets_pool(self):
+        for transport in ("requests", "urllib3"):
+            client = PDNSApiClient(self.server.url, "secret",
+                                   transport=transport)
+            self.addCleanup(client.close)
+            client.get("/servers")
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    pool = getattr(client.transport,
+                                   client.transport._pool_attribute)
+                    if pool is None and \
+                            get_servers(client) == ["localhost"]:
+                        status = 0
+                finally:
+                    os._exit(status)
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(status, 0)
+            # parent connections remain usable
+            self.assertEqual(get_servers(client), ["localhost"])
+
+    def test_fork_during_request(self):
+        client = PDNSApiClient(
+            self.server.url, "secret", coalesce=True, cache=ResponseCache(),
+            retry=RetryPolicy(budget=RetryBudget()),
+            rate_limiter=RateLimiter(read_rate=1000, read_concurrency=1),
+            circuit_breaker=CircuitBreaker()
+        )
+        self.addCleanup(client.close)
+        zone = PDNSEndpoint(client).servers[0].zones[0]
+        self.server.latency = 0.5
+        thread = threading.Thread(target=lambda: zone.details)
+        thread.start()
+        time.sleep(0.2)
+        # locks, request slot and coalesced call are held by the thread
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                signal.alarm(10)
+                if zone.details["name"] == zone.name:
+                    status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        thread.join()
+        self.assertEqual(status, 0)
+
+    def test_pool_map_zones(self):
+        api = PDNSEndpoint(PDNSApiClient(self.server.url, "secret"))
+        zones = api.servers[0].zones
+        context = multiprocessing.get_context("fork")
+        with context.Pool(2) as pool:
+            counts = dict(pool.map(count_records, zones))
+        self.assertEqual(counts, dict((zone.name, len(zone.records))
+                                      for zone in zones))
+        api.api_client.close()
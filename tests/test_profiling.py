@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import os
+import pstats
+import tempfile
+from unittest import TestCase, mock
+
+from powerdns import profiling
+from powerdns.client import PDNSApiClient
+
+from . import PDNS_API, PDNS_KEY
+from .test_client import fake_response
+
+
+class TestProfiler(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, "report.txt")
+
+    def run_client(self, profiler):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY)
+        profiler.attach(client)
+        with mock.patch.object(client.session, "request",
+                               return_value=fake_response(200, [])):
+            with profiler:
+                client.get("/servers/localhost/zones/a.test.")
+                client.get("/servers/localhost/zones/b.test.")
+                data = [bytearray(1024 * 1024)]
+                del data
+                client.patch("/servers/localhost/zones/a.test.", data={})
+
+    def test_report(self):
+        profiler = profiling.Profiler(self.output)
+        self.run_client(profiler)
+        stats = profiler.calls[("GET", "/servers/{server_id}/zones/{zone_id}")]
+        self.assertEqual(stats[0], 2)
+        self.assertEqual(len(profiler.calls), 2)
+        self.assertGreaterEqual(profiler.peak_memory, 1024 * 1024)
+        report = profiler.report()
+        self.assertIn("api calls: 3", report)
+        self.assertIn("PATCH   /servers/{server_id}/zones/{zone_id}", report)
+        self.assertIn("function calls", report)
+
+        profiler.write()
+        with open(self.output) as report_fp:
+            self.assertIn("peak memory", report_fp.read())
+        self.assertTrue(pstats.Stats(self.output + ".prof").total_calls)
+
+    def test_without_memory(self):
+        profiler = profiling.Profiler(self.output, memory=False)
+        self.run_client(profiler)
+        self.assertIsNone(profiler.peak_memory)
+        self.assertNotIn("peak memory", profiler.report())
+
+    @mock.patch("atexit.register")
+    def test_start_profiling(self, register):
+        with mock.patch.dict(os.environ, {profiling.PROFILE_ENV: ""}):
+            self.assertIsNone(profiling.start_profiling())
+        with mock.patch.dict(os.environ, {profiling.PROFILE_ENV: "1"}):
+            profiler = profiling.start_profiling()
+        self.assertEqual(profiler.output, "-")
+        with mock.patch("sys.stderr") as stderr:
+            register.call_args[0][0]()
+        self.assertIn("profiling report", stderr.write.call_args[0][0])
+        profiler = profiling.start_profiling(self.output)
+        register.call_args[0][0]()
+        self.assertTrue(os.path.exists(self.output))
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+from powerdns.client import PDNSApiClient
+from powerdns.deadline import Deadline
+from powerdns.exceptions import PDNSDeadlineError
+from powerdns.ratelimit import RateLimiter, TokenBucket
+
+from . import PDNS_API, PDNS_KEY
+from .test_client import fake_response
+
+
+class TestTokenBucket(TestCase):
+
+    def test_reserve(self):
+        bucket = TokenBucket(10, burst=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+
+    def test_reserve_timeout(self):
+        bucket = TokenBucket(10, burst=1)
+        self.assertEqual(bucket.reserve(0), 0)
+        self.assertIsNone(bucket.reserve(0.05))
+        self.assertAlmostEqual(bucket.reserve(0.2), 0.1, places=2)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+
+
+class TestRateLimiter(TestCase):
+
+    def test_kind(self):
+        self.assertEqual(RateLimiter.kind("get"), "read")
+        self.assertEqual(RateLimiter.kind("PATCH"), "write")
+
+    def test_rate(self):
+        limiter = RateLimiter(read_rate=50, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            with limiter.limit("GET"):
+                pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        start = time.monotonic()
+        for _ in range(6):
+            with limiter.limit("PATCH"):
+                pass
+        self.assertLess(time.monotonic() - start, 0.05)
+
+    def test_client_concurrency(self):
+        limiter = RateLimiter(read_concurrency=3, write_concurrency=1)
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, pool_maxsize=16,
+                               rate_limiter=limiter)
+        lock = threading.Lock()
+        in_flight = {"GET": 0, "PATCH": 0}
+        peaks = {"GET": 0, "PATCH": 0}
+
+        def slow_api(method, url, **kwargs):
+            with lock:
+                in_flight[method] += 1
+                peaks[method] = max(peaks[method], in_flight[method])
+            time.sleep(0.02)
+            with lock:
+                in_flight[method] -= 1
+            return fake_response(200, {})
+
+        with mock.patch.object(client.session, "request",
+                               side_effect=slow_api):
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                list(pool.map(lambda idx: client.get("/servers") if idx % 2
+                              else client.patch("/servers", data={}),
+                              range(32)))
+        self.assertEqual(peaks, {"GET": 3, "PATCH": 1})
+
+    def test_deadline(self):
+        limiter = RateLimiter(read_rate=1, burst=1, write_concurrency=1)
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, rate_limiter=limiter)
+        with mock.patch.object(client.session, "request") as request:
+            request.return_value = fake_response(200, {})
+            client.get("/servers")
+            start = time.monotonic()
+            with self.assertRaises(PDNSDeadlineError):
+                client.get("/servers", deadline=Deadline(0.2))
+            with limiter.limit("PATCH"):
+                with self.assertRaises(PDNSDeadlineError):
+                    client.patch("/servers", data={},
+                                 deadline=Deadline(0.1))
+            self.assertLess(time.monotonic() - start, 0.2)
+        self.assertEqual(request.call_count, 1)
+
+    def test_timeout_clipped_after_wait(self):
+        limiter = RateLimiter(read_rate=4, burst=1)
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, timeout=10,
+                               rate_limiter=limiter)
+        with mock.patch.object(client.session, "request") as request:
+            request.return_value = fake_response(200, {})
+            client.get("/servers")
+            client.get("/servers", deadline=Deadline(0.5))
+        connect, read = request.call_args[1]["timeout"]
+        self.assertLessEqual(max(connect, read), 0.26)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import io
+from unittest import TestCase, mock
+
+import requests
+
+from powerdns.client import PDNSApiClient
+from powerdns.exceptions import PDNSError
+from powerdns.fakeserver import FakePDNSServer
+from powerdns.retry import RetryBudget, RetryPolicy
+
+from . import PDNS_API, PDNS_KEY
+from .test_client import fake_response
+
+
+class TestRetryPolicy(TestCase):
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff_factor=1, backoff_max=5, jitter=False)
+        self.assertEqual([policy.get_delay(n) for n in range(1, 5)],
+                         [1, 2, 4, 5])
+        policy.jitter = True
+        for attempt in range(1, 10):
+            self.assertTrue(0 <= policy.get_delay(attempt) <= 5)
+
+    def test_retry_after(self):
+        policy = RetryPolicy(backoff_max=10)
+        response = fake_response(503)
+        response.headers = {"Retry-After": "3"}
+        self.assertEqual(policy.get_delay(1, response), 3)
+        response.headers = {"Retry-After": "120"}
+        self.assertEqual(policy.get_delay(1, response), 10)
+        self.assertEqual(policy.parse_retry_after(
+            "Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+        self.assertIsNone(policy.parse_retry_after("soon"))
+
+    def test_retryable(self):
+        policy = RetryPolicy(max_attempts=3)
+        error = requests.exceptions.ConnectionError()
+        self.assertTrue(policy.is_retryable("GET", 1, error=error))
+        self.assertFalse(policy.is_retryable("GET", 3, error=error))
+        self.assertFalse(policy.is_retryable("POST", 1, error=error))
+        self.assertFalse(policy.is_retryable("GET", 1, error=ValueError()))
+        self.assertTrue(policy.is_retryable("GET", 1,
+                                            response=fake_response(502)))
+        self.assertFalse(policy.is_retryable("GET", 1,
+                                             response=fake_response(500)))
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, min_retries=1)
+        for _ in range(4):
+            budget.record_request()
+        self.assertEqual([budget.withdraw() for _ in range(4)],
+                         [True, True, True, False])
+
+
+@mock.patch("time.sleep")
+class TestClientRetry(TestCase):
+
+    def client(self, **kwargs):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY,
+                               retry=RetryPolicy(**kwargs))
+        patcher = mock.patch.object(client.session, "request")
+        self.addCleanup(patcher.stop)
+        return client, patcher.start()
+
+    def test_retry_transient_errors(self, sleep):
+        client, request = self.client(max_attempts=4)
+        request.side_effect = [requests.exceptions.ConnectionError(),
+                               fake_response(503),
+                               fake_response(200, [])]
+        self.assertEqual(client.get("/servers"), [])
+        self.assertEqual(request.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_retry_exhausted(self, sleep):
+        client, request = self.client(max_attempts=2)
+        request.return_value = fake_response(502, {"error": "Bad gateway"})
+        with self.assertRaises(PDNSError) as context:
+            client.get("/servers")
+        self.assertEqual(context.exception.status_code, 502)
+        self.assertEqual(request.call_count, 2)
+
+    def test_no_retry_non_idempotent(self, sleep):
+        client, request = self.client()
+        request.side_effect = requests.exceptions.ConnectionError()
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.post("/servers/localhost/zones", data={})
+        self.assertEqual(request.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_file_body_rewound(self, sleep):
+        with FakePDNSServer(api_key="secret") as server:
+            server.add_zone("fake.test.")
+            client = PDNSApiClient(server.url, "secret", retry=RetryPolicy())
+            server.inject_errors(1)
+            body = io.BytesIO(b'{"rrsets": [{"name": "a.fake.test.", '
+                              b'"type": "A", "ttl": 60, '
+                              b'"changetype": "REPLACE", "records": '
+                              b'[{"content": "10.0.0.1"}]}]}')
+            client.put("servers/localhost/zones/fake.test.", data=body)
+            zone = client.get("servers/localhost/zones/fake.test.")
+            client.close()
+        self.assertEqual(sleep.call_count, 1)
+        self.assertIn("a.fake.test.",
+                      [rrset["name"] for rrset in zone["rrsets"]])
+
+    def test_no_retry_unseekable_body(self, sleep):
+        client, request = self.client()
+        request.return_value = fake_response(503)
+        body = mock.Mock(spec=["read"])
+        with self.assertRaises(PDNSError):
+            client.put("/servers/localhost/zones/test.", data=body)
+        self.assertEqual(request.call_count, 1)
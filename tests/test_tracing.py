@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+from contextlib import contextmanager
+from unittest import TestCase, mock
+
+from powerdns import tracing
+from powerdns.client import PDNSApiClient
+from powerdns.interface import PDNSEndpoint
+
+from . import PDNS_API, PDNS_KEY
+from .test_client import fake_response, stream_response
+
+
+class FakeSpan(object):
+
+    def __init__(self, name, parent, attributes):
+        self.name = name
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.ended = False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exception):
+        self.attributes["exception"] = exception
+
+    def end(self):
+        self.ended = True
+
+
+class FakeTracer(object):
+    """OpenTelemetry like tracer keeping spans in memory"""
+
+    def __init__(self):
+        self.spans = []
+        self.stack = []
+
+    def start_span(self, name, attributes=None):
+        span = FakeSpan(name, self.stack[-1] if self.stack else None,
+                        attributes)
+        self.spans.append(span)
+        return span
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None):
+        span = self.start_span(name, attributes)
+        self.stack.append(span)
+        try:
+            yield span
+        finally:
+            self.stack.pop()
+            span.end()
+
+
+def fake_api(method, url, **kwargs):
+    if url.endswith("/servers"):
+        data = [{"id": "localhost", "version": "4",
+                 "daemon_type": "authoritative"}]
+    elif url.endswith("/zones"):
+        data = [{"name": "test.outini.net."}]
+    else:
+        data = {"id": "test.outini.net.", "name": "test.outini.net."}
+    return fake_response(200, data)
+
+
+class TestTracing(TestCase):
+
+    def setUp(self):
+        self.tracer = FakeTracer()
+        tracing.set_tracer(self.tracer)
+        self.addCleanup(tracing.set_tracer, None)
+        self.client = PDNSApiClient(PDNS_API, PDNS_KEY)
+        patcher = mock.patch.object(self.client.session, "request",
+                                    side_effect=fake_api)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_disabled(self):
+        tracing.set_tracer(None)
+        self.assertIs(tracing.request_span("GET", "/servers"),
+                      tracing.NOOP_SPAN)
+        with tracing.span("noop") as span:
+            span.set_attribute("key", "value")
+        PDNSEndpoint(self.client).servers
+        self.assertEqual(self.tracer.spans, [])
+
+    def test_create_zone_spans(self):
+        server = PDNSEndpoint(self.client).servers[0]
+        self.tracer.spans.clear()
+        server.create_zone("test.outini.net.", "Native", [], update=True)
+
+        names = [span.name for span in self.tracer.spans]
+        self.assertEqual(names, [
+            "PDNSServer.create_zone",
+            "PDNSServer.get_zone",
+            "PDNSServer.zones",
+            "PDNS GET /servers/{server_id}/zones",
+            "PDNSZone.details",
+            "PDNS GET /servers/{server_id}/zones/{zone_id}",
+            "PDNS PATCH /servers/{server_id}/zones/{zone_id}",
+        ])
+        root = self.tracer.spans[0]
+        self.assertIsNone(root.parent)
+        self.assertEqual(root.attributes["pdns.object"], "localhost")
+        patch = self.tracer.spans[-1]
+        self.assertIs(patch.parent, root)
+        self.assertEqual(patch.attributes["http.status_code"], 200)
+        self.assertTrue(all(span.ended for span in self.tracer.spans))
+
+    def test_generator_span(self):
+        zone = PDNSEndpoint(self.client).servers[0].zones[0]
+        zone._details = {"rrsets": [{"name": "a"}, {"name": "b"}]}
+        self.tracer.spans.clear()
+
+        @contextmanager
+        def use_span(span):
+            self.tracer.stack.append(span)
+            try:
+                yield span
+            finally:
+                self.tracer.stack.pop()
+
+        with mock.patch.object(tracing, "_use_span", side_effect=use_span):
+            rrsets = zone.iter_rrsets()
+            self.assertEqual(next(rrsets), {"name": "a"})
+            span = self.tracer.spans[0]
+            self.assertEqual(span.name, "PDNSZone.iter_rrsets")
+            self.assertFalse(span.ended)
+            # not current between items
+            self.assertEqual(self.tracer.stack, [])
+            rrsets.close()
+        self.assertTrue(span.ended)
+        self.assertEqual(self.tracer.stack, [])
+
+    def test_generator_span_requests(self):
+        zone = PDNSEndpoint(self.client).servers[0].zones[0]
+        self.tracer.spans.clear()
+        with mock.patch.object(self.client.session, "request") as request:
+            request.return_value = stream_response(
+                200, b'{"rrsets": [{"name": "a"}]}')
+            self.assertEqual(list(zone.iter_rrsets()), [{"name": "a"}])
+        self.assertEqual([span.name for span in self.tracer.spans], [
+            "PDNSZone.iter_rrsets",
+            "PDNS GET /servers/{server_id}/zones/{zone_id}",
+        ])
+        self.assertTrue(all(span.ended for span in self.tracer.spans))
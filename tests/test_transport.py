@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+import json
+import os
+import tempfile
+from unittest import TestCase, mock, skipIf
+
+import requests
+
+from powerdns import transport as transports
+from powerdns.client import PDNSApiClient
+from powerdns.exceptions import PDNSError
+from powerdns.fakeserver import FakePDNSServer
+from powerdns.interface import PDNSEndpoint, RRSet
+from powerdns.transport import (RecordingTransport, ReplayTransport,
+                                RequestsTransport, build_response)
+
+from . import PDNS_API, PDNS_KEY
+
+
+ZONE = "servers/localhost/zones/test.outini.net."
+SERVERS = [{"id": "localhost", "version": "4",
+            "daemon_type": "authoritative"}]
+
+
+def api_response(method, url, **kwargs):
+    """Answer requests like a tiny PowerDNS API"""
+    if url.endswith("/servers"):
+        content = json.dumps(SERVERS).encode()
+    elif method == "PATCH":
+        return build_response(url, 204, b"")
+    elif url.endswith("/missing."):
+        return build_response(url, 422, b'{"error": "no zone"}')
+    else:
+        content = json.dumps({"name": "test.outini.net.",
+                              "serial": api_response.serial}).encode()
+        api_response.serial += 1
+    return build_response(url, 200, content,
+                          {"Content-Type": "application/json",
+                           "Content-Length": str(len(content))})
+
+
+class TestTransport(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cassette = os.path.join(directory.name, "cassette.json")
+        api_response.serial = 1
+
+    def record(self):
+        transport = RecordingTransport(self.cassette)
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, transport=transport)
+        with mock.patch.object(transport.transport.session, "request",
+                               side_effect=api_response):
+            self.assertEqual(client.get("/servers"), SERVERS)
+            self.assertEqual(client.get(ZONE)["serial"], 1)
+            client.patch(ZONE, data={"rrsets": []})
+            self.assertEqual(client.get(ZONE)["serial"], 2)
+            with self.assertRaises(PDNSError):
+                client.get("servers/localhost/zones/missing.")
+        client.close()
+
+    def test_requests_transport(self):
+        client = PDNSApiClient(PDNS_API, PDNS_KEY, verify=False,
+                               pool_maxsize=3)
+        self.assertIsInstance(client.transport, RequestsTransport)
+        adapter = client.session.get_adapter(PDNS_API)
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertFalse(client.session.verify)
+
+    def test_record(self):
+        self.record()
+        with open(self.cassette) as cassette_fp:
+            exchanges = json.load(cassette_fp)["exchanges"]
+        self.assertEqual(len(exchanges), 5)
+        self.assertEqual(exchanges[2]["method"], "PATCH")
+        self.assertEqual(exchanges[2]["path"], "/api/v1/" + ZONE)
+        self.assertEqual(
+            json.loads(exchanges[2]["request"]["body"]["data"]),
+            {"rrsets": []})
+        self.assertNotIn("Content-Length",
+                         exchanges[0]["response"]["headers"])
+        self.assertNotIn(PDNS_KEY, json.dumps(exchanges))
+
+    def test_replay(self):
+        self.record()
+        client = PDNSApiClient("https://other.tld/api/v1", PDNS_KEY,
+                               transport=ReplayTransport(self.cassette))
+        api = PDNSEndpoint(client)
+        self.assertEqual(api.servers[0].sid, "localhost")
+        self.assertEqual(client.get(ZONE)["serial"], 1)
+        self.assertEqual(client.patch(ZONE, data={"rrsets": []}), "")
+        self.assertEqual(client.get(ZONE)["serial"], 2)
+        self.assertEqual(client.get(ZONE)["serial"], 2)
+        with self.assertRaises(PDNSError) as context:
+            client.get("servers/localhost/zones/missing.")
+        self.assertEqual(context.exception.message, "no zone")
+        with self.assertRaises(LookupError):
+            client.delete(ZONE)
+        client.transport.rewind()
+        self.assertEqual(client.get(ZONE)["serial"], 1)
+
+    def test_replay_params(self):
+        path = "servers/localhost/search-data"
+        with FakePDNSServer(api_key="secret") as server:
+            server.populate(zones=2, records=1, suffix="replay.test.")
+            client = PDNSApiClient(server.url, "secret",
+                                   transport=RecordingTransport(self.cassette))
+            recorded = [client.get(path, params={"q": "zone-%d*" % idx})
+                        for idx in range(2)]
+            client.close()
+        self.assertNotEqual(recorded[0], recorded[1])
+        client = PDNSApiClient(PDNS_API, PDNS_KEY,
+                               transport=ReplayTransport(self.cassette))
+        self.assertEqual([client.get(path, params={"q": "zone-%d*" % idx})
+                          for idx in (1, 0)], recorded[::-1])
+        with self.assertRaises(LookupError):
+            client.get(path, params={"q": "other*"})
+
+    def test_replay_stream(self):
+        self.record()
+        client = PDNSApiClient(PDNS_API, PDNS_KEY,
+                               transport=ReplayTransport(self.cassette))
+        content = b"".join(client.get("/servers", stream=True))
+        self.assertEqual(json.loads(content.decode()), SERVERS)
+
+
+class TransportTests(object):
+    """API scenario run on every transport"""
+
+    transport = None
+
+    def setUp(self):
+        self.server = FakePDNSServer(api_key="secret").start()
+        self.addCleanup(self.server.stop)
+        self.server.add_zone("fake.test.")
+        self.client = PDNSApiClient(self.server.url, "secret",
+                                    transport=self.transport, timeout=5)
+        self.addCleanup(self.client.close)
+
+    def test_interface(self):
+        zone = PDNSEndpoint(self.client).servers[0].get_zone("fake.test.")
+        zone.create_records([RRSet("a", "A", ["10.0.0.1"])])
+        self.assertEqual(len(list(zone.iter_rrsets())), 2)
+        self.assertEqual(zone.get_record("a.fake.test.")[0]["type"], "A")
+        self.assertEqual(zone.notify(), {"result": "Notification queued"})
+
+    def test_raw_and_stream(self):
+        content = self.client.get("/servers", raw=True)
+        self.assertEqual(json.loads(content.decode())[0]["id"], "localhost")
+        chunks = list(self.client.get("/servers", stream=True, chunk_size=8))
+        self.assertEqual(b"".join(chunks), content)
+        self.assertEqual(self.client.get("/servers")[0]["id"], "localhost")
+
+    def test_errors(self):
+        with self.assertRaises(PDNSError) as context:
+            self.client.get("servers/localhost/zones/missing.")
+        self.assertEqual(context.exception.status_code, 404)
+        self.assertIn("/zones/missing.", context.exception.url)
+        self.server.latency = 0.5
+        client = PDNSApiClient(self.server.url, "secret",
+                               transport=self.transport, timeout=0.1)
+        with self.assertRaises(requests.exceptions.Timeout):
+            client.get("/servers")
+
+    def test_connection_error(self):
+        self.server.stop()
+        with self.assertRaises(requests.exceptions.ConnectionError) as context:
+            self.client.get("/servers")
+        self.assertIs(type(context.exception),
+                      requests.exceptions.ConnectionError)
+        self.assertTrue(transports.is_connect_error(context.exception))
+
+    def test_compress(self):
+        self.server.compress = True
+        client = PDNSApiClient(self.server.url, "secret", compress=True,
+                               compress_threshold=0,
+                               transport=self.transport)
+        self.assertEqual(client.get("/servers")[0]["id"], "localhost")
+        client.patch("servers/localhost/zones/fake.test.",
+                     data={"rrsets": [RRSet("b.fake.test.", "A", ["::1"])]})
+
+    def test_unsupported_argument(self):
+        with self.assertRaises(TypeError):
+            self.client.get("/servers", unsupported=True)
+
+
+class TestRequestsTransport(TransportTests, TestCase):
+
+    transport = "requests"
+
+
+class TestUrllib3Transport(TransportTests, TestCase):
+
+    transport = "urllib3"
+
+    def test_verify(self):
+        transport = transports.Urllib3Transport()
+        client = PDNSApiClient(self.server.url, "secret", verify=False,
+                               transport=transport)
+        client.get("/servers")
+        self.assertEqual([key.key_cert_reqs
+                          for key in transport.pool.pools.keys()],
+                         ["CERT_NONE"])
+        client = PDNSApiClient(self.server.url, "secret",
+                               verify=requests.certs.where(),
+                               transport=transport)
+        client.get("/servers")
+        self.assertIn(requests.certs.where(),
+                      [key.key_ca_certs
+                       for key in transport.pool.pools.keys()])
+        transport.close()
+
+
+@skipIf(transports.httpx is None, "httpx is not installed")
+class TestHttpxTransport(TransportTests, TestCase):
+
+    transport = "httpx"
+
+    def test_verify(self):
+        transport = transports.HttpxTransport()
+        for verify in (False, requests.certs.where()):
+            client = PDNSApiClient(self.server.url, "secret", verify=verify,
+                                   transport=transport)
+            client.get("/servers")
+        self.assertEqual(set(transport._clients),
+                         set([False, requests.certs.where()]))
+        self.assertIsNone(transport._client)
+        transport.close()
+        self.assertEqual(transport._clients, {})
+
+
+class TestGetTransport(TestCase):
+
+    def test_get_transport(self):
+        transport = transports.get_transport("urllib3", pool_maxsize=3)
+        self.assertIsInstance(transport, transports.Urllib3Transport)
+        self.assertIs(transports.get_transport(transport), transport)
+        self.assertIsInstance(transports.get_transport(), RequestsTransport)
+        with self.assertRaises(ValueError):
+            transports.get_transport("nonexistent")
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+#  PowerDNS web api python client and interface (python-powerdns)
+#
+#  Copyright (C) 2018 Denis Pompilio (jawa) <denis.pompilio@gmail.com>
+#
+#  This file is part of python-powerdns
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the MIT License.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  MIT License for more details.
+#
+#  You should have received a copy of the MIT License along with this
+#  program; if not, see <https://opensource.org/licenses/MIT>.
+
+
+from unittest import TestCase, mock
+
+from powerdns.cache import ResponseCache
+from powerdns.client import PDNSApiClient
+from powerdns.exceptions import PDNSError
+from powerdns.fakeserver import FakePDNSServer
+
+
+def idle_connections(client, url):
+    """Count open connections idle in the pools of a client"""
+    if client.transport._pool_attribute == '_session':
+        manager = client.session.get_adapter(url).poolmanager
+    else:
+        manager = client.transport.pool
+    pools = list(manager.pools._container.values())
+    return [sum(1 for conn in pool.pool.queue
+                if conn is not None and conn.is_connected)
+            for pool in pools]
+
+
+class TestWarmup(TestCase):
+
+    def setUp(self):
+        self.server = FakePDNSServer(api_key="secret").start()
+        self.addCleanup(self.server.stop)
+
+    def test_warmup_connections(self):
+        for transport in ("requests", "urllib3"):
+            client = PDNSApiClient(self.server.url, "secret",
+                                   transport=transport, pool_maxsize=4,
+                                   warmup_connections=8)
+            self.addCleanup(client.close)
+            self.assertEqual(idle_connections(client, self.server.url), [4])
+            self.assertEqual(client.warmup(), 4)
+            list(client.bulk([("GET", "servers")] * 8, max_workers=4))
+            # requests reuse the opened connections, in the same pool
+            self.assertEqual(idle_connections(client, self.server.url), [4])
+
+    def test_warmup_failure(self):
+        client = PDNSApiClient("http://127.0.0.1:1/api/v1", "secret",
+                               timeout=1, warmup_connections=2)
+        self.assertEqual(client.warmup(), 0)
+        client.close()
+
+    def test_warmup_urllib3_1(self):
+        # urllib3 1.26 connections tell their state by their socket only
+        connection = mock.Mock(spec=["sock", "timeout", "connect", "close"],
+                               sock=None)
+        pool = mock.Mock(host="127.0.0.1", port=1)
+        pool._get_conn.return_value = connection
+        client = PDNSApiClient(self.server.url, "secret",
+                               transport="urllib3")
+        self.addCleanup(client.close)
+        with mock.patch.object(client.transport.pool, "connection_from_url",
+                               return_value=pool):
+            self.assertEqual(client.warmup(2), 2)
+            connection.connect.side_effect = AttributeError("private API")
+            self.assertEqual(client.warmup(1), 0)
+            with mock.patch("powerdns.transport._open_connections",
+                            side_effect=AttributeError("_get_conn")):
+                self.assertEqual(client.warmup(1), 0)
+        self.assertEqual(pool._put_conn.call_count, 3)
+
+    def test_ping(self):
+        client = PDNSApiClient(self.server.url, "secret",
+                               cache=ResponseCache())
+        self.addCleanup(client.close)
+        client.get("/servers")
+        requests = self.server.requests
+        self.assertGreater(client.ping(), 0)
+        self.assertGreater(client.ping(), 0)
+        self.assertEqual(self.server.requests, requests + 2)
+        client = PDNSApiClient(self.server.url, "wrong")
+        self.addCleanup(client.close)
+        with self.assertRaises(PDNSError) as context:
+            client.ping()
+        self.assertEqual(context.exception.status_code, 401)